@@ -1,3 +1,6 @@
+import asyncio
+
+
 class BaseAgent:
     def __init__(self, token, model):
         self.token = token
@@ -6,3 +9,12 @@ class BaseAgent:
     def propose_agent_plan(self,subject_data):
         raise NotImplementedError
 
+    async def apropose_agent_plan(self, subject_data):
+        raise NotImplementedError
+
+    # Several subjects at once; agents that can share one prompt override these
+    def propose_agent_plans(self, subjects):
+        return [self.propose_agent_plan(subject) for subject in subjects]
+
+    async def apropose_agent_plans(self, subjects):
+        return list(await asyncio.gather(*(self.apropose_agent_plan(subject) for subject in subjects)))
@@ -1,36 +1,54 @@
-import json
 from datetime import datetime
-from typing import Any, Dict, List, Tuple
-
-from huggingface_hub import InferenceClient
+from typing import Any, Dict, List, Optional, Tuple
 
 from ai_system.agents.base_agent import BaseAgent
+from ai_system.utils.client_pool import get_async_inference_client, get_inference_client
+from ai_system.utils.output_parsing import parse_calendar
 from ai_system.utils.propose_feedback_reschule_logic import (
+    apropose_feedback_reschedule,
     propose_feedback_reschedule,
 )
 
 
 class FeedbackAgent(BaseAgent):
-    def __init__(self, token: str, model: str, date: datetime):
+    def __init__(self, token: str, model: str, date: Optional[datetime] = None):
         super().__init__(token, model)
-        self.date = date  # datetime representing "today" for this agent
+        self.date = date  # fixed "today" for this agent; None means datetime.now() at call time
+
+    def current_date(self) -> datetime:
+        return self.date or datetime.now()
 
     def propose_agent_plan(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        client = InferenceClient(model=self.model, token=self.token)
+        client = get_inference_client(self.model, self.token)
 
         last_feedback: Dict[str, Any] = context.get("last_feedback", {}) or {}
         last_schedule: Dict[str, Any] = context.get("last_schedule", {}) or {}
         current_feedback: Dict[str, Any] = context.get("current_feedback", {}) or {}
 
         response = propose_feedback_reschedule(
-            self.date,
+            self.current_date(),
+            client,
+            last_feedback,
+            last_schedule,
+            current_feedback,
+            context.get("window"),
+        )
+
+        return parse_calendar(response).as_agent_result()  # parse right here
+
+    async def apropose_agent_plan(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        last_feedback: Dict[str, Any] = context.get("last_feedback", {}) or {}
+        last_schedule: Dict[str, Any] = context.get("last_schedule", {}) or {}
+        current_feedback: Dict[str, Any] = context.get("current_feedback", {}) or {}
+
+        client = get_async_inference_client(self.model, self.token)
+        response = await apropose_feedback_reschedule(
+            self.current_date(),
             client,
             last_feedback,
             last_schedule,
-            current_feedback
+            current_feedback,
+            context.get("window"),
         )
 
-        try:
-            return json.loads(response)  # parse right here
-        except json.JSONDecodeError:
-            return {"raw_response": response}
+        return parse_calendar(response).as_agent_result()
@@ -1,23 +1,29 @@
-import json
-
-from huggingface_hub import InferenceClient
+from datetime import datetime
 
 from ai_system.agents.base_agent import BaseAgent
-from ai_system.utils.propose_plan_logic import propose_calendar
+from ai_system.utils.client_pool import get_async_inference_client, get_inference_client
+from ai_system.utils.output_parsing import parse_calendar
+from ai_system.utils.propose_plan_logic import apropose_calendar, propose_calendar
 
 
 class CalendarAgent(BaseAgent):
-    def __init__(self, token, model, date):
+    def __init__(self, token, model, date=None):
         super().__init__(token, model)
-        self.date=date
+        self.date = date  # fixed "today"; None means datetime.now() at call time
+
+    def current_date(self):
+        return self.date or datetime.now()
 
     def propose_agent_plan(self, plans):
 
-        client = InferenceClient(model=self.model, token=self.token)
-        response = propose_calendar(plans, self.date, client) # functie similara cu response = propose_plan(subject_data, "Mathematics", client) din ceilalti agenti, dar cu alte prompturi
+        client = get_inference_client(self.model, self.token)
+        response = propose_calendar(plans, self.current_date(), client) # functie similara cu response = propose_plan(subject_data, "Mathematics", client) din ceilalti agenti, dar cu alte prompturi
+
+        return parse_calendar(response).as_agent_result()  # parse right here
+
+    async def apropose_agent_plan(self, plans):
 
-        try:
-            return json.loads(response)  # parse right here
-        except json.JSONDecodeError:
-            return {"raw_response": response}
+        client = get_async_inference_client(self.model, self.token)
+        response = await apropose_calendar(plans, self.current_date(), client)
 
+        return parse_calendar(response).as_agent_result()
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from ai_system.agents.base_agent import BaseAgent
+from ai_system.utils.local_calendar_merge import merge_plans_locally
+
+
+class LocalCalendarAgent(BaseAgent):
+    """Drop-in replacement for CalendarAgent that merges the plans without an LLM call."""
+
+    def __init__(self, date=None):
+        super().__init__(token=None, model=None)
+        self.date = date  # fixed "today"; None means datetime.now() at call time
+
+    def current_date(self):
+        return self.date or datetime.now()
+
+    def merge(self, plans):
+        return merge_plans_locally(plans, self.current_date())
+
+    def propose_agent_plan(self, plans):
+        return self.merge(plans).calendar
+
+    async def apropose_agent_plan(self, plans):
+        return self.propose_agent_plan(plans)
@@ -0,0 +1,47 @@
+from ai_system.agents.base_agent import BaseAgent
+from ai_system.utils.client_pool import get_async_inference_client, get_inference_client
+from ai_system.utils.output_parsing import parse_subject_plan, parse_subject_plan_batch
+from ai_system.utils.propose_plan_logic import apropose_plan, apropose_plan_batch, propose_plan, propose_plan_batch
+
+
+class SubjectAgent(BaseAgent):
+    """Plans subjects of one university domain; subclasses only set university_type."""
+
+    university_type: str
+
+    def propose_agent_plan(self, subject_data):
+
+        client = get_inference_client(self.model, self.token)
+        response = propose_plan(subject_data, self.university_type, client)
+
+        return parse_subject_plan(response).as_agent_result()  # parse right here
+
+    async def apropose_agent_plan(self, subject_data):
+
+        client = get_async_inference_client(self.model, self.token)
+        response = await apropose_plan(subject_data, self.university_type, client)
+
+        return parse_subject_plan(response).as_agent_result()
+
+    def propose_agent_plans(self, subjects):
+        # one prompt for the whole batch; subjects the answer doesn't cover are planned one by one
+        if len(subjects) == 1:
+            return [self.propose_agent_plan(subjects[0])]
+
+        client = get_inference_client(self.model, self.token)
+        response = propose_plan_batch(subjects, self.university_type, client)
+        plans = parse_subject_plan_batch(response, subjects)
+
+        return [plan if plan is not None else self.propose_agent_plan(subject) for plan, subject in zip(plans, subjects)]
+
+    async def apropose_agent_plans(self, subjects):
+        if len(subjects) == 1:
+            return [await self.apropose_agent_plan(subjects[0])]
+
+        client = get_async_inference_client(self.model, self.token)
+        response = await apropose_plan_batch(subjects, self.university_type, client)
+        plans = parse_subject_plan_batch(response, subjects)
+
+        missing = [subject for plan, subject in zip(plans, subjects) if plan is None]
+        retried = iter(await super().apropose_agent_plans(missing))
+        return [plan if plan is not None else next(retried) for plan in plans]
@@ -1,127 +1,189 @@
-import requests
-from typing import Dict, Any, List, Optional
+import asyncio
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional
 
+import httpx
 
-class BackendAPI:
+from ai_system.backend.data_provider import (
+    DataProvider,
+    FeedbackRecord,
+    ScheduleDay,
+    ScheduleEntry,
+    SubjectRecord,
+)
+from ai_system.utils.resilience import RetryPolicy, is_retryable_error
+
+BACKEND_CONNECT_TIMEOUT = float(os.getenv("BACKEND_CONNECT_TIMEOUT", "3"))
+BACKEND_READ_TIMEOUT = float(os.getenv("BACKEND_READ_TIMEOUT", "15"))
+BACKEND_MAX_CONNECTIONS = int(os.getenv("BACKEND_MAX_CONNECTIONS", "20"))
+BACKEND_MAX_ATTEMPTS = int(os.getenv("BACKEND_MAX_ATTEMPTS", "3"))
+
+
+def _subject_records(subjects: List[Dict[str, Any]]) -> List[SubjectRecord]:
+    return [
+        SubjectRecord(
+            id=s["id"],
+            title=s["title"],
+            name=s["name"],
+            start=s["start_date"],
+            end=s["end_date"],
+            type=s["type"],  # EXAM / PROJECT / etc.
+            difficulty=s["difficulty"],
+            description=s["description"],
+            status=s["status"],  # PENDING / IN_PROGRESS / COMPLETED
+        )
+        for s in subjects
+    ]
+
+
+def _feedback_records(feedbacks: Optional[List[Dict[str, Any]]]) -> List[FeedbackRecord]:
+    return [
+        FeedbackRecord(created_at=fb.get("created_at"), text=fb.get("comments", ""), rating=fb.get("rating"))
+        for fb in feedbacks or []
+    ]
+
+
+def _schedule_days(plans: Optional[List[Dict[str, Any]]]) -> List[ScheduleDay]:
+    return [
+        ScheduleDay(
+            date=plan["plan_date"],
+            entries=tuple(
+                ScheduleEntry(
+                    time_allotted=task["time_allotted"],
+                    task_name=task["ai_task_name"],
+                    subject_name=task["task_name"],
+                    difficulty=task["difficulty"],
+                    priority=task["priority"],
+                )
+                for task in plan.get("entries", [])
+            ),
+            notes=plan.get("notes") or "",
+        )
+        for plan in plans or []
+    ]
+
+
+class BackendAPI(DataProvider):
     """
-    Wrapper over your FastAPI backend.
-    Provides:
+    HTTP data provider over your FastAPI backend, for running the AI system outside the API process.
+    Provides (see DataProvider):
       - get_user_data(user_id)
       - get_current_and_last_feedback(user_id)
-      - get_last_schedule(user_id)
+      - get_latest_schedule(user_id)
+      - get_feedback_and_schedule(user_id)
+    and their a-prefixed asyncio variants.
+
+    Requests go through one keep-alive connection pool (one per event loop for the async client)
+    with connect/read timeouts; timeouts, dropped connections and 429/5xx answers are retried with
+    jittered backoff, and anything still failing is raised rather than papered over.
     """
 
-    def __init__(self, base_url: str):
+    def __init__(
+            self,
+            base_url: str,
+            connect_timeout: float = BACKEND_CONNECT_TIMEOUT,
+            read_timeout: float = BACKEND_READ_TIMEOUT,
+            max_attempts: int = BACKEND_MAX_ATTEMPTS,
+            transport: Optional[httpx.BaseTransport] = None,
+            async_transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """transport / async_transport replace the network, e.g. httpx.ASGITransport(app) in tests."""
         self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=BACKEND_MAX_CONNECTIONS,
+                                   max_keepalive_connections=BACKEND_MAX_CONNECTIONS)
+        self.retry_policy = RetryPolicy(max_attempts=max(1, max_attempts), base_delay=0.2, max_delay=2.0)
+        self._async_transport = async_transport
+        # FastAPI redirects between "/path" and "/path/"; follow it like requests did
+        self._client = httpx.Client(base_url=self.base_url, timeout=self.timeout, limits=self.limits,
+                                    follow_redirects=True, transport=transport)
+        # httpx.AsyncClient is bound to the event loop that created it
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._async_clients[loop] = httpx.AsyncClient(
+                    base_url=self.base_url, timeout=self.timeout, limits=self.limits,
+                    follow_redirects=True, transport=self._async_transport,
+                )
+        return client
+
+    def close(self) -> None:
+        self._client.close()
+
+    async def aclose(self) -> None:
+        """Close the running loop's async client (the sync pool stays usable)."""
+        with self._lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def _should_retry(self, path: str, attempt: int, error: httpx.HTTPError) -> Optional[float]:
+        """Backoff delay before the next attempt, or None to give up."""
+        if attempt >= self.retry_policy.max_attempts or not is_retryable_error(error):
+            return None
+        delay = self.retry_policy.backoff_delay(attempt)
+        reason = error.response.status_code if isinstance(error, httpx.HTTPStatusError) else error
+        print(f"[BackendAPI] GET {path} failed ({type(error).__name__}: {reason}); "
+              f"retry {attempt}/{self.retry_policy.max_attempts - 1} in {delay:.2f}s")
+        return delay
+
+    @staticmethod
+    def _json(response: httpx.Response, missing_ok: bool) -> Any:
+        if response.status_code == 404 and missing_ok:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def _get(self, path: str, missing_ok: bool = False) -> Any:
+        """GET path and decode its JSON; a 404 gives None when missing_ok."""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return self._json(self._client.get(path), missing_ok)
+            except httpx.HTTPError as e:
+                delay = self._should_retry(path, attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    async def _aget(self, path: str, missing_ok: bool = False) -> Any:
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return self._json(await self._async_client().get(path), missing_ok)
+            except httpx.HTTPError as e:
+                delay = self._should_retry(path, attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    # a missing user is an error for subjects; no feedback / no schedule yet just means empty
+
+    def list_subjects(self, user_id: int) -> List[SubjectRecord]:
+        return _subject_records(self._get(f"/users/{user_id}/subjects/"))
+
+    def latest_feedback(self, user_id: int) -> List[FeedbackRecord]:
+        return _feedback_records(self._get(f"/users/{user_id}/feedback/latest", missing_ok=True))
+
+    def latest_schedule_days(self, user_id: int) -> List[ScheduleDay]:
+        return _schedule_days(self._get(f"/users/{user_id}/plans/latest-schedule", missing_ok=True))
+
+    async def alist_subjects(self, user_id: int) -> List[SubjectRecord]:
+        return _subject_records(await self._aget(f"/users/{user_id}/subjects/"))
+
+    async def alatest_feedback(self, user_id: int) -> List[FeedbackRecord]:
+        return _feedback_records(await self._aget(f"/users/{user_id}/feedback/latest", missing_ok=True))
 
-    def get_user_data(self, user_id: int) -> Dict[str, Any]:
-        """
-        Returns user subjects in the format expected by the orchestrator.
-        """
-        url = f"{self.base_url}/users/{user_id}/subjects"
-
-        response = requests.get(url)
-
-        if response.status_code != 200:
-            raise Exception(
-                f"[BackendAPI] Failed to fetch subjects: {response.status_code} - {response.text}"
-            )
-
-        subjects = response.json()  # list of SubjectResponse
-
-        #convert backend subjects → orchestrator tasks format
-        tasks = []
-        for s in subjects:
-            tasks.append({
-                "id": s["id"],
-                "title": s["title"],
-                "subject_name/project_name": s["name"],
-                "start_datetime": s["start_date"],
-                "end_datetime": s["end_date"],
-                "type": s["type"],  # EXAM / PROJECT / etc.
-                "difficulty": s["difficulty"],
-                "description": s["description"],
-                "status": s["status"],  # PENDING / IN_PROGRESS / COMPLETED
-            })
-
-        return {"tasks": tasks}
-
-    def get_current_and_last_feedback(self, user_id: int) -> Dict[str, Any]:
-        """
-        Get the last 2 feedbacks for a user.
-        Returns: {
-            "current_feedback": feedback from latest schedule,
-            "last_feedback": feedback from second latest schedule (if exists)
-        }
-        """
-        url = f"{self.base_url}/users/{user_id}/feedback/latest"
-        
-        try:
-            response = requests.get(url)
-            if response.status_code != 200:
-                raise Exception(f"Failed to fetch latest feedbacks: {response.status_code}")
-            
-            feedbacks = response.json()  # List of last 2 feedbacks
-            
-            # Map to orchestrator format
-            result = {}
-            if feedbacks and len(feedbacks) > 0:
-                fb = feedbacks[0]  # Latest feedback
-                result["current_feedback"] = {
-                    "created_at": fb.get("created_at"),
-                    "text": fb.get("comments", ""),
-                    "rating": fb.get("rating"),
-                }
-            
-            if feedbacks and len(feedbacks) > 1:
-                fb = feedbacks[1]  # Second latest feedback
-                result["last_feedback"] = {
-                    "created_at": fb.get("created_at"),
-                    "text": fb.get("comments", ""),
-                    "rating": fb.get("rating"),
-                }
-            
-            return result
-        except Exception as e:
-            print(f"[BackendAPI] Warning: Could not fetch latest feedback: {e}")
-            return {}
-
-    def get_latest_schedule(self, user_id: int) -> Dict[str, Any]:
-        """
-        Get the entire latest schedule (all plans from latest generation).
-        Returns plans in the format expected by the orchestrator.
-        """
-        url = f"{self.base_url}/users/{user_id}/plans/latest-schedule"
-        
-        try:
-            response = requests.get(url)
-            if response.status_code != 200:
-                raise Exception(f"Failed to fetch latest schedule: {response.status_code}")
-            
-            plans = response.json()  # List of PlanResponse
-            
-            # Convert plans to orchestrator calendar format
-            calendar = []
-            for plan in plans:
-                day_entry = {
-                    "date": plan["plan_date"],
-                    "entries": [],
-                    "notes": plan.get("notes", ""),
-                }
-                
-                # Add AI tasks as entries
-                for task in plan.get("entries", []):
-                    day_entry["entries"].append({
-                        "time_allotted": task["time_allotted"],
-                        "task_name": task["ai_task_name"],
-                        "subject_name/project_name": task["task_name"],
-                        "difficulty": task["difficulty"],
-                        "priority": task["priority"],
-                    })
-                
-                calendar.append(day_entry)
-            
-            return {"calendar": calendar}
-        except Exception as e:
-            print(f"[BackendAPI] Warning: Could not fetch latest schedule: {e}")
-            return None
\ No newline at end of file
+    async def alatest_schedule_days(self, user_id: int) -> List[ScheduleDay]:
+        return _schedule_days(await self._aget(f"/users/{user_id}/plans/latest-schedule", missing_ok=True))
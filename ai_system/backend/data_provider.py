@@ -0,0 +1,262 @@
+"""
+Where the orchestrator and the rescheduler read a user's subjects, feedback and latest schedule from.
+
+DataProvider is the interface: implementations return compact typed records, and the base class
+turns them into the dict formats the agents consume. BackendAPI (backend_api.py) reads them over
+HTTP for remote use; InProcessDataProvider reads them straight from the repositories, so a
+generation running inside the FastAPI process doesn't call its own API through a loopback request.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date as date_type, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _iso(value: Any) -> Optional[str]:
+    if isinstance(value, (datetime, date_type)):
+        return value.isoformat()
+    return value
+
+
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+@dataclass(frozen=True, slots=True)
+class SubjectRecord:
+    id: int
+    title: str
+    name: str
+    start: Optional[str]  # ISO datetime
+    end: Optional[str]
+    type: str
+    difficulty: int
+    description: Optional[str]
+    status: str
+
+    def as_task(self) -> Dict[str, Any]:
+        """The orchestrator's task format."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "subject_name/project_name": self.name,
+            "start_datetime": self.start,
+            "end_datetime": self.end,
+            "type": self.type,
+            "difficulty": self.difficulty,
+            "description": self.description,
+            "status": self.status,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class FeedbackRecord:
+    created_at: Optional[str]
+    text: str
+    rating: Optional[int]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"created_at": self.created_at, "text": self.text, "rating": self.rating}
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduleEntry:
+    time_allotted: str
+    task_name: str
+    subject_name: str
+    difficulty: int
+    priority: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "time_allotted": self.time_allotted,
+            "task_name": self.task_name,
+            "subject_name/project_name": self.subject_name,
+            "difficulty": self.difficulty,
+            "priority": self.priority,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduleDay:
+    date: str  # YYYY-MM-DD
+    entries: Tuple[ScheduleEntry, ...]
+    notes: str = ""
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"date": self.date, "entries": [e.as_dict() for e in self.entries], "notes": self.notes}
+
+
+class DataProvider:
+    """
+    Implementations provide list_subjects, latest_feedback and latest_schedule_days; the
+    get_* methods adapt them to what AiOrchestrator / AiRescheduler expect.
+    """
+
+    def list_subjects(self, user_id: int) -> List[SubjectRecord]:
+        raise NotImplementedError
+
+    def latest_feedback(self, user_id: int) -> List[FeedbackRecord]:
+        """Up to the two most recent feedbacks, newest first."""
+        raise NotImplementedError
+
+    def latest_schedule_days(self, user_id: int) -> List[ScheduleDay]:
+        """Days of the latest generation, in date order; empty if the user has none."""
+        raise NotImplementedError
+
+    def get_user_data(self, user_id: int) -> Dict[str, Any]:
+        """
+        Returns user subjects in the format expected by the orchestrator.
+        """
+        return {"tasks": [s.as_task() for s in self.list_subjects(user_id)]}
+
+    def get_current_and_last_feedback(self, user_id: int) -> Dict[str, Any]:
+        """
+        Returns: {
+            "current_feedback": feedback from latest schedule,
+            "last_feedback": feedback from second latest schedule (if exists)
+        }
+        """
+        return _feedback_context(self.latest_feedback(user_id))
+
+    def get_latest_schedule(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        The entire latest schedule as {"calendar": [...]}, or None if there is none.
+        """
+        return _calendar(self.latest_schedule_days(user_id))
+
+    def get_feedback_and_schedule(self, user_id: int) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Both rescheduling inputs, fetched concurrently."""
+        feedback = _io_executor.submit(self.get_current_and_last_feedback, user_id)
+        schedule = self.get_latest_schedule(user_id)
+        return feedback.result(), schedule
+
+    # asyncio variants; providers with a native async transport override the a* record methods
+
+    async def alist_subjects(self, user_id: int) -> List[SubjectRecord]:
+        return await asyncio.to_thread(self.list_subjects, user_id)
+
+    async def alatest_feedback(self, user_id: int) -> List[FeedbackRecord]:
+        return await asyncio.to_thread(self.latest_feedback, user_id)
+
+    async def alatest_schedule_days(self, user_id: int) -> List[ScheduleDay]:
+        return await asyncio.to_thread(self.latest_schedule_days, user_id)
+
+    async def aget_user_data(self, user_id: int) -> Dict[str, Any]:
+        return {"tasks": [s.as_task() for s in await self.alist_subjects(user_id)]}
+
+    async def aget_feedback_and_schedule(self, user_id: int) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        feedbacks, days = await asyncio.gather(self.alatest_feedback(user_id), self.alatest_schedule_days(user_id))
+        return _feedback_context(feedbacks), _calendar(days)
+
+
+def _feedback_context(feedbacks: List[FeedbackRecord]) -> Dict[str, Any]:
+    result = {}
+    if len(feedbacks) > 0:
+        result["current_feedback"] = feedbacks[0].as_dict()
+    if len(feedbacks) > 1:
+        result["last_feedback"] = feedbacks[1].as_dict()
+    return result
+
+
+def _calendar(days: List[ScheduleDay]) -> Optional[Dict[str, Any]]:
+    return {"calendar": [d.as_dict() for d in days]} if days else None
+
+
+# blocking fetches that run side by side in the sync get_feedback_and_schedule
+_io_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="data-provider")
+
+
+class InProcessDataProvider(DataProvider):
+    """
+    Reads through the backend repositories in a short session per call. Only usable where the
+    backend package and its database are available, i.e. inside the API process or its workers.
+    """
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from backend.config.database import get_session
+            session_factory = get_session
+        self.session_factory = session_factory
+
+    def list_subjects(self, user_id: int) -> List[SubjectRecord]:
+        from backend.repository.subject_repository import SubjectRepository
+        from backend.repository.user_repository import UserRepository
+
+        with self.session_factory() as session:
+            if not UserRepository(session).get(user_id):
+                raise LookupError(f"User {user_id} not found")
+            return [
+                SubjectRecord(
+                    id=s.id,
+                    title=s.title,
+                    name=s.name,
+                    start=_iso(s.start_date),
+                    end=_iso(s.end_date),
+                    type=_enum_value(s.type),
+                    difficulty=s.difficulty,
+                    description=s.description,
+                    status=_enum_value(s.status),
+                )
+                for s in SubjectRepository(session).list_for_user(user_id)
+            ]
+
+    def latest_feedback(self, user_id: int) -> List[FeedbackRecord]:
+        from backend.repository.feedback_repository import FeedbackRepository
+
+        with self.session_factory() as session:
+            return [
+                FeedbackRecord(created_at=_iso(f.created_at), text=f.comments or "", rating=f.rating)
+                for f in FeedbackRepository(session).list_for_user(user_id, limit=2)
+            ]
+
+    def latest_schedule_days(self, user_id: int) -> List[ScheduleDay]:
+        from backend.repository.plan_repository import PlanRepository
+
+        with self.session_factory() as session:
+            return [
+                ScheduleDay(
+                    date=_iso(plan.plan_date),
+                    entries=tuple(
+                        ScheduleEntry(
+                            time_allotted=t.time_allotted,
+                            task_name=t.ai_task_name,
+                            subject_name=t.subject.name,
+                            difficulty=t.difficulty,
+                            priority=t.priority,
+                        )
+                        for t in plan.ai_tasks
+                    ),
+                    notes=plan.notes or "",
+                )
+                for plan in PlanRepository(session).get_latest_generation(user_id)
+            ]
+
+
+_default_provider: Optional[DataProvider] = None
+_default_lock = threading.Lock()
+
+
+def set_default_data_provider(provider: Optional[DataProvider]) -> None:
+    """Provider for orchestrators built without an explicit backend URL (None restores HTTP)."""
+    global _default_provider
+    with _default_lock:
+        _default_provider = provider
+
+
+def get_data_provider(backend_base_url: Optional[str], default_base_url: str) -> DataProvider:
+    """
+    DATA_PROVIDER=http|inprocess forces a choice. Otherwise an explicit backend_base_url means
+    HTTP, and the default provider (set by the API process at startup) is used if there is one.
+    """
+    from ai_system.backend.backend_api import BackendAPI
+
+    choice = os.getenv("DATA_PROVIDER", "").lower()
+    if choice == "inprocess":
+        return InProcessDataProvider()
+    if choice != "http" and backend_base_url is None and _default_provider is not None:
+        return _default_provider
+    return BackendAPI(backend_base_url or default_base_url)
@@ -0,0 +1,321 @@
+"""
+Cohort-scale schedule generation, e.g. to pre-generate every student's schedule overnight.
+
+User ids (users with at least one subject) are streamed from the database in pages and sharded
+across a process pool. Each worker process runs a few generations at a time on its own event loop,
+reads through the repositories (no HTTP round trips), caps the LLM calls it has in flight and
+persists every result exactly like POST /users/{user_id}/plans/generate does. The in-flight cap is
+the key pool's HF_MAX_IN_FLIGHT, so it only applies when an HF token is configured; without one
+there is no pool and no cap (e.g. against the fake backend).
+
+Finished users are appended to a JSON lines checkpoint, so an interrupted run picks up where it
+stopped when started again with the same --checkpoint (failed users are retried, --restart starts
+over). The default checkpoint lives in ai_system/.cache whatever the working directory. The end of the run reports throughput and per-stage timings.
+
+    python -m ai_system.batch --processes 4 --users-per-process 4 --llm-concurrency 16
+    python -m ai_system.batch --merge-mode local --limit 1000 --json batch_report.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from ai_system.benchmark import percentile
+
+DEFAULT_CHECKPOINT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), ".cache", "batch_checkpoint.jsonl")
+)
+STAGES = ("plan_subjects", "merge_calendar", "persist", "total")
+
+# set once per worker process by _init_worker
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _register_models() -> None:
+    # Imported for its side effect: it imports every model module, so relationship() targets given
+    # by name resolve. Outside the API process nothing else does, and the first query would fail.
+    import backend.init_db  # noqa: F401
+
+
+def stream_user_ids(page_size: int = 500) -> Iterator[int]:
+    """Ids of every user with subjects, ascending, one short session per page."""
+    _register_models()
+    from backend.config.database import get_session
+    from backend.repository.subject_repository import SubjectRepository
+
+    after_id = 0
+    while True:
+        with get_session() as session:
+            page = SubjectRepository(session).list_student_ids(after_id=after_id, limit=page_size)
+        if not page:
+            return
+        yield from page
+        after_id = page[-1]
+
+
+def _chunks(items: Iterable[int], size: int) -> Iterator[List[int]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Checkpoint:
+    """Append-only JSON lines file of finished users; written by the parent process only."""
+
+    def __init__(self, path: str, restart: bool = False):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if restart and os.path.exists(path):
+            os.remove(path)
+
+    def completed(self) -> Set[int]:
+        """Users that don't need another run (succeeded, or nothing to plan)."""
+        done: Set[int] = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line of an interrupted run
+                if entry.get("status") in ("succeeded", "skipped"):
+                    done.add(entry["user_id"])
+                else:
+                    done.discard(entry["user_id"])
+        return done
+
+    def append(self, results: List[Dict[str, Any]]) -> None:
+        with open(self.path, "a") as f:
+            for result in results:
+                f.write(json.dumps({
+                    "user_id": result["user_id"],
+                    "status": result["status"],
+                    "generation_id": result.get("generation_id"),
+                    "error": result.get("error"),
+                    "finished_at": time.time(),
+                }) + "\n")
+            f.flush()
+
+
+# --- worker process ---------------------------------------------------------------------------
+
+def _init_worker(llm_concurrency: int) -> None:
+    global _worker_loop
+    # read by the key pool when it is built on the first LLM call in this process
+    os.environ["HF_MAX_IN_FLIGHT"] = str(llm_concurrency)
+    _register_models()
+
+    from ai_system.backend.data_provider import InProcessDataProvider, set_default_data_provider
+
+    set_default_data_provider(InProcessDataProvider())
+    # one loop for the process lifetime: pooled async clients are bound to the loop that made them
+    _worker_loop = asyncio.new_event_loop()
+
+
+def _has_subjects(user_id: int) -> bool:
+    from backend.config.database import get_session
+    from backend.repository.subject_repository import SubjectRepository
+
+    with get_session() as session:
+        return bool(SubjectRepository(session).list_for_user(user_id, limit=1))
+
+
+def _persist(user_id: int, ai_plan: Dict[str, Any]) -> str:
+    from backend.config.database import get_session
+    from backend.repository.ai_task_repository import AITaskRepository
+    from backend.repository.plan_repository import PlanRepository
+    from backend.repository.subject_repository import SubjectRepository
+    from backend.repository.user_repository import UserRepository
+    from backend.service.generation_service import GenerationService
+
+    with get_session() as session:
+        service = GenerationService(
+            PlanRepository(session),
+            UserRepository(session),
+            SubjectRepository(session),
+            AITaskRepository(session),
+        )
+        generation_id, _ = service.persist_calendar(user_id=user_id, ai_plan=ai_plan, log_prefix="batch_generate")
+        return generation_id
+
+
+async def _agenerate_user(orchestrator, user_id: int, merge_mode: Optional[str]) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"user_id": user_id, "status": "failed", "timings": {}}
+    timings = result["timings"]
+    started = time.perf_counter()
+    try:
+        if not await asyncio.to_thread(_has_subjects, user_id):
+            result["status"] = "skipped"
+            return result
+
+        ai_plan = None
+        merge_started = None
+        async for event, data in orchestrator.astream_plan_for_user(user_id, merge_mode=merge_mode):
+            if event == "calendar_merge_started":
+                merge_started = time.perf_counter()
+                timings["plan_subjects"] = merge_started - started
+            elif event == "calendar_merged":
+                ai_plan = data
+        merged = time.perf_counter()
+        if merge_started is None:  # unchanged since the last generation: nothing was merged
+            timings["plan_subjects"] = merged - started
+        else:
+            timings["merge_calendar"] = merged - merge_started
+
+        if not ai_plan or "calendar" not in ai_plan:
+            result["error"] = "AI orchestrator failed to generate a valid plan"
+            return result
+
+        result["generation_id"] = await asyncio.to_thread(_persist, user_id, ai_plan)
+        timings["persist"] = time.perf_counter() - merged
+        result["status"] = "succeeded"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        timings["total"] = time.perf_counter() - started
+    return result
+
+
+async def _agenerate_shard(user_ids: List[int], merge_mode: Optional[str], concurrency: int) -> List[Dict[str, Any]]:
+    from ai_system.orchestrator.registry import get_orchestrator
+
+    orchestrator = get_orchestrator()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(user_id: int) -> Dict[str, Any]:
+        async with semaphore:
+            return await _agenerate_user(orchestrator, user_id, merge_mode)
+
+    return await asyncio.gather(*(one(u) for u in user_ids))
+
+
+def _run_shard(user_ids: List[int], merge_mode: Optional[str], concurrency: int) -> List[Dict[str, Any]]:
+    return _worker_loop.run_until_complete(_agenerate_shard(user_ids, merge_mode, concurrency))
+
+
+# --- parent process ---------------------------------------------------------------------------
+
+def _report(results: List[Dict[str, Any]], elapsed: float, resumed: int) -> Dict[str, Any]:
+    counts = {status: sum(r["status"] == status for r in results) for status in ("succeeded", "failed", "skipped")}
+    processed = counts["succeeded"] + counts["failed"]
+    stages = {}
+    for stage in STAGES:
+        samples = [r["timings"][stage] for r in results if r["status"] == "succeeded" and stage in r["timings"]]
+        stages[stage] = {
+            "count": len(samples),
+            "mean_s": round(sum(samples) / len(samples), 3) if samples else None,
+            "p50_s": round(percentile(samples, 0.50), 3) if samples else None,
+            "p95_s": round(percentile(samples, 0.95), 3) if samples else None,
+            "total_s": round(sum(samples), 1),
+        }
+    return {
+        **counts,
+        "already_done": resumed,
+        "elapsed_s": round(elapsed, 1),
+        "users_per_min": round(processed / elapsed * 60, 1) if elapsed else None,
+        "stages": stages,
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"[batch] succeeded={report['succeeded']} failed={report['failed']} skipped={report['skipped']} "
+          f"already_done={report['already_done']} elapsed={report['elapsed_s']}s "
+          f"throughput={report['users_per_min']} users/min")
+    columns = ["stage", "count", "mean_s", "p50_s", "p95_s", "total_s"]
+    rows = [{"stage": stage, **values} for stage, values in report["stages"].items()]
+    widths = {c: max(len(c), *(len(str(r.get(c))) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row.get(c)).ljust(widths[c]) for c in columns))
+
+
+def run_batch(args: argparse.Namespace) -> Dict[str, Any]:
+    checkpoint = Checkpoint(args.checkpoint, restart=args.restart)
+    done = checkpoint.completed()
+    if done:
+        print(f"[batch] Resuming: {len(done)} user(s) already done in {checkpoint.path}")
+
+    if args.user_ids:
+        user_ids: Iterable[int] = [int(u) for u in args.user_ids.split(",") if u.strip()]
+    else:
+        user_ids = stream_user_ids(args.page_size)
+    todo = (u for u in user_ids if u not in done)
+    if args.limit is not None:
+        todo = islice(todo, args.limit)
+    shards = _chunks(todo, args.shard_size or args.users_per_process * 4)
+
+    results: List[Dict[str, Any]] = []
+    started = time.perf_counter()
+    context = multiprocessing.get_context("spawn")  # no inherited DB connections or event loops
+    executor = ProcessPoolExecutor(max_workers=args.processes, mp_context=context,
+                                   initializer=_init_worker, initargs=(args.llm_concurrency,))
+    pending: Set[Future] = set()
+    try:
+        while True:
+            # keep every process busy with one shard queued behind it
+            while len(pending) < args.processes * 2:
+                shard = next(shards, None)
+                if shard is None:
+                    break
+                pending.add(executor.submit(_run_shard, shard, args.merge_mode, args.users_per_process))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                shard_results = future.result()
+                checkpoint.append(shard_results)
+                results.extend(shard_results)
+                for r in shard_results:
+                    if r["status"] == "failed":
+                        print(f"[batch] User {r['user_id']} failed: {r.get('error')}")
+            processed = sum(r["status"] != "skipped" for r in results)
+            minutes = (time.perf_counter() - started) / 60
+            print(f"[batch] {len(results)} user(s) done, {processed / minutes:.1f} users/min")
+    except KeyboardInterrupt:
+        print("[batch] Interrupted; finished users are in the checkpoint, run again to resume")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+    report = _report(results, time.perf_counter() - started, len(done))
+    _print_report(report)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Generate schedules for every student with subjects.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2, help="worker processes")
+    parser.add_argument("--users-per-process", type=int, default=4, help="generations running at once per process")
+    parser.add_argument("--llm-concurrency", type=int, default=16,
+                        help="LLM calls in flight per process (HF_MAX_IN_FLIGHT of the key pool, "
+                             "so only enforced when an HF token is configured)")
+    parser.add_argument("--merge-mode", choices=("local", "llm", "hybrid"), default=None,
+                        help="defaults to CALENDAR_MERGE_MODE")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT,
+                        help="JSON lines progress file (default: ai_system/.cache/batch_checkpoint.jsonl)")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    parser.add_argument("--user-ids", default=None, help="comma separated user ids instead of all users")
+    parser.add_argument("--limit", type=int, default=None, help="at most this many users in this run")
+    parser.add_argument("--page-size", type=int, default=500, help="user ids read per database query")
+    parser.add_argument("--shard-size", type=int, default=None, help="users per task sent to a process")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_batch(args)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+End-to-end benchmark of AiOrchestrator / AiRescheduler against the local fake inference backend.
+
+Synthetic students with a given number of subjects are generated and planned concurrently;
+the report gives p50/p95/p99 latency per generation, throughput, LLM calls and the peak number
+of threads and resident memory seen during each scenario.
+
+    python -m ai_system.benchmark --subjects 1,10,50,100 --students 20 --concurrency 8
+    python -m ai_system.benchmark --pipeline reschedule --latency-ms 800 --error-rate 0.05 --json out.json
+
+The response cache and the incremental plan store are disabled unless --with-cache is given, so
+every generation really goes through the agents.
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from ai_system.backend.data_provider import DataProvider
+
+SUBJECT_POOL = [
+    ("Calculus", "written"), ("Linear Algebra", "written"), ("Probability and Statistics", "practical"),
+    ("Classical Mechanics", "written"), ("Numerical Methods", "assignment"), ("Geometry", "practical"),
+    ("Databases", "project"), ("Operating Systems", "written"), ("Computer Networks", "practical"),
+    ("Object-Oriented Programming", "project"), ("Algorithms and Programming", "practical"),
+    ("Software Engineering", "assignment"), ("Web Development", "project"), ("Compilers", "written"),
+]
+
+
+def synthetic_student(subjects: int, today: datetime) -> Dict[str, Any]:
+    tasks = []
+    for index in range(subjects):
+        name, type_ = SUBJECT_POOL[index % len(SUBJECT_POOL)]
+        start = today + timedelta(days=3 + (index * 57) % 60, hours=(index % 5) * 2)
+        tasks.append({
+            "id": index + 1,
+            "title": f"{name} {type_} {index + 1}",
+            "subject_name/project_name": f"{name} {index // len(SUBJECT_POOL) + 1}",
+            "start_datetime": start.isoformat(timespec="seconds"),
+            "end_datetime": (start + timedelta(hours=2 if type_ != "project" else 24 * 7)).isoformat(timespec="seconds"),
+            "type": type_,
+            "difficulty": 1 + index % 5,
+            "description": "Synthetic benchmark subject.",
+            "status": "Pending",
+        })
+    return {"tasks": tasks}
+
+
+def synthetic_schedule(student: Dict[str, Any], today: datetime, days: int = 60) -> Dict[str, Any]:
+    names = [t["subject_name/project_name"] for t in student["tasks"]] or ["General study"]
+    calendar = []
+    for offset in range(-10, days):
+        day = today + timedelta(days=offset)
+        calendar.append({
+            "date": day.date().isoformat(),
+            "entries": [
+                {
+                    "time_allotted": f"{9 + 3 * slot:02d}:00–{11 + 3 * slot:02d}:00",
+                    "task_name": "Study session",
+                    "subject_name/project_name": names[(offset + slot) % len(names)],
+                    "difficulty": 3,
+                    "priority": slot + 1,
+                }
+                for slot in range(3)
+            ],
+            "notes": "",
+        })
+    return {"calendar": calendar}
+
+
+class ResourceSampler:
+    """Background thread recording the peak thread count and resident memory."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak_threads = 0
+        self.peak_rss_bytes: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "ResourceSampler":
+        self._thread = threading.Thread(target=self._run, name="benchmark-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak_threads = max(self.peak_threads, threading.active_count() - 1)  # minus the sampler
+            rss = current_rss_bytes()
+            if rss is not None:
+                self.peak_rss_bytes = max(self.peak_rss_bytes or 0, rss)
+            self._stop.wait(self.interval)
+
+    def peak_rss_mb(self) -> Optional[float]:
+        """Highest resident memory sampled during this scenario (None where it can't be read)."""
+        if self.peak_rss_bytes is None:
+            return None
+        return round(self.peak_rss_bytes / (1024 * 1024), 1)
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Current resident set size from /proc/self/statm (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))]
+
+
+class SyntheticDataProvider(DataProvider):
+    """Serves the generated students from memory, in place of the backend."""
+
+    def __init__(self, students: Dict[int, Dict[str, Any]], schedules: Dict[int, Dict[str, Any]]):
+        self.students = students
+        self.schedules = schedules
+
+    def get_user_data(self, user_id: int) -> Dict[str, Any]:
+        return self.students[user_id]
+
+    def get_current_and_last_feedback(self, user_id: int) -> Dict[str, Any]:
+        return {"current_feedback": {"text": "Please move the evening sessions earlier.", "rating": 3}}
+
+    def get_latest_schedule(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return self.schedules[user_id]
+
+    async def aget_user_data(self, user_id: int) -> Dict[str, Any]:
+        return self.get_user_data(user_id)
+
+    async def aget_feedback_and_schedule(self, user_id: int):
+        return self.get_current_and_last_feedback(user_id), self.get_latest_schedule(user_id)
+
+
+def _build_pipelines(students: Dict[int, Dict[str, Any]], schedules: Dict[int, Dict[str, Any]]):
+    # imported late: the orchestrator modules read their configuration from the environment at import
+    from ai_system.orchestrator.ai_orchestrator import AiOrchestrator
+    from ai_system.orchestrator.ai_reschedule import AiRescheduler
+
+    data = SyntheticDataProvider(students, schedules)
+    return AiOrchestrator(hf_token="fake", custom_model_name="fake-model", calendar_model_name="fake-model",
+                          data_provider=data), \
+        AiRescheduler(hf_token="fake", rescheduler_model_name="fake-model", data_provider=data)
+
+
+async def _run_async(pipeline, user_ids: List[int], concurrency: int, call) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(user_id: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await call(pipeline, user_id)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(u) for u in user_ids))
+    return latencies
+
+
+def _run_sync(pipeline, user_ids: List[int], concurrency: int, call) -> List[float]:
+    def one(user_id: int) -> float:
+        started = time.perf_counter()
+        call(pipeline, user_id)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(one, user_ids))
+
+
+def run_scenario(args: argparse.Namespace, subjects: int, pipeline_name: str) -> Dict[str, Any]:
+    from ai_system.utils.fake_inference import get_fake_backend
+
+    today = datetime.now().replace(minute=0, second=0, microsecond=0)
+    students = {user_id: synthetic_student(subjects, today) for user_id in range(1, args.students + 1)}
+    schedules = {user_id: synthetic_schedule(s, today) for user_id, s in students.items()}
+    orchestrator, rescheduler = _build_pipelines(students, schedules)
+
+    if pipeline_name == "generate":
+        pipeline = orchestrator
+        async_call = lambda p, u: p.agenerate_plan_for_user(u, False, merge_mode=args.merge_mode)
+        sync_call = lambda p, u: p.generate_plan_for_user(u, False, merge_mode=args.merge_mode)
+    else:
+        pipeline = rescheduler
+        async_call = lambda p, u: p.agenerate_plan_for_user(u, False)
+        sync_call = lambda p, u: p.generate_plan_for_user(u, False)
+
+    backend = get_fake_backend()
+    backend.reset_stats()
+    user_ids = list(students)
+    with ResourceSampler() as sampler:
+        started = time.perf_counter()
+        if args.mode == "async":
+            latencies = asyncio.run(_run_async(pipeline, user_ids, args.concurrency, async_call))
+        else:
+            latencies = _run_sync(pipeline, user_ids, args.concurrency, sync_call)
+        elapsed = time.perf_counter() - started
+
+    stats = backend.stats()
+    return {
+        "pipeline": pipeline_name,
+        "mode": args.mode,
+        "subjects": subjects,
+        "students": args.students,
+        "p50_s": round(percentile(latencies, 0.50), 3),
+        "p95_s": round(percentile(latencies, 0.95), 3),
+        "p99_s": round(percentile(latencies, 0.99), 3),
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "subjects_per_s": round(len(latencies) * subjects / elapsed, 1) if elapsed else None,
+        "llm_calls": stats["calls"],
+        "llm_failures": stats["failures"] + stats["rate_limited"],
+        "peak_threads": sampler.peak_threads,
+        "peak_rss_mb": sampler.peak_rss_mb(),
+    }
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    columns = ["pipeline", "mode", "subjects", "students", "p50_s", "p95_s", "p99_s", "throughput_per_s",
+               "subjects_per_s", "llm_calls", "llm_failures", "peak_threads", "peak_rss_mb"]
+    widths = {c: max(len(c), *(len(str(r.get(c))) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row.get(c)).ljust(widths[c]) for c in columns))
+
+
+def main(argv: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    parser = argparse.ArgumentParser(description="Benchmark the AI planning pipeline on a fake inference backend.")
+    parser.add_argument("--subjects", default="1,10,50,100", help="comma separated subject counts per student")
+    parser.add_argument("--students", type=int, default=10, help="synthetic students per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="generations running at the same time")
+    parser.add_argument("--mode", choices=("async", "sync"), default="async")
+    parser.add_argument("--pipeline", choices=("generate", "reschedule", "both"), default="generate")
+    parser.add_argument("--merge-mode", choices=("local", "llm", "hybrid"), default="llm")
+    parser.add_argument("--batch-size", type=int, default=None, help="PLAN_BATCH_SIZE override")
+    parser.add_argument("--latency-ms", type=float, default=None, help="median fake LLM latency")
+    parser.add_argument("--latency-sigma", type=float, default=None)
+    parser.add_argument("--ms-per-token", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=None)
+    parser.add_argument("--rate-limit-rate", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--with-cache", action="store_true", help="keep the response cache and plan store enabled")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    os.environ["LLM_BACKEND"] = "fake"
+    if not args.with_cache:
+        os.environ["LLM_CACHE_ENABLED"] = "0"
+        os.environ["INCREMENTAL_PLANNING"] = "0"
+    if args.batch_size is not None:
+        os.environ["PLAN_BATCH_SIZE"] = str(args.batch_size)
+
+    from ai_system.utils.fake_inference import configure_fake_backend
+
+    overrides = {
+        "latency_ms": args.latency_ms, "latency_sigma": args.latency_sigma, "ms_per_token": args.ms_per_token,
+        "error_rate": args.error_rate, "rate_limit_rate": args.rate_limit_rate, "seed": args.seed,
+    }
+    configure_fake_backend(**{k: v for k, v in overrides.items() if v is not None})
+
+    pipelines = ["generate", "reschedule"] if args.pipeline == "both" else [args.pipeline]
+    rows = [
+        run_scenario(args, int(subjects), pipeline)
+        for pipeline in pipelines
+        for subjects in args.subjects.split(",")
+        if subjects.strip()
+    ]
+    _print_table(rows)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(rows, f, indent=2)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,38 @@
+import asyncio
 import os
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 
 from ai_system.agents.cs_agent import CSAgent
 from ai_system.agents.general_agent import CalendarAgent
+from ai_system.agents.local_calendar_agent import LocalCalendarAgent
 from ai_system.agents.math_agent import MathAgent
-from ai_system.backend.backend_api import BackendAPI
+from ai_system.backend.data_provider import DataProvider, get_data_provider
+from ai_system.utils.calendar_validation import deadlines_from_plans, enforce_calendar_constraints
+from ai_system.utils.deadline import (
+    MERGE_STAGE_SECONDS,
+    SUBJECT_STAGE_SECONDS,
+    Deadline,
+    DeadlineExceeded,
+    deadline_scope,
+    run_with_deadline,
+)
+from ai_system.orchestrator.subject_router import subject_router
+from ai_system.utils.plan_store import (
+    PlanStore,
+    generation_fingerprint,
+    get_plan_store,
+    is_reusable_plan,
+    subject_fingerprint,
+)
+from ai_system.utils.prompt_encoding import get_prompt_encoding
+from ai_system.utils.prompt_templates import REGISTRY_HASH
+from ai_system.utils.response_cache import normalize_date
+from ai_system.utils.similar_plans import SimilarPlanIndex, get_similar_plan_index
+from ai_system.utils.telemetry import llm_call_scope
 
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, wait
 
 
 # Config din .env
@@ -20,15 +43,230 @@ HF_TOKEN_2 = os.getenv("HF_TOKEN_2")
 CUSTOM_AGENT_MODEL = os.getenv("CUSTOM_AGENT_MODEL")
 CALENDAR_AGENT_MODEL = os.getenv("CALENDAR_AGENT_MODEL")
 BACKEND_BASE_URL = os.getenv("BACKEND_BASE_URL", "http://localhost:8000")
+CALENDAR_MERGE_MODE = os.getenv("CALENDAR_MERGE_MODE", "llm")
+
+# How the per-subject plans are merged into one calendar:
+#   llm    - CalendarAgent (one big LLM call)
+#   local  - LocalCalendarAgent (deterministic packing, no LLM call)
+#   hybrid - local first, CalendarAgent only if the local merge could not place everything
+MERGE_MODES = ("local", "llm", "hybrid")
+
+MAX_PARALLEL_AGENT_CALLS = 8  # safe default for HF APIs
+
+# Subjects with the same agent and task type are planned PLAN_BATCH_SIZE at a time in one prompt
+# (shared heuristics sent once); 1 keeps one LLM call per subject
+PLAN_BATCH_SIZE = int(os.getenv("PLAN_BATCH_SIZE", "1"))
+ORCHESTRATOR_MOCK_DATA = os.getenv("ORCHESTRATOR_MOCK_DATA", "0") in ("1", "true", "True")
+
+# Sample subjects for running the orchestrator without a backend (ORCHESTRATOR_MOCK_DATA=1)
+MOCK_USER_DATA = {
+    "tasks": [
+        {
+            "id": 1,
+            "title": "pde scris",
+            "subject_name/project_name": "Partial Differential Equations",
+            "start_datetime": "2026-01-12T08:00:00",
+            "end_datetime": "2026-01-12T10:00:00",
+            "type": "written",
+            "difficulty": 5,
+            "description": "I did not understand anything during the semester.",
+            "status": "Pending"
+        },
+        {
+            "id": 2,
+            "title": "astronomie scris",
+            "subject_name/project_name": "Astronomy",
+            "start_datetime": "2026-01-26T12:00:00",
+            "end_datetime": "2026-01-26T14:00:00",
+            "type": "written",
+            "difficulty": 5,
+            "description": "I solved everything with ChatGPT, I do not know anything.",
+            "status": "Pending"
+        },
+        {
+            "id": 3,
+            "title": "OOP Final Project",
+            "subject_name/project_name": "Object-Oriented Programming",
+            "start_datetime": "2026-01-25T10:00:00",
+            "end_datetime": "2026-01-31T12:00:00",
+            "type": "project",
+            "difficulty": 4,
+            "description": "Large OOP project with multiple design patterns.",
+            "status": "Pending"
+        },
+
+        {
+            "id": 4,
+            "title": "ap practic",
+            "subject_name/project_name": "Algorithms and Programming",
+            "start_datetime": "2026-02-02T10:00:00",
+            "end_datetime": "2026-02-02T12:00:00",
+            "type": "practical",
+            "difficulty": 2,
+            "description": "I just need a bit of revise.",
+            "status": "Pending"
+        }
+    ]
+}
 
 
 # Orchestrator
+def _call_scope(agent, task, subjects=1):
+    # telemetry: LLM calls made by the agent are attributed to it; the calendar merge gets a list of plans
+    task_type = task.get("type") if isinstance(task, dict) else "calendar"
+    return llm_call_scope(type(agent).__name__, task_type, subjects)
+
+
+# A failed agent call yields None (a failed plan); running out of time is raised, so the caller can
+# tell a subject that failed from one that was deferred
 def _run_agent_on_task(agent, task):
     try:
-        raw_response = agent.propose_agent_plan(task)
+        with _call_scope(agent, task):
+            raw_response = agent.propose_agent_plan(task)
+        return raw_response
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(e)
+
+
+async def _arun_agent_on_task(agent, task):
+    try:
+        with _call_scope(agent, task):
+            raw_response = await agent.apropose_agent_plan(task)
         return raw_response
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(e)
+
+
+def _run_agent_on_batch(agent, tasks, deadline: Optional[Deadline] = None):
+    # runs on a worker thread, which doesn't inherit the caller's deadline scope
+    with deadline_scope(deadline):
+        if len(tasks) == 1:
+            return [_run_agent_on_task(agent, tasks[0])]
+        try:
+            with _call_scope(agent, tasks[0], len(tasks)):
+                return agent.propose_agent_plans(tasks)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(e)
+            return [None] * len(tasks)
+
+
+async def _arun_agent_on_batch(agent, tasks):
+    if len(tasks) == 1:
+        return [await _arun_agent_on_task(agent, tasks[0])]
+    try:
+        with _call_scope(agent, tasks[0], len(tasks)):
+            return await agent.apropose_agent_plans(tasks)
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(e)
+        return [None] * len(tasks)
+
+
+def _with_deferred(final_plan, tasks: List[Dict[str, Any]], deferred: List[int], reason: str):
+    """The calendar, listing the subjects left out of it because they weren't planned in time."""
+    if not deferred or not isinstance(final_plan, dict):
+        return final_plan
+    return {**final_plan, "deferred": [
+        {"subject_id": tasks[i].get("id"), "subject_name": tasks[i].get("subject_name/project_name"), "reason": reason}
+        for i in deferred
+    ]}
+
+
+def _estimated_hours(plan) -> Optional[float]:
+    if not isinstance(plan, dict):
+        return None
+    if plan.get("total_estimated_hours") is not None:
+        return plan["total_estimated_hours"]
+    try:
+        return sum(t.get("estimated_hours", 0) for t in plan.get("tasks", []))
+    except (AttributeError, TypeError):
+        return None
+
+
+class _IncrementalRun:
+    """
+    Bookkeeping for one generation against the PlanStore: which subjects can reuse their stored
+    plan, which can borrow the plan of a near-duplicate subject (SimilarPlanIndex), and whether the
+    whole previous calendar is still valid.
+    """
+
+    def __init__(self, store: Optional[PlanStore], user_id, tasks: List[Dict[str, Any]], merge_mode: str, today,
+                 similar: Optional[SimilarPlanIndex] = None):
+        self.store = store
+        self.similar = similar
+        self.user_id = user_id
+        self.tasks = tasks
+        self.routes = [subject_router.route(t) for t in tasks]
+        self.fingerprints = [subject_fingerprint(t, route, REGISTRY_HASH) for t, route in zip(tasks, self.routes)]
+        self.keys = [str(t["id"]) if t.get("id") is not None else fp for t, fp in zip(tasks, self.fingerprints)]
+        self.generation_key = generation_fingerprint(self.fingerprints, merge_mode, today, get_prompt_encoding())
+        self.plans: List[Any] = [None] * len(tasks)
+        self.reused: List[int] = []
+        self.borrowed: List[int] = []  # planned from another user's near-duplicate subject
+
+    @property
+    def prefilled(self) -> List[int]:
+        return self.reused + self.borrowed
+
+    @property
+    def pending(self) -> List[int]:
+        prefilled = set(self.prefilled)
+        return [i for i in range(len(self.plans)) if i not in prefilled]
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        Fill in reusable subject plans. If nothing changed at all, returns the previous calendar
+        marked with the generation it was persisted as ("unchanged_generation_id"); one that was
+        never persisted is merged again.
+        """
+        if self.store is not None:
+            stored = self.store.get_subject_plans(self.user_id)
+            for index, (key, fingerprint) in enumerate(zip(self.keys, self.fingerprints)):
+                entry = stored.get(key)
+                if entry is not None and entry[0] == fingerprint:
+                    self.plans[index] = entry[1]
+                    self.reused.append(index)
+            if len(self.reused) == len(self.plans):
+                previous = self.store.get_generation(self.user_id, self.generation_key)
+                if previous is not None and previous[1] is not None:
+                    final_plan, generation_id = previous
+                    return {**final_plan, "generation_key": self.generation_key,
+                            "unchanged_generation_id": generation_id}
+
+        if self.similar is not None:
+            for index in self.pending:
+                plan = self.similar.find(self.tasks[index], self.routes[index], REGISTRY_HASH)
+                if plan is not None:
+                    self.plans[index] = plan
+                    self.borrowed.append(index)
+        return None
+
+    def save(self, final_plan: Any) -> None:
+        if self.similar is not None:
+            for i in self.pending:
+                if is_reusable_plan(self.plans[i]):
+                    self.similar.add(self.tasks[i], self.plans[i], self.routes[i], REGISTRY_HASH)
+        if self.store is None:
+            return
+        reused = set(self.reused)
+        fresh = [
+            (self.keys[i], self.fingerprints[i], self.plans[i])
+            for i in range(len(self.plans)) if i not in reused and is_reusable_plan(self.plans[i])
+        ]
+        self.store.save_subject_plans(self.user_id, fresh, keep_keys=self.keys)
+        # a calendar built on a failed subject plan must not short-circuit the next attempt
+        complete = all(is_reusable_plan(p) for p in self.plans)
+        if complete and isinstance(final_plan, dict) and "calendar" in final_plan and "validation_errors" not in final_plan:
+            self.store.save_generation(self.user_id, self.generation_key, final_plan)
+            # GenerationService records the generation id under this key once it is persisted
+            final_plan["generation_key"] = self.generation_key
 
 
 class AiOrchestrator:
@@ -38,133 +276,300 @@ class AiOrchestrator:
             custom_model_name: Optional[str] = None,
             calendar_model_name: Optional[str] = None,
             backend_base_url: Optional[str] = None,
+            data_provider: Optional[DataProvider] = None,
     ) -> None:
         self.hf_token_1 = hf_token or HF_TOKEN_1
         self.hf_token_2 = hf_token or HF_TOKEN_2
         self.custom_model_name = custom_model_name or CUSTOM_AGENT_MODEL
         self.calendar_model_name = calendar_model_name or CALENDAR_AGENT_MODEL
 
-        self.backend = BackendAPI(backend_base_url or BACKEND_BASE_URL)
+        self.backend = data_provider or get_data_provider(backend_base_url, BACKEND_BASE_URL)
 
         self.math_agent = MathAgent(self.hf_token_1, self.custom_model_name)
         self.cs_agent = CSAgent(self.hf_token_1, self.custom_model_name)
-        self.general_agent = CalendarAgent(self.hf_token_2, self.calendar_model_name, datetime.now())
+        # "today" is taken per call, so one orchestrator can serve requests for the process lifetime
+        self.general_agent = CalendarAgent(self.hf_token_2, self.calendar_model_name)
+        self.local_calendar_agent = LocalCalendarAgent()
+        self.agents_by_route = {"math": self.math_agent, "cs": self.cs_agent}  # see subject_router
 
     def _process_single_task(self, task: Dict[str, Any]):
         agent = self._select_agent_for_task(task)
         return _run_agent_on_task(agent, task)
 
-    def generate_plan_for_user(self, user_id, save_to_backend) -> Dict[str, Any]:
-        try:
-            user_data = self.backend.get_user_data(user_id)
-        except Exception as e:
-            print(f"[AiOrchestrator] Backend unavailable, using mock data. ({e})")
-            user_data = {
-                "tasks": [
-                    {
-                        "id": 1,
-                        "title": "pde scris",
-                        "subject_name/project_name": "Partial Differential Equations",
-                        "start_datetime": "2026-01-12T08:00:00",
-                        "end_datetime": "2026-01-12T10:00:00",
-                        "type": "written",
-                        "difficulty": 5,
-                        "description": "I did not understand anything during the semester.",
-                        "status": "Pending"
-                    },
-                    {
-                        "id": 2,
-                        "title": "astronomie scris",
-                        "subject_name/project_name": "Astronomy",
-                        "start_datetime": "2026-01-26T12:00:00",
-                        "end_datetime": "2026-01-26T14:00:00",
-                        "type": "written",
-                        "difficulty": 5,
-                        "description": "I solved everything with ChatGPT, I do not know anything.",
-                        "status": "Pending"
-                    },
-                    {
-                        "id": 3,
-                        "title": "OOP Final Project",
-                        "subject_name/project_name": "Object-Oriented Programming",
-                        "start_datetime": "2026-01-25T10:00:00",
-                        "end_datetime": "2026-01-31T12:00:00",
-                        "type": "project",
-                        "difficulty": 4,
-                        "description": "Large OOP project with multiple design patterns.",
-                        "status": "Pending"
-                    },
-
-                    {
-                        "id": 4,
-                        "title": "ap practic",
-                        "subject_name/project_name": "Algorithms and Programming",
-                        "start_datetime": "2026-02-02T10:00:00",
-                        "end_datetime": "2026-02-02T12:00:00",
-                        "type": "practical",
-                        "difficulty": 2,
-                        "description": "I just need a bit of revise.",
-                        "status": "Pending"
-                    }
-                ]
-            }
+    def _batches(
+            self,
+            tasks: List[Dict[str, Any]],
+            indices: Optional[List[int]] = None,
+            batch_size: Optional[int] = None,
+    ) -> List[Tuple[Any, List[int]]]:
+        """Group task indices by (agent, task type), chunked to batch_size (default PLAN_BATCH_SIZE)."""
+        size = max(1, batch_size or PLAN_BATCH_SIZE)
+        groups: Dict[Tuple[str, Any], List[int]] = {}
+        for index in range(len(tasks)) if indices is None else indices:
+            task = tasks[index]
+            groups.setdefault((subject_router.route(task), task.get("type")), []).append(index)
+        return [
+            (self.agents_by_route[route], indices[start:start + size])
+            for (route, _), indices in groups.items()
+            for start in range(0, len(indices), size)
+        ]
+
+    def _incremental_run(self, user_id, tasks: List[Dict[str, Any]], merge_mode: str) -> _IncrementalRun:
+        # "today" at the granularity the calendar prompt sees it
+        today = normalize_date(self.general_agent.current_date())
+        return _IncrementalRun(get_plan_store(), user_id, tasks, merge_mode, today, get_similar_plan_index())
+
+    def _load_user_data(self, user_id) -> Dict[str, Any]:
+        if ORCHESTRATOR_MOCK_DATA:
+            return MOCK_USER_DATA
+        # transient failures are retried by the provider; anything left is the caller's error
+        return self.backend.get_user_data(user_id)
 
-        tasks_input: List[Dict[str, Any]] = [
+    async def _aload_user_data(self, user_id) -> Dict[str, Any]:
+        if ORCHESTRATOR_MOCK_DATA:
+            return MOCK_USER_DATA
+        return await self.backend.aget_user_data(user_id)
+
+    def _pending_tasks(self, user_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [
             task for task in user_data.get("tasks", [])
             if task.get("status") != "Completed"
         ]
 
-        max_workers = min(8, len(tasks_input))  # safe default for HF APIs
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            plans = list(executor.map(self._process_single_task, tasks_input))
+    def _resolve_merge_mode(self, merge_mode: Optional[str]) -> str:
+        merge_mode = merge_mode or CALENDAR_MERGE_MODE
+        if merge_mode not in MERGE_MODES:
+            raise ValueError(f"Unsupported merge mode: {merge_mode} (expected one of {', '.join(MERGE_MODES)})")
+        return merge_mode
 
-        final_plan = _run_agent_on_task(self.general_agent, plans)
+    def _merge_plans(self, plans: List[Any], merge_mode: Optional[str],
+                     deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        merge_mode = self._resolve_merge_mode(merge_mode)
+        if merge_mode == "local":
+            return self.local_calendar_agent.propose_agent_plan(plans)
+        if merge_mode == "hybrid":
+            local = self.local_calendar_agent.merge(plans)
+            if local.complete:
+                return local.calendar
 
-        return final_plan
+        stage = (deadline or Deadline()).child(MERGE_STAGE_SECONDS, "calendar merge")
+        try:
+            with deadline_scope(stage):
+                calendar = run_with_deadline(stage, _run_agent_on_task, self.general_agent, plans)
+        except DeadlineExceeded as e:
+            return self._late_merge(plans, stage, e)
+        # the local merge follows the rules by construction; the LLM's calendar is checked
+        return enforce_calendar_constraints(calendar, deadlines_from_plans(plans))
 
-    def _select_agent_for_task(self, task: Dict[str, Any]):
+    async def _amerge_plans(self, plans: List[Any], merge_mode: Optional[str],
+                            deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        merge_mode = self._resolve_merge_mode(merge_mode)
+        if merge_mode == "local":
+            return self.local_calendar_agent.propose_agent_plan(plans)
+        if merge_mode == "hybrid":
+            local = self.local_calendar_agent.merge(plans)
+            if local.complete:
+                return local.calendar
+
+        stage = (deadline or Deadline()).child(MERGE_STAGE_SECONDS, "calendar merge")
+        try:
+            with deadline_scope(stage):
+                calendar = await _arun_agent_on_task(self.general_agent, plans)
+        except DeadlineExceeded as e:
+            return self._late_merge(plans, stage, e)
+        return enforce_calendar_constraints(calendar, deadlines_from_plans(plans))
+
+    def _late_merge(self, plans: List[Any], stage: Deadline, error: DeadlineExceeded) -> Dict[str, Any]:
+        # out of time for the calendar LLM call: the local merge needs none; nobody waits after a cancel
+        if stage.cancelled:
+            raise error
+        print(f"[AiOrchestrator] Calendar merge: {error}, merging locally instead")
+        return self.local_calendar_agent.propose_agent_plan(plans)
+
+    def generate_plan_for_user(
+            self,
+            user_id,
+            save_to_backend,
+            merge_mode: Optional[str] = None,
+            deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        """
+        Subject agents get SUBJECT_STAGE_SECONDS (within `deadline`, if any); subjects not planned by
+        then are abandoned and listed under "deferred", and the calendar is merged from the rest.
+        """
+        merge_mode = self._resolve_merge_mode(merge_mode)
+        deadline = deadline or Deadline()
+        user_data = self._load_user_data(user_id)
+        tasks_input = self._pending_tasks(user_data)
+
+        run = self._incremental_run(user_id, tasks_input, merge_mode)
+        previous = run.load()
+        if previous is not None:
+            return previous
 
-        text = " ".join([
-            task.get("title", ""),
-            task.get("subject_name/project_name", ""),
-            task.get("description", ""),
-            task.get("type", ""),
-        ]).lower()
-
-        math_keywords = {
-            # Pure mathematics
-            "mathematics",
-            "math",
-            "algebra",
-            "analysis",
-            "geometry",
-            "calculus",
-            "statistics",
-            "probability",
-            "logic",
-            "numerical",
-            "modeling",
-
-            # Differential equations
-            "pde",
-            "ode",
-            "partial differential equations",
-            "differential equations",
-
-            # Applied mathematics / physics
-            "astronomy",
-            "astrophysics",
-            "mechanics",
-            "classical mechanics",
-            "dynamics",
-            "thermodynamics",
-            "optics",
-            "physics",
+        plans = run.plans
+        stage = deadline.child(SUBJECT_STAGE_SECONDS, "subject stage")
+        batches = self._batches(tasks_input, run.pending)
+        max_workers = max(1, min(MAX_PARALLEL_AGENT_CALLS, len(batches)))
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = {
+            executor.submit(_run_agent_on_batch, agent, [tasks_input[i] for i in indices], stage): indices
+            for agent, indices in batches
         }
+        done, _ = wait(futures, timeout=stage.remaining())
+        # late batches are abandoned: queued ones never start, running ones stop at their next LLM call
+        executor.shutdown(wait=False, cancel_futures=True)
 
-        if any(keyword in text for keyword in math_keywords):
-            return self.math_agent
+        finished = set()
+        for future in done:
+            try:
+                batch_plans = future.result()
+            except DeadlineExceeded:
+                continue
+            for index, plan in zip(futures[future], batch_plans):
+                plans[index] = plan
+                finished.add(index)
 
-        return self.cs_agent
+        deferred = [i for i in run.pending if i not in finished]
+        final_plan = self._merge_plans(self._plans_in_time(plans, deferred, stage), merge_mode, deadline)
+        final_plan = _with_deferred(final_plan, tasks_input, deferred, stage.reason())
+        run.save(final_plan)
 
+        return final_plan
+
+    @staticmethod
+    def _plans_in_time(plans: List[Any], deferred: List[int], stage: Deadline) -> List[Any]:
+        if not deferred:
+            return plans
+        print(f"[AiOrchestrator] {len(deferred)} subject(s) deferred: {stage.reason()}")
+        skipped = set(deferred)
+        in_time = [plan for index, plan in enumerate(plans) if index not in skipped]
+        if not in_time:
+            raise DeadlineExceeded(f"{stage.reason()} before any subject was planned")
+        return in_time
+
+    async def agenerate_plan_for_user(
+            self,
+            user_id,
+            save_to_backend,
+            merge_mode: Optional[str] = None,
+            deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        """
+        asyncio variant of generate_plan_for_user: every agent call is a coroutine on
+        an AsyncInferenceClient, so concurrent generations don't hold one thread per LLM call.
+        """
+        final_plan = None
+        async for event, data in self.astream_plan_for_user(user_id, merge_mode, deadline):
+            if event == "calendar_merged":
+                final_plan = data
+        return final_plan
+
+    async def astream_plan_for_user(
+            self,
+            user_id,
+            merge_mode: Optional[str] = None,
+            deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Run the generation pipeline and yield (event, data) pairs as it progresses:
+          "subject_planned"        - once per subject, in completion order
+          "subject_deferred"       - a subject not planned within the subject stage budget
+          "calendar_merge_started" - all subject plans are in, the merge step begins
+          "calendar_merged"        - data is the final {"summary", "calendar"} plan (plus "deferred")
+
+        Late agent calls are cancelled when the subject stage (SUBJECT_STAGE_SECONDS, within
+        `deadline`) runs out; the calendar is merged from the subjects planned by then.
+        """
+        merge_mode = self._resolve_merge_mode(merge_mode)
+        deadline = deadline or Deadline()
+
+        user_data = await self._aload_user_data(user_id)
+        tasks_input = self._pending_tasks(user_data)
+
+        run = self._incremental_run(user_id, tasks_input, merge_mode)
+        previous = await asyncio.to_thread(run.load)
+        plans = run.plans
+
+        def subject_event(index: int, agent, completed: int) -> Dict[str, Any]:
+            task = tasks_input[index]
+            return {
+                "subject_id": task.get("id"),
+                "subject_name": task.get("subject_name/project_name"),
+                "agent": type(agent).__name__,
+                "estimated_hours": _estimated_hours(plans[index]),
+                "completed": completed,
+                "total": len(tasks_input),
+                "reused": index in run.reused,
+                "borrowed": index in run.borrowed,
+            }
+
+        # unchanged subjects come straight from the store, near-duplicates from the similarity index
+        for completed, index in enumerate(run.prefilled, start=1):
+            yield "subject_planned", subject_event(index, self._select_agent_for_task(tasks_input[index]), completed)
+        if previous is not None:
+            yield "calendar_merged", previous  # nothing changed since the last generation
+            return
+
+        stage = deadline.child(SUBJECT_STAGE_SECONDS, "subject stage")
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_AGENT_CALLS)
+
+        async def run_batch(agent, indices: List[int]):
+            async with semaphore:
+                try:
+                    stage.check()
+                    with deadline_scope(stage):
+                        return agent, indices, await _arun_agent_on_batch(agent, [tasks_input[i] for i in indices])
+                except DeadlineExceeded:
+                    return agent, indices, None
+
+        pending = [
+            asyncio.create_task(run_batch(agent, indices))
+            for agent, indices in self._batches(tasks_input, run.pending)
+        ]
+        completed = len(run.prefilled)
+        finished = set()
+        try:
+            for next_done in asyncio.as_completed(pending, timeout=stage.remaining()):
+                agent, indices, batch_plans = await next_done
+                for index, plan in zip(indices, batch_plans or []):
+                    plans[index] = plan  # keep input order so the merge prompt stays stable
+                    finished.add(index)
+                    completed += 1
+                    yield "subject_planned", subject_event(index, agent, completed)
+        except asyncio.TimeoutError:
+            pass  # the stage is over: whatever is still running is deferred
+        finally:
+            # late calls are cancelled, which aborts their upstream requests
+            for running in pending:
+                running.cancel()
+
+        deferred = [i for i in run.pending if i not in finished]
+        for index in deferred:
+            task = tasks_input[index]
+            yield "subject_deferred", {
+                "subject_id": task.get("id"),
+                "subject_name": task.get("subject_name/project_name"),
+                "agent": type(self._select_agent_for_task(task)).__name__,
+                "reason": stage.reason(),
+            }
+        in_time = self._plans_in_time(plans, deferred, stage)
+
+        yield "calendar_merge_started", {
+            "merge_mode": merge_mode,
+            "subjects": len(in_time),
+            "replanned": len(run.pending),
+            "deferred": len(deferred),
+        }
+        final_plan = await self._amerge_plans(in_time, merge_mode, deadline)
+        final_plan = _with_deferred(final_plan, tasks_input, deferred, stage.reason())
+        await asyncio.to_thread(run.save, final_plan)
+        yield "calendar_merged", final_plan
+
+    def _select_agent_for_task(self, task: Dict[str, Any]):
+        return self.agents_by_route[subject_router.route(task)]
 
+    def explain_routing(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Which agent a subject goes to, with per-route scores and the keywords that matched."""
+        decision = subject_router.explain(task)
+        return {**decision.to_dict(), "agent": type(self.agents_by_route[decision.route]).__name__}
@@ -1,17 +1,23 @@
 import os
-from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from dotenv import load_dotenv
 
 from ai_system.agents.feedback_agent import FeedbackAgent
-from ai_system.backend.backend_api import BackendAPI
+from ai_system.backend.data_provider import DataProvider, get_data_provider
+from ai_system.utils.calendar_validation import enforce_calendar_constraints
+from ai_system.utils.deadline import Deadline, deadline_scope, run_with_deadline
+from ai_system.utils.schedule_window import ScheduleWindow, feedback_dates, split_schedule
+from ai_system.utils.telemetry import llm_call_scope
 
 load_dotenv()
 
 HF_TOKEN_2 = os.getenv("HF_TOKEN_2")
 CALENDAR_AGENT_MODEL = os.getenv("CALENDAR_AGENT_MODEL")
 BACKEND_BASE_URL = os.getenv("BACKEND_BASE_URL", "http://localhost:8000")
+# Days from today the FeedbackAgent may revise (past days are frozen, later days kept as they are);
+# 0 sends the whole schedule
+RESCHEDULE_WINDOW_DAYS = int(os.getenv("RESCHEDULE_WINDOW_DAYS", "14"))
 
 
 class AiRescheduler:
@@ -20,44 +26,85 @@ class AiRescheduler:
             hf_token: Optional[str] = None,
             rescheduler_model_name: Optional[str] = None,
             backend_base_url: Optional[str] = None,
+            window_days: Optional[int] = None,
+            data_provider: Optional[DataProvider] = None,
     ):
+        self.window_days = RESCHEDULE_WINDOW_DAYS if window_days is None else window_days
         self.hf_token = hf_token or HF_TOKEN_2
         self.model = rescheduler_model_name or CALENDAR_AGENT_MODEL
-        self.backend = BackendAPI(backend_base_url or BACKEND_BASE_URL)
-        self.agent = FeedbackAgent(self.hf_token, self.model, datetime.now())
+        self.backend = data_provider or get_data_provider(backend_base_url, BACKEND_BASE_URL)
+        self.agent = FeedbackAgent(self.hf_token, self.model)  # "today" is taken per call
 
-    def generate_plan_for_user(
-            self,
-            user_id: int,
-            save_to_backend
-    ) -> Dict[str, Any]:
+    def _load_inputs(self, user_id: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """(feedback, latest schedule), fetched concurrently; transient failures are retried by the provider."""
+        fb, latest_schedule = self.backend.get_feedback_and_schedule(user_id)
+        return fb, latest_schedule or {"calendar": []}
+
+    async def _aload_inputs(self, user_id: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        fb, latest_schedule = await self.backend.aget_feedback_and_schedule(user_id)
+        return fb, latest_schedule or {"calendar": []}
 
-        try:
-            fb = self.backend.get_current_and_last_feedback(user_id)
-        except Exception as e:
-            print(f"[AiRescheduler] Warning: Could not fetch feedback: {e}")
-            fb = {}
+    def _window(self, fb: Dict[str, Any], latest_schedule: Dict[str, Any]) -> Optional[ScheduleWindow]:
+        if self.window_days <= 0:
+            return None
+        mentioned = feedback_dates(fb.get("current_feedback"), fb.get("feedback"))
+        return split_schedule(latest_schedule, self.agent.current_date(), self.window_days, mentioned)
 
+    def _build_context(
+            self,
+            fb: Dict[str, Any],
+            latest_schedule: Dict[str, Any],
+            window: Optional[ScheduleWindow] = None,
+    ) -> Dict[str, Any]:
         current_feedback = fb.get("current_feedback") or {
             "current_feedback": fb.get("feedback", "No feedback provided")
         }
         last_feedback = fb.get("last_feedback") or {}
 
-
-        try:
-            latest_schedule = self.backend.get_latest_schedule(user_id)
-        except Exception as e:
-            print(f"[AiRescheduler] Warning: Could not fetch latest schedule: {e}")
-            latest_schedule = {"calendar": []}
-
         context = {
             "last_feedback": last_feedback,
             "last_schedule": latest_schedule,
             "current_feedback": current_feedback
         }
+        if window is not None:
+            context["last_schedule"] = {"calendar": window.window}
+            context["window"] = (window.start, window.end)
+        return context
+
+    def generate_plan_for_user(
+            self,
+            user_id: int,
+            save_to_backend,
+            deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        """Raises DeadlineExceeded if the FeedbackAgent doesn't answer within `deadline`."""
+        deadline = deadline or Deadline()
+        fb, latest_schedule = self._load_inputs(user_id)
+        window = self._window(fb, latest_schedule)
+        context = self._build_context(fb, latest_schedule, window)
 
-        new_schedule = self.agent.propose_agent_plan(context)
+        with llm_call_scope(type(self.agent).__name__, "reschedule"), deadline_scope(deadline):
+            new_schedule = run_with_deadline(deadline, self.agent.propose_agent_plan, context)
+        # only the agent's answer is checked: frozen days around the window are kept as they were
+        new_schedule = enforce_calendar_constraints(new_schedule)
 
-        return new_schedule
+        return window.splice(new_schedule) if window is not None else new_schedule
 
+    async def agenerate_plan_for_user(
+            self,
+            user_id: int,
+            save_to_backend,
+            deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        """asyncio variant of generate_plan_for_user, awaitable from FastAPI routes."""
+        fb, latest_schedule = await self._aload_inputs(user_id)
+        window = self._window(fb, latest_schedule)
+        context = self._build_context(fb, latest_schedule, window)
 
+        with llm_call_scope(type(self.agent).__name__, "reschedule"), deadline_scope(deadline):
+            new_schedule = await self.agent.apropose_agent_plan(context)
+        new_schedule = enforce_calendar_constraints(new_schedule)
+        if window is not None:
+            new_schedule = window.splice(new_schedule)
+
+        return new_schedule
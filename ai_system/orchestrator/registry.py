@@ -0,0 +1,38 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+from ai_system.orchestrator.ai_orchestrator import AiOrchestrator
+from ai_system.orchestrator.ai_reschedule import AiRescheduler
+
+# Process-wide instances: building an orchestrator creates agents and a data provider, none of which
+# hold per-request state, so routes and workers share one per configuration.
+_lock = threading.Lock()
+_orchestrators: Dict[Tuple, AiOrchestrator] = {}
+_reschedulers: Dict[Tuple, AiRescheduler] = {}
+
+
+def get_orchestrator(
+        hf_token: Optional[str] = None,
+        custom_model_name: Optional[str] = None,
+        calendar_model_name: Optional[str] = None,
+        backend_base_url: Optional[str] = None,
+) -> AiOrchestrator:
+    key = (hf_token, custom_model_name, calendar_model_name, backend_base_url)
+    with _lock:
+        orchestrator = _orchestrators.get(key)
+        if orchestrator is None:
+            orchestrator = _orchestrators[key] = AiOrchestrator(*key)
+    return orchestrator
+
+
+def get_rescheduler(
+        hf_token: Optional[str] = None,
+        rescheduler_model_name: Optional[str] = None,
+        backend_base_url: Optional[str] = None,
+) -> AiRescheduler:
+    key = (hf_token, rescheduler_model_name, backend_base_url)
+    with _lock:
+        rescheduler = _reschedulers.get(key)
+        if rescheduler is None:
+            rescheduler = _reschedulers[key] = AiRescheduler(*key)
+    return rescheduler
@@ -0,0 +1,139 @@
+"""
+Keyword router that picks the domain agent for a subject.
+
+All keyword tables are compiled into one case-insensitive, word-bounded alternation, so a subject
+is scanned once whatever the number of domains, and "ode" no longer matches inside "code" or
+"node". Every registered route is scored (longer phrases and the subject name weigh more) instead
+of first-match-wins, and decisions are cached per subject id + content hash.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+MATH_KEYWORDS = (
+    # Pure mathematics
+    "mathematics", "math", "algebra", "analysis", "geometry", "calculus", "statistics", "probability",
+    "logic", "numerical", "modeling",
+    # Differential equations
+    "pde", "ode", "partial differential equations", "differential equations",
+    # Applied mathematics / physics
+    "astronomy", "astrophysics", "mechanics", "classical mechanics", "dynamics", "thermodynamics", "optics",
+    "physics",
+)
+
+CS_KEYWORDS = (
+    "computer science", "programming", "algorithms", "data structures", "software", "software engineering",
+    "object-oriented programming", "oop", "operating systems", "computer networks", "networking", "databases",
+    "database", "sql", "compilers", "computer architecture", "web", "web development", "machine learning",
+    "artificial intelligence", "cybersecurity", "code", "coding", "java", "python", "c++",
+)
+
+# where a keyword was found matters: the subject name says more than the free-text description
+FIELD_WEIGHTS = {
+    "subject_name/project_name": 2.0,
+    "title": 1.5,
+    "description": 1.0,
+    "type": 0.5,
+}
+
+ROUTING_CACHE_SIZE = 4096
+
+
+@dataclass
+class RouteDecision:
+    route: str
+    scores: Dict[str, float]
+    matches: List[Dict[str, Any]] = field(default_factory=list)
+    default: bool = False
+    cached: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class SubjectRouter:
+    def __init__(self, default_route: str, cache_size: int = ROUTING_CACHE_SIZE):
+        self.default_route = default_route
+        self.cache_size = cache_size
+        self._routes: List[str] = []  # registration order breaks score ties
+        self._keywords: Dict[str, List[Tuple[str, float]]] = {}  # keyword -> [(route, weight)]
+        self._pattern: Optional[re.Pattern] = None
+        self._cache: "OrderedDict[Tuple[Any, str], RouteDecision]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, route: str, keywords: Iterable[str]) -> "SubjectRouter":
+        """Add a route; multi-word keywords weigh as many points as they have words."""
+        with self._lock:
+            if route not in self._routes:
+                self._routes.append(route)
+            for keyword in keywords:
+                keyword = " ".join(keyword.lower().split())
+                self._keywords.setdefault(keyword, []).append((route, float(len(keyword.split()))))
+            self._pattern = None
+            self._cache.clear()
+        return self
+
+    def _compiled(self) -> re.Pattern:
+        if self._pattern is None:
+            # longest first so "partial differential equations" wins over "differential equations";
+            # lookarounds instead of \b so keywords like "c++" still bound correctly
+            alternation = "|".join(
+                re.escape(k).replace(r"\ ", r"\s+") for k in sorted(self._keywords, key=len, reverse=True)
+            )
+            self._pattern = re.compile(rf"(?<![\w+])(?:{alternation})s?(?![\w+])", re.IGNORECASE)
+        return self._pattern
+
+    @staticmethod
+    def _cache_key(task: Mapping[str, Any]) -> Tuple[Any, str]:
+        digest = hashlib.sha1()
+        for name in FIELD_WEIGHTS:
+            digest.update(str(task.get(name) or "").encode("utf-8"))
+            digest.update(b"\x00")
+        return task.get("id"), digest.hexdigest()
+
+    def _decide(self, task: Mapping[str, Any]) -> RouteDecision:
+        pattern = self._compiled()
+        scores = {route: 0.0 for route in self._routes}
+        matches = []
+        for name, field_weight in FIELD_WEIGHTS.items():
+            text = str(task.get(name) or "")
+            for found in pattern.finditer(text):
+                word = " ".join(found.group(0).lower().split())
+                keyword = word if word in self._keywords else word[:-1]  # optional plural "s"
+                for route, weight in self._keywords.get(keyword, ()):
+                    scores[route] += weight * field_weight
+                    matches.append({"field": name, "keyword": keyword, "route": route,
+                                    "points": weight * field_weight})
+
+        best = max(self._routes, key=lambda r: scores[r], default=None)  # first registered wins ties
+        if best is None or scores[best] <= 0:
+            return RouteDecision(route=self.default_route, scores=scores, matches=matches, default=True)
+        return RouteDecision(route=best, scores=scores, matches=matches)
+
+    def explain(self, task: Mapping[str, Any]) -> RouteDecision:
+        key = self._cache_key(task)
+        with self._lock:
+            decision = self._cache.get(key)
+            if decision is not None:
+                self._cache.move_to_end(key)
+                return RouteDecision(**{**asdict(decision), "cached": True})
+
+        decision = self._decide(task)
+        with self._lock:
+            self._cache[key] = decision
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return decision
+
+    def route(self, task: Mapping[str, Any]) -> str:
+        return self.explain(task).route
+
+
+def build_default_router() -> SubjectRouter:
+    return SubjectRouter(default_route="cs").register("math", MATH_KEYWORDS).register("cs", CS_KEYWORDS)
+
+
+subject_router = build_default_router()
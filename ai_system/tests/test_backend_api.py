@@ -0,0 +1,74 @@
+import asyncio
+import os
+import tempfile
+
+import httpx
+import pytest
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/backend_api_test.db")
+
+import backend.init_db  # noqa: F401  registers every model before create_all
+from backend.config.database import Base, engine
+from backend.main import app
+
+from ai_system.backend.backend_api import BackendAPI
+from ai_system.backend.data_provider import InProcessDataProvider
+
+
+class _SyncASGITransport(httpx.BaseTransport):
+    """Serves the sync client from the ASGI app, one event loop per request."""
+
+    def __init__(self, app):
+        self._transport = httpx.ASGITransport(app=app)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        async def send():
+            response = await self._transport.handle_async_request(request)
+            return httpx.Response(response.status_code, headers=response.headers, content=await response.aread())
+
+        return asyncio.run(send())
+
+
+@pytest.fixture(scope="module")
+def user_id():
+    Base.metadata.create_all(engine)
+    client = httpx.Client(transport=_SyncASGITransport(app), base_url="http://backend")
+    user = client.post("/users/", json={
+        "name": "Ana", "username": "ana_backend_api", "email": "ana_backend_api@example.com", "password": "pw123456",
+    })
+    user.raise_for_status()
+    user_id = user.json()["id"]
+    for day, name in ((10, "Algebra"), (12, "Operating systems")):
+        client.post(f"/users/{user_id}/subjects/", json={
+            "name": name, "title": name, "type": "written", "difficulty": 3, "description": "d",
+            "start_datetime": f"2026-12-{day}T09:00:00",
+        }).raise_for_status()
+    return user_id
+
+
+@pytest.fixture
+def api():
+    return BackendAPI("http://backend", transport=_SyncASGITransport(app),
+                      async_transport=httpx.ASGITransport(app=app), max_attempts=1)
+
+
+def test_http_provider_matches_in_process_provider(api, user_id):
+    expected = InProcessDataProvider().get_user_data(user_id)
+
+    assert api.get_user_data(user_id) == expected
+    assert len(expected["tasks"]) == 2
+
+
+def test_async_http_provider_matches_in_process_provider(api, user_id):
+    async def fetch():
+        try:
+            return await api.aget_user_data(user_id)
+        finally:
+            await api.aclose()
+
+    assert asyncio.run(fetch()) == InProcessDataProvider().get_user_data(user_id)
+
+
+def test_missing_user_is_an_error(api):
+    with pytest.raises(httpx.HTTPStatusError):
+        api.list_subjects(999999)
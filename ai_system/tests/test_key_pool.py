@@ -0,0 +1,34 @@
+import time
+
+import pytest
+
+from ai_system.utils.deadline import Deadline, DeadlineExceeded
+from ai_system.utils.key_pool import KeyPool
+
+
+def test_acquire_gives_up_at_the_deadline():
+    pool = KeyPool(["token"], rpm=1)
+    pool.release(pool.acquire())  # the only request of this minute
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        pool.acquire(deadline=Deadline(0.2))
+    assert time.monotonic() - started < 0.5
+
+
+def test_acquire_stops_waiting_when_cancelled():
+    pool = KeyPool(["token"], max_in_flight=1)
+    pool.acquire()
+    deadline = Deadline(5)
+    deadline.cancel("client disconnected")
+
+    with pytest.raises(DeadlineExceeded, match="client disconnected"):
+        pool.acquire(deadline=deadline)
+
+
+def test_acquire_waits_for_a_slot_within_the_deadline():
+    pool = KeyPool(["token"], rpm=600)  # one request every 0.1s once the bucket is empty
+    for _ in range(600):
+        pool.release(pool.acquire())
+
+    assert pool.acquire(deadline=Deadline(2)).token == "token"
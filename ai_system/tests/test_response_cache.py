@@ -0,0 +1,108 @@
+import asyncio
+import threading
+
+import pytest
+
+from ai_system.utils.deadline import DeadlineExceeded
+from ai_system.utils.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache():
+    cache = ResponseCache(path=":memory:")
+    yield cache
+    cache._conn.close()
+
+
+def test_cancelled_leader_does_not_cancel_coalesced_caller(cache):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "response"
+
+    async def main():
+        first = asyncio.ensure_future(cache.aget_or_call("m", "prompt", 0.0, call))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(cache.aget_or_call("m", "prompt", 0.0, call))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "response"
+    assert len(calls) == 1
+    assert cache.coalesced == 1
+    assert cache.get(cache.make_key("m", "prompt", 0.0)) == "response"
+
+
+def test_upstream_call_cancelled_once_nobody_waits(cache):
+    finished = []
+
+    async def call():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return "response"
+
+    async def main():
+        first = asyncio.ensure_future(cache.aget_or_call("m", "prompt", 0.0, call))
+        second = asyncio.ensure_future(cache.aget_or_call("m", "prompt", 0.0, call))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(main())
+    assert finished == []
+    assert cache._async_inflight == {}
+
+
+def test_leader_deadline_is_not_shared_with_coalesced_caller(cache):
+    async def expiring_call():
+        await asyncio.sleep(0.01)
+        raise DeadlineExceeded("request deadline exceeded")
+
+    async def call():
+        return "response"
+
+    async def main():
+        first = asyncio.ensure_future(cache.aget_or_call("m", "prompt", 0.0, expiring_call))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(cache.aget_or_call("m", "prompt", 0.0, call))
+        with pytest.raises(DeadlineExceeded):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "response"
+    assert cache.misses == 2
+
+
+def test_sync_follower_calls_again_after_leader_deadline(cache):
+    leader_started = threading.Event()
+    release = threading.Event()
+
+    def expiring_call():
+        leader_started.set()
+        release.wait(1)
+        raise DeadlineExceeded("request deadline exceeded")
+
+    result = {}
+    leader = threading.Thread(
+        target=lambda: pytest.raises(DeadlineExceeded, cache.get_or_call, "m", "prompt", 0.0, expiring_call)
+    )
+    leader.start()
+    leader_started.wait(1)
+    follower = threading.Thread(
+        target=lambda: result.setdefault("value", cache.get_or_call("m", "prompt", 0.0, lambda: "response"))
+    )
+    follower.start()
+    while not cache.coalesced:
+        threading.Event().wait(0.001)
+    release.set()
+    leader.join(1)
+    follower.join(1)
+
+    assert result["value"] == "response"
@@ -1,3 +1,6 @@
+from ai_system.utils.prompt_encoding import calendar_output_format, encode_plans
+
+
 def generate_calendar_instructions(plans_array, date):
     prompt = (
         "You are CalendarMaster-AI, an expert academic planning system specialized in realistic, "
@@ -10,7 +13,7 @@ def generate_calendar_instructions(plans_array, date):
         "Do NOT produce explanations, reasoning, commentary, markdown, or text outside the JSON.\n"
         "ONLY output the final JSON object. No prose before or after it.\n\n"
 
-        f"INPUT: Array of small-agent plan results:\n{plans_array}\n\n"
+        f"INPUT: Array of small-agent plan results:\n{encode_plans(plans_array)}\n\n"
         f"CURRENT DATE: {date}\n\n"
 
         "YOUR TASK:\n"
@@ -21,24 +24,7 @@ def generate_calendar_instructions(plans_array, date):
         "OUTPUT FORMAT:\n"
         "Output must be a SINGLE valid JSON object matching EXACTLY this structure:\n\n"
 
-        "{\n"
-        '  "summary": "<one-sentence overview of the overall schedule>",\n'
-        '  "calendar": [\n'
-        "    {\n"
-        '      "date": "YYYY-MM-DD",\n'
-        '      "entries": [\n'
-        "        {\n"
-        '          "time_allotted": "HH:MM–HH:MM",\n'
-        '          "task_name": "<string>",\n'
-        '          "subject_name/project_name": "<string>",\n'
-        '          "difficulty": <integer 1-5>,\n'
-        '          "priority": <integer starting from 1>\n'
-        "        }\n"
-        "      ],\n"
-        '      "notes": "<optional short string>"\n'
-        "    }\n"
-        "  ]\n"
-        "}\n\n"
+        f"{calendar_output_format()}"
 
         "ESSENTIAL CONSTRAINTS (MUST NEVER BE VIOLATED):\n"
         "- ALL tasks must finish at least 2 hours BEFORE any deadline and start later than 4 ours AFTER.\n"
@@ -0,0 +1,303 @@
+"""
+Constraint check and deterministic repair of the calendars the LLM agents return.
+
+CalendarAgent and FeedbackAgent are asked to follow scheduling rules (see calendar_instructions),
+but their answers are only schema-validated. This module checks the rules themselves:
+  - overlap          two blocks of the same day overlap
+  - block_too_long   a block is longer than MAX_BLOCK_MINUTES
+  - bad_time_range   time_allotted doesn't parse, or doesn't end after it starts
+  - day_overloaded   more than DAILY_MAX_MINUTES of work on one day
+  - duplicate_priority / bad_priority   priorities are not unique positive integers within a day
+  - after_deadline   a block ends after its subject's deadline (when deadlines are known)
+
+Every entry of the calendar is turned into minute intervals once and all checks run as array
+operations over the whole calendar. repair_calendar fixes what can be fixed without changing the
+amount or the day of the work: long blocks are split into consecutive parts, overlapping blocks
+are pushed back until they fit before midnight, and priorities are renumbered. Overloaded days
+and blocks after a deadline are only reported; moving work between days is the LLM's job.
+"""
+import copy
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import date as date_type, datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+MAX_BLOCK_MINUTES = 120
+DAILY_MAX_MINUTES = 12 * 60
+DAY_MINUTES = 24 * 60
+
+# repair (default) | report | off
+CALENDAR_VALIDATION = os.getenv("CALENDAR_VALIDATION", "repair")
+
+_TIME_RANGE = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*[–-]\s*(\d{1,2}):(\d{2})\s*$")
+_PART_SUFFIX = re.compile(r"\s*\(part \d+\)$")
+# what repair_calendar can fix in place; the rest is reported
+REPAIRABLE = ("overlap", "block_too_long", "duplicate_priority", "bad_priority")
+
+
+@dataclass(frozen=True)
+class Violation:
+    code: str
+    date: str
+    entry: Optional[int]  # index in the day's entries; None for day-level violations
+    detail: str
+
+
+@dataclass
+class ConstraintReport:
+    violations: List[Violation] = field(default_factory=list)
+    entries_checked: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.violations
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for violation in self.violations:
+            counts[violation.code] = counts.get(violation.code, 0) + 1
+        return counts
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "entries_checked": self.entries_checked,
+            "counts": self.counts(),
+            "violations": [asdict(v) for v in self.violations],
+        }
+
+
+def _minutes(hours: str, minutes: str) -> int:
+    return int(hours) * 60 + int(minutes)
+
+
+def parse_time_range(value: Any) -> Optional[Tuple[int, int]]:
+    """"HH:MM–HH:MM" as (start, end) minutes after midnight; "24:00" ends the day."""
+    match = _TIME_RANGE.match(value) if isinstance(value, str) else None
+    if match is None:
+        return None
+    start, end = _minutes(*match.group(1, 2)), _minutes(*match.group(3, 4))
+    if start >= DAY_MINUTES or end > DAY_MINUTES or int(match.group(2)) > 59 or int(match.group(4)) > 59:
+        return None
+    return start, end
+
+
+def format_time_range(start: int, end: int) -> str:
+    return f"{start // 60:02d}:{start % 60:02d}–{end // 60:02d}:{end % 60:02d}"
+
+
+def _parse_day(value: Any) -> Optional[date_type]:
+    try:
+        return date_type.fromisoformat(value) if isinstance(value, str) else None
+    except ValueError:
+        return None
+
+
+def _absolute_minutes(value: datetime) -> int:
+    return value.toordinal() * DAY_MINUTES + value.hour * 60 + value.minute
+
+
+def _subject_key(name: Any) -> str:
+    return str(name or "").strip().lower()
+
+
+def deadlines_from_plans(plans: List[Any]) -> Dict[str, datetime]:
+    """Subject name -> deadline, from the per-subject agent plans fed to the calendar merge."""
+    deadlines: Dict[str, datetime] = {}
+    for plan in plans:
+        if not isinstance(plan, dict) or not isinstance(plan.get("deadline"), str):
+            continue
+        try:
+            deadline = datetime.fromisoformat(plan["deadline"].strip().replace("Z", "+00:00")).replace(tzinfo=None)
+        except ValueError:
+            continue
+        deadlines[_subject_key(plan.get("subject_name/project_name"))] = deadline
+    return deadlines
+
+
+class _Entries:
+    """The calendar's entries as parallel arrays (one row per parseable entry)."""
+
+    def __init__(self, calendar: List[Any], deadlines: Optional[Mapping[str, datetime]]):
+        self.invalid: List[Violation] = []
+        self.refs: List[Tuple[str, int]] = []  # (date, index in the day's entries)
+        days, starts, ends, priorities, due = [], [], [], [], []
+        for day in calendar:
+            day_date = _parse_day(day.get("date")) if isinstance(day, dict) else None
+            if day_date is None:
+                continue
+            for index, entry in enumerate(day.get("entries") or []):
+                parsed = parse_time_range(entry.get("time_allotted")) if isinstance(entry, dict) else None
+                if parsed is None:
+                    self.invalid.append(Violation("bad_time_range", day["date"], index,
+                                                  f"unparseable time_allotted {entry!r:.60}"))
+                    continue
+                self.refs.append((day["date"], index))
+                days.append(day_date.toordinal())
+                starts.append(parsed[0])
+                ends.append(parsed[1])
+                priority = entry.get("priority")
+                priorities.append(priority if isinstance(priority, int) and not isinstance(priority, bool) else 0)
+                deadline = (deadlines or {}).get(_subject_key(entry.get("subject_name/project_name")))
+                due.append(_absolute_minutes(deadline) if deadline is not None else np.nan)
+
+        self.day = np.asarray(days, dtype=np.int64)
+        self.start = np.asarray(starts, dtype=np.int64)
+        self.end = np.asarray(ends, dtype=np.int64)
+        self.priority = np.asarray(priorities, dtype=np.int64)
+        self.deadline = np.asarray(due, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+
+def _check(entries: _Entries, max_block: int, daily_max: int) -> List[Violation]:
+    violations = list(entries.invalid)
+    if not len(entries):
+        return violations
+
+    def flag(code: str, mask: np.ndarray, detail) -> None:
+        for i in np.flatnonzero(mask):
+            date, index = entries.refs[i]
+            violations.append(Violation(code, date, index, detail(i)))
+
+    duration = entries.end - entries.start
+    flag("bad_time_range", duration <= 0, lambda i: "block does not end after it starts")
+    flag("block_too_long", duration > max_block, lambda i: f"{duration[i]} min block (max {max_block})")
+
+    # blocks never cross midnight, so one sort over absolute minutes covers every day at once
+    absolute_start = entries.day * DAY_MINUTES + entries.start
+    absolute_end = entries.day * DAY_MINUTES + entries.end
+    order = np.argsort(absolute_start, kind="stable")
+    running_end = np.maximum.accumulate(absolute_end[order])
+    overlapping = np.zeros(len(entries), dtype=bool)
+    overlapping[order[1:]] = absolute_start[order[1:]] < running_end[:-1]
+    flag("overlap", overlapping, lambda i: "overlaps an earlier block of the same day")
+
+    days, day_index = np.unique(entries.day, return_inverse=True)
+    totals = np.bincount(day_index, weights=np.clip(duration, 0, None))
+    for position in np.flatnonzero(totals > daily_max):
+        violations.append(Violation("day_overloaded", date_type.fromordinal(int(days[position])).isoformat(), None,
+                                    f"{int(totals[position])} min of work (max {daily_max})"))
+
+    flag("bad_priority", entries.priority < 1, lambda i: "priority must be a positive integer")
+    by_priority = np.lexsort((entries.priority, entries.day))
+    same = (entries.day[by_priority][1:] == entries.day[by_priority][:-1]) & \
+           (entries.priority[by_priority][1:] == entries.priority[by_priority][:-1]) & \
+           (entries.priority[by_priority][1:] >= 1)
+    duplicate = np.zeros(len(entries), dtype=bool)
+    duplicate[by_priority[1:]] = same
+    flag("duplicate_priority", duplicate, lambda i: f"priority {entries.priority[i]} used twice")
+
+    with np.errstate(invalid="ignore"):
+        late = absolute_end > entries.deadline  # unknown deadlines are NaN and never compare true
+    flag("after_deadline", late, lambda i: "block ends after the subject's deadline")
+    return violations
+
+
+def validate_calendar(
+        plan: Mapping[str, Any],
+        deadlines: Optional[Mapping[str, datetime]] = None,
+        max_block_minutes: int = MAX_BLOCK_MINUTES,
+        daily_max_minutes: int = DAILY_MAX_MINUTES,
+) -> ConstraintReport:
+    """Check a {"calendar": [...]} plan; deadlines map lower-cased subject names to datetimes."""
+    calendar = plan.get("calendar") if isinstance(plan, Mapping) else None
+    entries = _Entries(calendar if isinstance(calendar, list) else [], deadlines)
+    return ConstraintReport(_check(entries, max_block_minutes, daily_max_minutes),
+                            entries_checked=len(entries) + len(entries.invalid))
+
+
+def _repair_day(day: Dict[str, Any], max_block: int, actions: Dict[str, int]) -> None:
+    blocks = []  # (start, end, original priority, entry)
+    untouched = []
+    for entry in day.get("entries") or []:
+        parsed = parse_time_range(entry.get("time_allotted")) if isinstance(entry, dict) else None
+        if parsed is None or parsed[1] <= parsed[0]:
+            untouched.append(entry)
+            continue
+        start, end = parsed
+        priority = entry.get("priority") if isinstance(entry.get("priority"), int) else 0
+        if end - start <= max_block:
+            blocks.append((start, end, priority, entry))
+            continue
+        # consecutive parts of at most max_block minutes, same total time
+        base = _PART_SUFFIX.sub("", str(entry.get("task_name", "")))
+        parts = -(-(end - start) // max_block)
+        for number in range(parts):
+            part_start = start + number * max_block
+            part = {**entry, "task_name": f"{base} (part {number + 1})"}
+            blocks.append((part_start, min(end, part_start + max_block), priority, part))
+        actions["split"] += 1
+
+    blocks.sort(key=lambda b: (b[0], b[1]))
+    placed = []
+    cursor = 0
+    for start, end, priority, entry in blocks:
+        if start < cursor and cursor + (end - start) <= DAY_MINUTES:
+            start, end = cursor, cursor + (end - start)
+            actions["shifted"] += 1
+        entry["time_allotted"] = format_time_range(start, end)
+        placed.append((start, priority, entry))
+        cursor = max(cursor, end)
+
+    # 1..n in the existing priority order, ties broken by time; unparseable entries come last
+    ranked = [entry for _, _, entry in sorted(placed, key=lambda b: (b[1] < 1, b[1], b[0]))]
+    for rank, entry in enumerate(ranked + [e for e in untouched if isinstance(e, dict)], start=1):
+        entry["priority"] = rank
+    actions["renumbered_days"] += 1
+    day["entries"] = [entry for _, _, entry in placed] + untouched
+
+
+def repair_calendar(
+        plan: Mapping[str, Any],
+        deadlines: Optional[Mapping[str, datetime]] = None,
+        report: Optional[ConstraintReport] = None,
+        max_block_minutes: int = MAX_BLOCK_MINUTES,
+        daily_max_minutes: int = DAILY_MAX_MINUTES,
+) -> Tuple[Dict[str, Any], ConstraintReport, Dict[str, int]]:
+    """
+    Copy of the plan with the days that have violations repaired; returns
+    (plan, report of what is left, {"split", "shifted", "renumbered_days"}).
+    """
+    report = report or validate_calendar(plan, deadlines, max_block_minutes, daily_max_minutes)
+    repaired = copy.deepcopy(dict(plan))
+    actions = {"split": 0, "shifted": 0, "renumbered_days": 0}
+    dirty = {v.date for v in report.violations if v.code in REPAIRABLE}
+    for day in repaired.get("calendar") or []:
+        if isinstance(day, dict) and day.get("date") in dirty:
+            _repair_day(day, max_block_minutes, actions)
+    return repaired, validate_calendar(repaired, deadlines, max_block_minutes, daily_max_minutes), actions
+
+
+def enforce_calendar_constraints(
+        plan: Any,
+        deadlines: Optional[Mapping[str, datetime]] = None,
+        mode: Optional[str] = None,
+) -> Any:
+    """
+    Validate (and with mode "repair", the CALENDAR_VALIDATION default, repair) an agent's calendar.
+    When something was wrong the returned plan carries a "constraint_report": violation counts
+    found, repairs made and the violations that remain.
+    """
+    mode = mode or CALENDAR_VALIDATION
+    if mode == "off" or not isinstance(plan, dict) or not isinstance(plan.get("calendar"), list):
+        return plan
+    report = validate_calendar(plan, deadlines)
+    if report.ok:
+        return plan
+
+    remaining, actions = report, None
+    if mode == "repair":
+        plan, remaining, actions = repair_calendar(plan, deadlines, report)
+    print(f"[calendar_validation] {report.counts()} in {report.entries_checked} entries"
+          + (f"; repaired {actions}, remaining {remaining.counts() or 'none'}" if actions is not None else ""))
+    plan = dict(plan)
+    plan["constraint_report"] = {
+        "found": report.counts(),
+        "repairs": actions,
+        "remaining": remaining.as_dict()["violations"],
+    }
+    return plan
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from huggingface_hub import AsyncInferenceClient, InferenceClient
+
+from ai_system.utils.telemetry import telemetry_registry
+
+# One client per (model, token) for the whole process, so HTTP keep-alive / TLS sessions are reused
+# across agent calls instead of being rebuilt for every propose_agent_plan.
+_lock = threading.Lock()
+_clients: Dict[Tuple[Optional[str], Optional[str]], InferenceClient] = {}
+# AsyncInferenceClient holds an httpx.AsyncClient, which is bound to the event loop that created it
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[Optional[str], Optional[str]], AsyncInferenceClient]]" = weakref.WeakKeyDictionary()
+
+# (model, token) -> client; replaceable so tests/benchmarks can run against a local fake backend
+ClientFactory = Callable[[Optional[str], Optional[str]], Any]
+_factories: Optional[Tuple[ClientFactory, ClientFactory]] = None
+
+
+def _default_factories() -> Tuple[ClientFactory, ClientFactory]:
+    if os.getenv("LLM_BACKEND", "hf").lower() == "fake":
+        from ai_system.utils.fake_inference import FakeAsyncInferenceClient, FakeInferenceClient
+        return FakeInferenceClient, FakeAsyncInferenceClient
+    return (
+        lambda model, token: InferenceClient(model=model, token=token),
+        lambda model, token: AsyncInferenceClient(model=model, token=token),
+    )
+
+
+def _get_factories() -> Tuple[ClientFactory, ClientFactory]:
+    global _factories
+    if _factories is None:
+        _factories = _default_factories()
+    return _factories
+
+
+def set_client_factory(factory: Optional[ClientFactory], async_factory: Optional[ClientFactory]) -> None:
+    """
+    Build clients with the given factories from now on (None, None restores the default, which
+    honours LLM_BACKEND=fake). Already pooled clients are dropped.
+    """
+    global _factories
+    with _lock:
+        _factories = (factory, async_factory) if factory and async_factory else None
+        _clients.clear()
+        _async_clients.clear()
+
+
+def get_inference_client(model: Optional[str], token: Optional[str]) -> InferenceClient:
+    key = (model, token)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = _get_factories()[0](model, token)
+    return client
+
+
+def get_async_inference_client(model: Optional[str], token: Optional[str]) -> AsyncInferenceClient:
+    loop = asyncio.get_running_loop()
+    key = (model, token)
+    with _lock:
+        per_loop = _async_clients.setdefault(loop, {})
+        client = per_loop.get(key)
+        if client is None:
+            client = per_loop[key] = _get_factories()[1](model, token)
+    return client
+
+
+async def aclose_async_clients() -> None:
+    """Close the pooled async clients of the running loop (call on application shutdown)."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        per_loop = _async_clients.pop(loop, {})
+    for (model, _), client in per_loop.items():
+        try:
+            await client.close()
+        except Exception as e:  # one broken connection must not keep the others open
+            telemetry_registry.count("inference_client_close_failures")
+            print(f"[client_pool] Closing the {model} client failed: {type(e).__name__}: {e}")
@@ -61,3 +61,55 @@ def get_general_heuristics_header():
         "- Use action-oriented subtask names appropriate to the subtask type "
         "(e.g.,'Solve Model Problems', 'Additional notes', ...).\n"
     )
+
+
+def get_batch_input_output_instructions(tasks, type_):
+    task_blocks = []
+    for number, task in enumerate(tasks, start=1):
+        deadline = task["end_datetime"] if type_ == "project" else task["start_datetime"]
+        task_blocks.append(
+            f"Task {number}:\n"
+            f"{{\n"
+            f'  "title": "{task["title"]}",\n'
+            f'  "name": "{task["subject_name/project_name"]}",\n'
+            f'  "start_datetime": "{task["start_datetime"]}",\n'
+            f'  "end_datetime": "{task["end_datetime"]}",\n'
+            f'  "type": "{task["type"]}",\n'
+            f'  "difficulty": "{task["difficulty"]}",\n'
+            f'  "description": "{task["description"]}",\n'
+            f'  "status": "{task["status"]}",\n'
+            f'  "deadline": "{deadline}"\n'
+            f"}}\n"
+        )
+
+    batch_instructions = (
+        f"Below is the data for {len(tasks)} independent {type_} tasks. "
+        f"Plan EACH task on its own, estimating workload, difficulty, and subtasks using the given heuristics.\n\n"
+
+        + "\n".join(task_blocks) +
+
+        f"\nExpected output:\n"
+        f"{{\n"
+        f'  "plans": [\n'
+        f"    <exactly {len(tasks)} plans, one per task, in the same order as the tasks above>\n"
+        f"  ]\n"
+        f"}}\n\n"
+
+        f"Each plan:\n"
+        f"{{\n"
+        f'  "summary": "Brief 1-sentence overview of the task.",\n'
+        f'  "subject_name/project_name": "<the task\'s name>",\n'
+        f'  "total_estimated_hours": <integer>,\n'
+        f'  "difficulty": <integer from 1–5, balanced between input and your estimate>,\n'
+        f'  "tasks": [\n'
+        f'    {{ "task_name": <string>, "estimated_hours": <integer>, "priority": <integer starting from 1> }}\n'
+        f'  ],\n'
+        f'  "deadline": "<the task\'s deadline>"\n'
+        f"}}\n\n"
+
+        f"Output rules:\n"
+        f"- Output MUST be valid JSON only (no extra text, no trailing commas, no Markdown, no explanations).\n"
+        f"- Use realistic and coherent time estimates consistent with heuristics.\n"
+        f"- Priorities must start at 1 and increase sequentially within each plan.\n"
+    )
+    return batch_instructions
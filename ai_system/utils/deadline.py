@@ -0,0 +1,131 @@
+"""
+Request deadlines and cancellation for the AI pipeline.
+
+A route creates one Deadline per request (REQUEST_DEADLINE_SECONDS) and hands it to the
+orchestrator, which derives a shorter Deadline per stage (child) for the subject agents and the
+calendar merge. The stage deadline is made current around the agent calls with deadline_scope, the
+same way telemetry's llm_call_scope attributes them, so make_llm_call / amake_llm_call find it
+without every agent passing it along: they stop retrying, bound each attempt by the time left and
+raise DeadlineExceeded once it is up.
+
+cancel() (e.g. the client disconnected) is shared by a deadline and all its children, and also
+stops calls running on worker threads, which asyncio task cancellation can't reach.
+"""
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "180"))  # 0 = no overall deadline
+SUBJECT_STAGE_SECONDS = float(os.getenv("SUBJECT_STAGE_SECONDS", "90"))  # 0 = bounded by the request only
+MERGE_STAGE_SECONDS = float(os.getenv("MERGE_STAGE_SECONDS", "90"))
+
+
+class DeadlineExceeded(Exception):
+    """The time budget ran out or the work was cancelled; not retryable, unlike TimeoutError."""
+
+
+class _Cancellation:
+    def __init__(self):
+        self.event = threading.Event()
+        self.reason: Optional[str] = None
+
+
+class Deadline:
+    """A point in monotonic time (None = unbounded) plus a cancellation flag shared with its children."""
+
+    def __init__(self, seconds: Optional[float] = None, *, parent: Optional["Deadline"] = None, name: str = "request"):
+        self.name = name
+        self.expires_at = time.monotonic() + seconds if seconds else None
+        if parent is not None and parent.expires_at is not None:
+            self.expires_at = parent.expires_at if self.expires_at is None else min(self.expires_at, parent.expires_at)
+        self._cancellation = parent._cancellation if parent is not None else _Cancellation()
+
+    def child(self, seconds: Optional[float], name: str) -> "Deadline":
+        """A stage deadline: `seconds` from now, never later than this one."""
+        return Deadline(seconds, parent=self, name=name)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (0 once expired or cancelled), None if unbounded."""
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancellation.event.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() == 0.0
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self.cancelled:
+            self._cancellation.reason = reason
+            self._cancellation.event.set()
+
+    def reason(self) -> str:
+        if self.cancelled:
+            return self._cancellation.reason or "cancelled"
+        return f"{self.name} deadline exceeded"
+
+    def check(self) -> None:
+        if self.expired:
+            raise DeadlineExceeded(self.reason())
+
+    def allows(self, seconds: float) -> bool:
+        remaining = self.remaining()
+        return remaining is None or remaining >= seconds
+
+    def sleep(self, seconds: float) -> None:
+        """time.sleep that wakes up on cancellation; raises DeadlineExceeded if the wait can't finish in time."""
+        if not self.allows(seconds):
+            raise DeadlineExceeded(self.reason())
+        if self._cancellation.event.wait(seconds):
+            raise DeadlineExceeded(self.reason())
+
+
+def request_deadline(seconds: Optional[float] = None) -> Deadline:
+    """Deadline for one API request (REQUEST_DEADLINE_SECONDS by default)."""
+    return Deadline(REQUEST_DEADLINE_SECONDS if seconds is None else seconds)
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make `deadline` current for the LLM calls made inside the block (same thread / same asyncio task)."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def run_with_deadline(deadline: Deadline, fn: Callable[..., T], *args: Any) -> T:
+    """
+    fn(*args) on a worker thread (with the caller's context variables), abandoned when the deadline
+    passes: DeadlineExceeded is raised and the thread finishes its blocking call on its own.
+    """
+    if deadline.remaining() is None:
+        return fn(*args)
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="deadline")
+    future = executor.submit(contextvars.copy_context().run, fn, *args)
+    executor.shutdown(wait=False)
+    try:
+        return future.result(timeout=deadline.remaining())
+    except FutureTimeoutError:
+        raise DeadlineExceeded(deadline.reason()) from None
@@ -0,0 +1,283 @@
+"""
+Local stand-in for the Hugging Face inference API.
+
+FakeInferenceClient / FakeAsyncInferenceClient expose the two methods make_llm_call uses
+(chat_completion, text_generation) and answer with schema-valid JSON generated from the prompt:
+subject plans (single or batched), merged calendars and feedback reschedules. Latency follows a
+log-normal distribution plus a per-output-token cost, and a configurable share of calls fail with
+a 503 or a 429 (with Retry-After), so retries, hedging and the key pool can be load-tested without
+spending quota.
+
+Enable it with LLM_BACKEND=fake (see client_pool) or client_pool.set_client_factory(...).
+Tuning: FAKE_LLM_LATENCY_MS (median), FAKE_LLM_LATENCY_SIGMA, FAKE_LLM_MS_PER_TOKEN,
+FAKE_LLM_ERROR_RATE, FAKE_LLM_RATE_LIMIT_RATE, FAKE_LLM_SEED.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from ai_system.utils.key_pool import estimate_tokens
+
+
+@dataclass
+class FakeBackendConfig:
+    latency_ms: float = 300.0  # median
+    latency_sigma: float = 0.5  # log-normal shape; 0 = fixed latency
+    ms_per_token: float = 0.0  # extra latency per generated token
+    error_rate: float = 0.0  # share of calls failing with 503
+    rate_limit_rate: float = 0.0  # share of calls failing with 429
+    retry_after_seconds: float = 1.0
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "FakeBackendConfig":
+        seed = os.getenv("FAKE_LLM_SEED")
+        return cls(
+            latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", cls.latency_ms)),
+            latency_sigma=float(os.getenv("FAKE_LLM_LATENCY_SIGMA", cls.latency_sigma)),
+            ms_per_token=float(os.getenv("FAKE_LLM_MS_PER_TOKEN", cls.ms_per_token)),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", cls.error_rate)),
+            rate_limit_rate=float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", cls.rate_limit_rate)),
+            seed=int(seed) if seed else None,
+        )
+
+
+class FakeInferenceError(Exception):
+    """Shaped like huggingface_hub's HTTP errors: .response.status_code / .response.headers."""
+
+    def __init__(self, status_code: int, headers: Optional[Dict[str, str]] = None):
+        super().__init__(f"{status_code} Fake inference backend error")
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class FakeBackend:
+    def __init__(self, config: Optional[FakeBackendConfig] = None):
+        self.config = config or FakeBackendConfig.from_env()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.rate_limited = 0
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.calls = self.failures = self.rate_limited = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "failures": self.failures, "rate_limited": self.rate_limited}
+
+    def plan_call(self, prompt: str) -> Tuple[float, Optional[FakeInferenceError], str]:
+        """Decide (latency seconds, error to raise, response text) for one call."""
+        with self._lock:
+            self.calls += 1
+            roll = self._random.random()
+            jitter = self._random.gauss(0, 1)
+
+        config = self.config
+        if roll < config.rate_limit_rate:
+            with self._lock:
+                self.rate_limited += 1
+            retry_after = {"retry-after": f"{config.retry_after_seconds:g}"}
+            return config.latency_ms / 4000, FakeInferenceError(429, retry_after), ""
+        if roll < config.rate_limit_rate + config.error_rate:
+            with self._lock:
+                self.failures += 1
+            return config.latency_ms / 1000, FakeInferenceError(503), ""
+
+        response = generate_response(prompt)
+        latency_ms = config.latency_ms * math.exp(config.latency_sigma * jitter)
+        latency_ms += config.ms_per_token * estimate_tokens(response)
+        return latency_ms / 1000, None, response
+
+
+_backend: Optional[FakeBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_fake_backend() -> FakeBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = FakeBackend()
+    return _backend
+
+
+def configure_fake_backend(**overrides: Any) -> FakeBackend:
+    """Replace the shared fake backend, e.g. configure_fake_backend(latency_ms=50, error_rate=0.02)."""
+    global _backend
+    config = FakeBackendConfig.from_env()
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    with _backend_lock:
+        _backend = FakeBackend(config)
+    return _backend
+
+
+def _chat_reply(text: str) -> Any:
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=text))])
+
+
+def _prompt_of(messages: List[Dict[str, str]]) -> str:
+    return "\n".join(m.get("content", "") for m in messages)
+
+
+class FakeInferenceClient:
+    def __init__(self, model: Optional[str] = None, token: Optional[str] = None, backend: Optional[FakeBackend] = None):
+        self.model = model
+        self.token = token
+        self._backend = backend
+
+    @property
+    def backend(self) -> FakeBackend:
+        return self._backend or get_fake_backend()
+
+    def _call(self, prompt: str) -> str:
+        latency, error, response = self.backend.plan_call(prompt)
+        time.sleep(latency)
+        if error is not None:
+            raise error
+        return response
+
+    def chat_completion(self, messages: List[Dict[str, str]], **kwargs: Any) -> Any:
+        return _chat_reply(self._call(_prompt_of(messages)))
+
+    def text_generation(self, prompt: str, **kwargs: Any) -> str:
+        return self._call(prompt)
+
+
+class FakeAsyncInferenceClient(FakeInferenceClient):
+    async def _acall(self, prompt: str) -> str:
+        latency, error, response = self.backend.plan_call(prompt)
+        await asyncio.sleep(latency)
+        if error is not None:
+            raise error
+        return response
+
+    async def chat_completion(self, messages: List[Dict[str, str]], **kwargs: Any) -> Any:
+        return _chat_reply(await self._acall(_prompt_of(messages)))
+
+    async def text_generation(self, prompt: str, **kwargs: Any) -> str:
+        return await self._acall(prompt)
+
+    async def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------- response generation
+
+_LAST_NAME = re.compile(r'"subject_name/project_name": "([^"]*)"')
+_LAST_DEADLINE = re.compile(r'"deadline": "([^"]*)"')
+_LAST_DIFFICULTY = re.compile(r'"difficulty": "?(\d)')
+_BATCH_TASK = re.compile(r"Task \d+:\n\{(.*?)\n\}", re.DOTALL)
+_SUBJECT_NAMES = (
+    re.compile(r'"subject":"([^"]+)"'),
+    re.compile(r'"subject_name/project_name":"([^"]+)"'),
+    re.compile(r"'subject_name/project_name': '([^']+)'"),
+    re.compile(r"^([^|\n]+)\|\d\|\d{4}-", re.MULTILINE),  # table-encoded plans
+    re.compile(r"^\d{4}-\d{2}-\d{2}\|[^|]*\|([^|]+)\|", re.MULTILINE),  # table-encoded schedule
+)
+_CURRENT_DATE = re.compile(r"CURRENT DATE:\s*(\d{4}-\d{2}-\d{2})")
+_WINDOW = re.compile(r"days from (\d{4}-\d{2}-\d{2}) to (\d{4}-\d{2}-\d{2})")
+
+
+def _rng(prompt: str) -> random.Random:
+    """Deterministic per prompt, so the response cache and repeated runs see identical answers."""
+    return random.Random(int(hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12], 16))
+
+
+def _subject_plan(name: str, deadline: str, difficulty: int, rng: random.Random) -> Dict[str, Any]:
+    steps = ["Lecture review", "Seminar problems", "Notes and outlines", "Practice exam", "Final revision"]
+    tasks = [
+        {"task_name": step, "estimated_hours": rng.randint(1, 4), "priority": priority}
+        for priority, step in enumerate(steps[:rng.randint(3, 5)], start=1)
+    ]
+    return {
+        "summary": f"Preparation plan for {name}.",
+        "subject_name/project_name": name,
+        "total_estimated_hours": sum(t["estimated_hours"] for t in tasks),
+        "difficulty": max(1, min(5, difficulty)),
+        "tasks": tasks,
+        "deadline": deadline,
+    }
+
+
+def _field(block: str, name: str) -> str:
+    found = re.search(rf'"{name}": "([^"]*)"', block)
+    return found.group(1) if found else ""
+
+
+def _calendar(start: datetime, days: int, subjects: List[str], rng: random.Random) -> Dict[str, Any]:
+    subjects = subjects or ["General study"]
+    calendar = []
+    for offset in range(days):
+        entries = []
+        hour = 9
+        for priority in range(1, rng.randint(1, 3) + 1):
+            length = rng.randint(1, 2)
+            entries.append({
+                "time_allotted": f"{hour:02d}:00–{hour + length:02d}:00",
+                "task_name": "Study session",
+                "subject_name/project_name": rng.choice(subjects),
+                "difficulty": rng.randint(1, 5),
+                "priority": priority,
+            })
+            hour += length + 1
+        calendar.append({"date": (start + timedelta(days=offset)).date().isoformat(), "entries": entries, "notes": ""})
+    return {"summary": f"Schedule covering {len(subjects)} subject(s).", "calendar": calendar}
+
+
+def _subjects_in(prompt: str) -> List[str]:
+    names: List[str] = []
+    for pattern in _SUBJECT_NAMES:
+        names.extend(pattern.findall(prompt))
+    return sorted(set(n.strip() for n in names if n.strip() and n.strip() != "subject"))
+
+
+def generate_response(prompt: str) -> str:
+    rng = _rng(prompt)
+
+    if "CalendarRefiner-AI" in prompt:
+        window = _WINDOW.search(prompt)
+        current = _CURRENT_DATE.search(prompt)
+        if window:
+            start = datetime.fromisoformat(window.group(1))
+            days = (datetime.fromisoformat(window.group(2)) - start).days + 1
+        else:
+            start = datetime.fromisoformat(current.group(1)) if current else datetime.now()
+            days = 7
+        return json.dumps(_calendar(start, days, _subjects_in(prompt), rng), ensure_ascii=False)
+
+    if "CalendarMaster-AI" in prompt:
+        current = _CURRENT_DATE.search(prompt)
+        start = (datetime.fromisoformat(current.group(1)) if current else datetime.now()) + timedelta(days=1)
+        subjects = _subjects_in(prompt)
+        return json.dumps(_calendar(start, min(30, 2 * max(1, len(subjects))), subjects, rng), ensure_ascii=False)
+
+    batch = _BATCH_TASK.findall(prompt)
+    if batch:
+        plans = [
+            _subject_plan(_field(b, "name"), _field(b, "deadline"), int(_field(b, "difficulty") or 3), rng)
+            for b in batch
+        ]
+        return json.dumps({"plans": plans}, ensure_ascii=False)
+
+    names = _LAST_NAME.findall(prompt)
+    deadlines = _LAST_DEADLINE.findall(prompt)
+    difficulties = _LAST_DIFFICULTY.findall(prompt)
+    return json.dumps(_subject_plan(
+        names[-1] if names else "Subject",
+        deadlines[-1] if deadlines else datetime.now().isoformat(timespec="seconds"),
+        int(difficulties[-1]) if difficulties else 3,
+        rng,
+    ), ensure_ascii=False)
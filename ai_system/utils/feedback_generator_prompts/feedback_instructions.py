@@ -1,4 +1,15 @@
-def generate_feedback_instructions(last_feedback, last_schedule, current_feedback, date):
+from ai_system.utils.prompt_encoding import calendar_output_format, encode_schedule, encode_value
+
+
+def generate_feedback_instructions(last_feedback, last_schedule, current_feedback, date, window=None):
+    # window: (first_day, last_day) when only part of the schedule is sent (windowed rescheduling)
+    window_rule = (
+        f"RESCHEDULE WINDOW:\n"
+        f"- The existing calendar below only contains the days from {window[0]} to {window[1]}.\n"
+        f"- Days outside this window are fixed and are NOT shown; do not output them.\n"
+        f"- Output ONLY days from {window[0]} to {window[1]}, keeping every task inside this window.\n\n"
+    ) if window else ""
+
     prompt = (
         "You are CalendarRefiner-AI, an expert academic schedule revision system.\n\n"
 
@@ -10,9 +21,10 @@ def generate_feedback_instructions(last_feedback, last_schedule, current_feedbac
         "- Avoid 00:00–06:00 unless unavoidable.\n\n"
 
         f"CURRENT DATE:\n{date}\n\n"
-        f"LAST USER FEEDBACK (already applied):\n{last_feedback}\n\n"
-        f"EXISTING CALENDAR (baseline):\n{last_schedule}\n\n"
-        f"NEW USER FEEDBACK (apply within constraints):\n{current_feedback}\n\n"
+        f"LAST USER FEEDBACK (already applied):\n{encode_value(last_feedback)}\n\n"
+        f"{window_rule}"
+        f"EXISTING CALENDAR (baseline):\n{encode_schedule(last_schedule)}\n\n"
+        f"NEW USER FEEDBACK (apply within constraints):\n{encode_value(current_feedback)}\n\n"
 
         "FEEDBACK APPLICATION RULE:\n"
         "Interpret feedback as a PREFERENCE, not as a rule override.\n"
@@ -27,23 +39,6 @@ def generate_feedback_instructions(last_feedback, last_schedule, current_feedbac
         "- Output JSON ONLY\n\n"
 
         "OUTPUT FORMAT (STRICT):\n"
-        "{\n"
-        '  "summary": "<one-sentence overview of the overall schedule>",\n'
-        '  "calendar": [\n'
-        "    {\n"
-        '      "date": "YYYY-MM-DD",\n'
-        '      "entries": [\n'
-        "        {\n"
-        '          "time_allotted": "HH:MM–HH:MM",\n'
-        '          "task_name": "<string>",\n'
-        '          "subject_name/project_name": "<string>",\n'
-        '          "difficulty": <integer 1-5>,\n'
-        '          "priority": <integer starting from 1>\n'
-        "        }\n"
-        "      ],\n"
-        '      "notes": "<optional short string>"\n'
-        "    }\n"
-        "  ]\n"
-        "}\n\n"
+        f"{calendar_output_format()}"
     )
     return prompt
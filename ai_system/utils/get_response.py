@@ -1,18 +1,232 @@
+import asyncio
+import time
+
+from ai_system.utils.client_pool import get_async_inference_client, get_inference_client
+from ai_system.utils.deadline import DeadlineExceeded, current_deadline
+from ai_system.utils.key_pool import estimate_tokens, get_key_pool, is_rate_limit_error
+from ai_system.utils.resilience import (
+    arun_hedged,
+    get_retry_policy,
+    hedge_delay,
+    is_retryable_error,
+    latency_tracker,
+    run_hedged,
+)
+from ai_system.utils.response_cache import get_response_cache
+from ai_system.utils.telemetry import LLMCallRecord, finish_call, start_call
+
+LLM_TEMPERATURE = 0.2
+FAILED_RESPONSE = "Could not complete response."
+
+
+def _is_cacheable(response):
+    return bool(response) and response != FAILED_RESPONSE
+
+
+def _close_record(record: LLMCallRecord, response, started):
+    if record.attempts == 0:
+        record.method = "cache"  # served from the cache or by a coalesced identical call
+    if response == FAILED_RESPONSE:
+        record.outcome = "failed"
+    if not record.completion_tokens:
+        record.completion_tokens = estimate_tokens(response) if _is_cacheable(response) else 0
+    finish_call(record, started)
+
+
+def _usage(record: LLMCallRecord, reply):
+    usage = getattr(reply, "usage", None)
+    if getattr(usage, "prompt_tokens", None):
+        record.prompt_tokens = usage.prompt_tokens
+    if getattr(usage, "completion_tokens", None):
+        record.completion_tokens = usage.completion_tokens
+
+
 # flask
 def make_llm_call(client,prompt,model_name):
+    record = start_call(model_name, estimate_tokens(prompt))
+    started = time.monotonic()
+    response = FAILED_RESPONSE
+    try:
+        cache = get_response_cache()
+        if cache is None:
+            response = _call_model(client, prompt, model_name, record)
+        else:
+            response = cache.get_or_call(model_name, prompt, LLM_TEMPERATURE,
+                                         lambda: _call_model(client, prompt, model_name, record),
+                                         should_store=_is_cacheable)
+        return response
+    except BaseException as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        _close_record(record, response, started)
+
+
+def _call_model(client, prompt, model_name, record):
+    # Transient failures are retried with jittered exponential backoff; a 429 moves on to the next
+    # key of the pool right away, since the rate-limited key has just been quarantined.
+    # A current deadline is checked before every attempt; an attempt already running can't be
+    # interrupted from here, the orchestrator stops waiting for it instead
+    policy = get_retry_policy()
+    pool = get_key_pool()
+    deadline = current_deadline()
+    response = FAILED_RESPONSE
+    for attempt in range(policy.max_attempts):
+        if deadline is not None:
+            deadline.check()
+        response, error = run_hedged(lambda: _attempt(client, prompt, model_name, record, deadline),
+                                     hedge_delay(policy, model_name))
+        record.error = type(error).__name__ if error is not None else None
+        if error is None or not is_retryable_error(error) or attempt + 1 == policy.max_attempts:
+            break
+        if not (pool is not None and pool.size > 1 and is_rate_limit_error(error)):
+            delay = policy.backoff_delay(attempt + 1)
+            print(f"[make_llm_call] {model_name} attempt {attempt + 1} failed ({error}), retrying in {delay:.1f}s")
+            if deadline is not None:
+                deadline.sleep(delay)
+            else:
+                time.sleep(delay)
+    return response
+
+
+def _attempt(client, prompt, model_name, record, deadline=None):
+    """
+    One timed call on the least-loaded healthy key (or the agent's own client without a pool).
+    The deadline is passed in: hedged attempts run on executor threads without the caller's context.
+    """
+    pool = get_key_pool()
+    record.attempts += 1
+    queued = time.monotonic()
+    lease = pool.acquire(estimate_tokens(prompt), deadline) if pool is not None else None
+    started = time.monotonic()
+    record.queue_wait_s += started - queued
+    try:
+        keyed_client = get_inference_client(model_name, lease.token) if lease is not None else client
+        response, error = _chat_then_text(keyed_client, prompt, model_name, record)
+    except BaseException:
+        if lease is not None:
+            pool.release(lease)
+        raise
+    if lease is not None:
+        pool.release(lease, used_tokens=estimate_tokens(prompt) + estimate_tokens(response), error=error)
+    if error is None:
+        latency_tracker.record(model_name, time.monotonic() - started)
+    return response, error
+
+
+def _chat_then_text(client, prompt, model_name, record):
+    """Returns (response, error): error is the last exception if no method produced a response."""
     # Attempt chat_completion
     try:
         reply = client.chat_completion(messages=[{"role": "user", "content": prompt}],
-                                       temperature=0.2)
+                                       temperature=LLM_TEMPERATURE)
         # Ensure the content extraction is correct based on the client type
         response = getattr(reply.choices[0].message, 'content', str(reply.choices[0].message))
+        record.method = "chat"
+        _usage(record, reply)
+        return response, None
     # Fallback to text_generation
     except Exception as e_chat:
         print(f"Chat completion failed for {model_name}: {e_chat}")
+        if is_rate_limit_error(e_chat):
+            return FAILED_RESPONSE, e_chat  # same key, same limit: don't burn another request
         try:
-            reply = client.text_generation(prompt, temperature=0.2)
-            response = reply
+            reply = client.text_generation(prompt, temperature=LLM_TEMPERATURE)
+            record.method = "text_generation"
+            return reply, None
         except Exception as e_text:
             print(f"Text generation failed for {model_name}: {e_text}")
-            response = "Could not complete response."
+            return FAILED_RESPONSE, e_text
+
+
+# asyncio variant of make_llm_call, for an AsyncInferenceClient
+async def amake_llm_call(client, prompt, model_name):
+    record = start_call(model_name, estimate_tokens(prompt))
+    started = time.monotonic()
+    response = FAILED_RESPONSE
+    try:
+        cache = get_response_cache()
+        if cache is None:
+            response = await _acall_model(client, prompt, model_name, record)
+        else:
+            response = await cache.aget_or_call(model_name, prompt, LLM_TEMPERATURE,
+                                                lambda: _acall_model(client, prompt, model_name, record),
+                                                should_store=_is_cacheable)
+        return response
+    except BaseException as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        _close_record(record, response, started)
+
+
+async def _acall_model(client, prompt, model_name, record):
+    # each attempt (key lease wait included) is cut off when the current deadline runs out
+    policy = get_retry_policy()
+    pool = get_key_pool()
+    deadline = current_deadline()
+    response = FAILED_RESPONSE
+    for attempt in range(policy.max_attempts):
+        if deadline is not None:
+            deadline.check()
+        try:
+            response, error = await asyncio.wait_for(
+                arun_hedged(lambda: _aattempt(client, prompt, model_name, record), hedge_delay(policy, model_name)),
+                deadline.remaining() if deadline is not None else None,
+            )
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(deadline.reason()) from None
+        record.error = type(error).__name__ if error is not None else None
+        if error is None or not is_retryable_error(error) or attempt + 1 == policy.max_attempts:
+            break
+        if not (pool is not None and pool.size > 1 and is_rate_limit_error(error)):
+            delay = policy.backoff_delay(attempt + 1)
+            print(f"[make_llm_call] {model_name} attempt {attempt + 1} failed ({error}), retrying in {delay:.1f}s")
+            if deadline is not None and not deadline.allows(delay):
+                raise DeadlineExceeded(deadline.reason())
+            await asyncio.sleep(delay)
     return response
+
+
+async def _aattempt(client, prompt, model_name, record):
+    pool = get_key_pool()
+    record.attempts += 1
+    queued = time.monotonic()
+    lease = await pool.aacquire(estimate_tokens(prompt)) if pool is not None else None
+    started = time.monotonic()
+    record.queue_wait_s += started - queued
+    try:
+        keyed_client = get_async_inference_client(model_name, lease.token) if lease is not None else client
+        response, error = await _achat_then_text(keyed_client, prompt, model_name, record)
+    except BaseException:
+        if lease is not None:
+            pool.release(lease)  # cancelled (e.g. a hedge that lost): give the slot back
+        raise
+    if lease is not None:
+        pool.release(lease, used_tokens=estimate_tokens(prompt) + estimate_tokens(response), error=error)
+    if error is None:
+        latency_tracker.record(model_name, time.monotonic() - started)
+    return response, error
+
+
+async def _achat_then_text(client, prompt, model_name, record):
+    # Attempt chat_completion
+    try:
+        reply = await client.chat_completion(messages=[{"role": "user", "content": prompt}],
+                                             temperature=LLM_TEMPERATURE)
+        response = getattr(reply.choices[0].message, 'content', str(reply.choices[0].message))
+        record.method = "chat"
+        _usage(record, reply)
+        return response, None
+    # Fallback to text_generation
+    except Exception as e_chat:
+        print(f"Chat completion failed for {model_name}: {e_chat}")
+        if is_rate_limit_error(e_chat):
+            return FAILED_RESPONSE, e_chat
+        try:
+            reply = await client.text_generation(prompt, temperature=LLM_TEMPERATURE)
+            record.method = "text_generation"
+            return reply, None
+        except Exception as e_text:
+            print(f"Text generation failed for {model_name}: {e_text}")
+            return FAILED_RESPONSE, e_text
@@ -0,0 +1,253 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from ai_system.utils.deadline import Deadline, DeadlineExceeded
+
+DEFAULT_KEY_RPM = 60  # requests per minute per key
+DEFAULT_KEY_TPM = 0  # (estimated) tokens per minute per key, 0 = unlimited
+DEFAULT_QUARANTINE_SECONDS = 60.0
+DEFAULT_MAX_IN_FLIGHT = 0  # calls in flight across all keys of the process, 0 = unlimited
+MAX_QUARANTINE_SECONDS = 15 * 60.0
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting."""
+    return len(text or "") // 4 + 1
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    if _status_code(error) == 429:
+        return True
+    text = str(error).lower()
+    return "429" in text or "rate limit" in text or "too many requests" in text
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Continuously refilling budget; rate_per_minute <= 0 means unlimited."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate_per_second <= 0
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate_per_second)
+        self.updated = now
+
+    def fill_ratio(self, now: float) -> float:
+        if self.unlimited:
+            return 1.0
+        self._refill(now)
+        return self.level / self.capacity if self.capacity else 0.0
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be consumed (amounts above capacity only need a full bucket)."""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate_per_second)
+
+    def consume(self, amount: float, now: float) -> None:
+        if self.unlimited:
+            return
+        self._refill(now)
+        self.level -= amount  # may go negative: later requests wait for the debt to refill
+
+
+class _Key:
+    def __init__(self, token: str, rpm: float, tpm: float):
+        self.token = token
+        self.name = f"...{token[-4:]}" if token else "anonymous"
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.in_flight = 0
+        self.quarantined_until = 0.0
+        self.strikes = 0
+        self.total_requests = 0
+        self.rate_limited = 0
+
+
+class KeyLease:
+    """One acquired slot on a key; hand it back with KeyPool.release()."""
+
+    def __init__(self, key: _Key, reserved_tokens: int):
+        self._key = key
+        self.token = key.token
+        self.key_name = key.name
+        self.reserved_tokens = reserved_tokens
+
+
+class KeyPool:
+    """
+    Spreads LLM calls over several Hugging Face tokens.
+
+    Each key has a request bucket (rpm) and an estimated-token bucket (tpm). acquire() returns the
+    least-loaded healthy key with budget left (fewest in-flight calls, then fullest bucket), waiting
+    for a refill if every key is exhausted. Keys that hit a rate limit are quarantined for the
+    server's Retry-After, or an exponentially growing delay. max_in_flight caps the calls running
+    at once over all keys (per process).
+    """
+
+    def __init__(
+            self,
+            tokens: List[str],
+            rpm: float = DEFAULT_KEY_RPM,
+            tpm: float = DEFAULT_KEY_TPM,
+            quarantine_seconds: float = DEFAULT_QUARANTINE_SECONDS,
+            max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ):
+        if not tokens:
+            raise ValueError("KeyPool needs at least one token")
+        self._keys = [_Key(token, rpm, tpm) for token in dict.fromkeys(tokens)]
+        self.quarantine_seconds = quarantine_seconds
+        self.max_in_flight = max_in_flight
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self._keys)
+
+    def _try_acquire(self, estimated_tokens: int):
+        """Returns (lease, None) or (None, seconds to wait before trying again)."""
+        now = time.monotonic()
+        with self._lock:
+            if self.max_in_flight > 0 and sum(k.in_flight for k in self._keys) >= self.max_in_flight:
+                return None, 0.05
+            healthy = [k for k in self._keys if k.quarantined_until <= now]
+            if not healthy:
+                return None, min(k.quarantined_until for k in self._keys) - now
+
+            ready = [
+                k for k in healthy
+                if k.requests.wait_time(1, now) == 0 and k.tokens.wait_time(estimated_tokens, now) == 0
+            ]
+            if not ready:
+                return None, min(
+                    max(k.requests.wait_time(1, now), k.tokens.wait_time(estimated_tokens, now)) for k in healthy
+                )
+
+            key = min(ready, key=lambda k: (k.in_flight, -k.requests.fill_ratio(now), -k.tokens.fill_ratio(now)))
+            key.requests.consume(1, now)
+            key.tokens.consume(estimated_tokens, now)
+            key.in_flight += 1
+            key.total_requests += 1
+            return KeyLease(key, estimated_tokens), None
+
+    def acquire(self, estimated_tokens: int = 0, deadline: Optional[Deadline] = None) -> KeyLease:
+        """
+        Blocks until a key has budget. Raises DeadlineExceeded once `deadline` can't be met (the
+        async path gets the same from the wait_for around aacquire).
+        """
+        while True:
+            lease, wait = self._try_acquire(estimated_tokens)
+            if lease is not None:
+                return lease
+            pause = min(max(wait, 0.01), 1.0)
+            if deadline is None:
+                time.sleep(pause)
+                continue
+            remaining = deadline.remaining()
+            if remaining is not None and wait > remaining:
+                raise DeadlineExceeded(deadline.reason())
+            deadline.sleep(pause if remaining is None else min(pause, remaining))
+            deadline.check()
+
+    async def aacquire(self, estimated_tokens: int = 0) -> KeyLease:
+        while True:
+            lease, wait = self._try_acquire(estimated_tokens)
+            if lease is not None:
+                return lease
+            await asyncio.sleep(min(max(wait, 0.01), 1.0))
+
+    def release(self, lease: KeyLease, *, used_tokens: Optional[int] = None,
+                error: Optional[BaseException] = None) -> None:
+        now = time.monotonic()
+        key = lease._key
+        with self._lock:
+            key.in_flight -= 1
+            if used_tokens is not None:
+                key.tokens.consume(used_tokens - lease.reserved_tokens, now)
+
+            if error is not None and is_rate_limit_error(error):
+                key.rate_limited += 1
+                key.strikes += 1
+                delay = retry_after_seconds(error)
+                if delay is None:
+                    delay = min(self.quarantine_seconds * 2 ** (key.strikes - 1), MAX_QUARANTINE_SECONDS)
+                key.quarantined_until = now + delay
+                print(f"[KeyPool] Key {key.name} rate limited, quarantined for {delay:.0f}s")
+            elif error is None:
+                key.strikes = 0
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "key": k.name,
+                    "in_flight": k.in_flight,
+                    "requests": k.total_requests,
+                    "rate_limited": k.rate_limited,
+                    "quarantined_for_seconds": max(0.0, round(k.quarantined_until - now, 1)),
+                    "request_budget": round(k.requests.fill_ratio(now), 3),
+                    "token_budget": round(k.tokens.fill_ratio(now), 3),
+                }
+                for k in self._keys
+            ]
+
+
+_pool: Optional[KeyPool] = None
+_pool_lock = threading.Lock()
+
+
+def _configured_tokens() -> List[str]:
+    tokens = [t.strip() for t in os.getenv("HF_TOKENS", "").split(",") if t.strip()]
+    if not tokens:
+        tokens = [t for t in (os.getenv("HF_TOKEN_1"), os.getenv("HF_TOKEN_2")) if t]
+    return tokens
+
+
+def get_key_pool() -> Optional[KeyPool]:
+    """
+    Process-wide key pool built on first use from HF_TOKENS (comma separated), falling back to
+    HF_TOKEN_1/HF_TOKEN_2. Limits: HF_KEY_RPM, HF_KEY_TPM, HF_KEY_QUARANTINE_SECONDS, HF_MAX_IN_FLIGHT.
+    Returns None when no token is configured (calls then use the agent's own token).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                tokens = _configured_tokens()
+                if not tokens:
+                    return None
+                _pool = KeyPool(
+                    tokens,
+                    rpm=float(os.getenv("HF_KEY_RPM", DEFAULT_KEY_RPM)),
+                    tpm=float(os.getenv("HF_KEY_TPM", DEFAULT_KEY_TPM)),
+                    quarantine_seconds=float(os.getenv("HF_KEY_QUARANTINE_SECONDS", DEFAULT_QUARANTINE_SECONDS)),
+                    max_in_flight=int(os.getenv("HF_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)),
+                )
+    return _pool
@@ -0,0 +1,258 @@
+"""
+Deterministic, pure-Python replacement for the CalendarMaster-AI merge step.
+
+Takes the per-subject agent outputs ({"subject_name/project_name", "difficulty", "deadline",
+"tasks": [{"task_name", "estimated_hours", "priority"}]}) and packs them into the same
+{"summary", "calendar": [...]} structure the calendar prompt asks for, honouring its rules:
+  - every block ends at least 2 hours before the subject's deadline and starts 4 hours after "now"
+  - blocks never overlap, never exceed 2 hours, and are separated by a break
+  - at most DAILY_MAX_HOURS of work per day, inside the 08:00-22:00 study window
+  - work is placed as late as possible (closest to the deadline), closer deadlines first
+  - priorities are unique within a day, 1 = closest deadline
+If everything cannot fit, a second "time pressure" pass widens the day (06:00-24:00, 12 h);
+the deadline boundary itself is never crossed.
+"""
+from dataclasses import dataclass, field
+from datetime import date as date_type, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+DEADLINE_BUFFER = timedelta(hours=2)
+START_BUFFER = timedelta(hours=4)
+MAX_BLOCK_MINUTES = 120
+MIN_BLOCK_MINUTES = 30
+
+
+@dataclass(frozen=True)
+class SchedulingRules:
+    day_start: time
+    day_end_minutes: int  # minutes after midnight, 1440 = end of day
+    daily_max_minutes: int
+    break_minutes: int
+
+
+NORMAL_RULES = SchedulingRules(day_start=time(8, 0), day_end_minutes=22 * 60, daily_max_minutes=10 * 60,
+                               break_minutes=30)
+TIME_PRESSURE_RULES = SchedulingRules(day_start=time(6, 0), day_end_minutes=24 * 60, daily_max_minutes=12 * 60,
+                                      break_minutes=20)
+
+
+@dataclass
+class _Piece:
+    task_name: str
+    minutes: int
+
+
+@dataclass
+class _Subject:
+    name: str
+    difficulty: int
+    deadline: datetime
+    cutoff: datetime  # latest allowed end of any block
+    pieces: List[_Piece] = field(default_factory=list)  # in priority order, consumed from the end
+
+    @property
+    def remaining_minutes(self) -> int:
+        return sum(p.minutes for p in self.pieces)
+
+
+@dataclass
+class _Block:
+    start: datetime
+    end: datetime
+    subject: _Subject
+    task_name: str
+
+
+class LocalMergeResult:
+    """Calendar plus what the engine could not place (used by the hybrid merge mode)."""
+
+    def __init__(self, calendar: Dict[str, Any], skipped_plans: int, unscheduled_minutes: int):
+        self.calendar = calendar
+        self.skipped_plans = skipped_plans
+        self.unscheduled_minutes = unscheduled_minutes
+
+    @property
+    def complete(self) -> bool:
+        return self.skipped_plans == 0 and self.unscheduled_minutes == 0
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, date_type):
+        return datetime.combine(value, time())
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        return datetime.fromisoformat(value.strip().replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def _to_minutes(hours: Any) -> int:
+    try:
+        minutes = int(round(float(hours) * 60))
+    except (TypeError, ValueError):
+        return 0
+    return max(0, minutes)
+
+
+def _clamp_difficulty(value: Any) -> int:
+    try:
+        return max(1, min(5, int(value)))
+    except (TypeError, ValueError):
+        return 3
+
+
+def _build_subjects(plans: List[Any]) -> Tuple[List[_Subject], int]:
+    subjects: List[_Subject] = []
+    skipped = 0
+    for plan in plans:
+        if not isinstance(plan, dict) or not isinstance(plan.get("tasks"), list):
+            skipped += 1
+            continue
+        deadline = _parse_datetime(plan.get("deadline"))
+        if deadline is None:
+            skipped += 1
+            continue
+
+        tasks = [t for t in plan["tasks"] if isinstance(t, dict)]
+        tasks.sort(key=lambda t: t.get("priority") if isinstance(t.get("priority"), int) else 0)
+
+        subject = _Subject(
+            name=str(plan.get("subject_name/project_name") or plan.get("name") or "Untitled"),
+            difficulty=_clamp_difficulty(plan.get("difficulty")),
+            deadline=deadline,
+            cutoff=deadline - DEADLINE_BUFFER,
+        )
+        for task in tasks:
+            minutes = _to_minutes(task.get("estimated_hours"))
+            if minutes:
+                subject.pieces.append(_Piece(str(task.get("task_name") or "Study"), minutes))
+        if subject.pieces:
+            subjects.append(subject)
+    return subjects, skipped
+
+
+def _pack(subjects: List[_Subject], now: datetime, rules: SchedulingRules) -> List[_Block]:
+    """Fill days backwards from the latest cutoff, always extending the subject that can end latest."""
+    earliest = now + START_BUFFER
+    blocks: List[_Block] = []
+    pending = [s for s in subjects if s.pieces]
+    if not pending:
+        return blocks
+
+    day = max(s.cutoff for s in pending).date()
+    while pending and day >= earliest.date():
+        day_start = max(datetime.combine(day, rules.day_start), earliest)
+        cursor = datetime.combine(day, time()) + timedelta(minutes=rules.day_end_minutes)
+        used = 0
+
+        while pending and used < rules.daily_max_minutes:
+            # latest possible end for each subject; pick the latest, break ties by closer deadline
+            best: Optional[_Subject] = None
+            best_end: Optional[datetime] = None
+            for subject in pending:
+                end = min(cursor, subject.cutoff)
+                if best_end is None or end > best_end or (end == best_end and subject.deadline < best.deadline):
+                    best, best_end = subject, end
+            if best_end is None or best_end - day_start < timedelta(minutes=MIN_BLOCK_MINUTES):
+                break
+
+            piece = best.pieces[-1]
+            length = min(piece.minutes, MAX_BLOCK_MINUTES, rules.daily_max_minutes - used,
+                         int((best_end - day_start).total_seconds() // 60))
+            if length < min(piece.minutes, MIN_BLOCK_MINUTES):
+                break
+
+            start = best_end - timedelta(minutes=length)
+            blocks.append(_Block(start=start, end=best_end, subject=best, task_name=piece.task_name))
+            used += length
+            piece.minutes -= length
+            if piece.minutes == 0:
+                best.pieces.pop()
+            if not best.pieces:
+                pending.remove(best)
+            cursor = start - timedelta(minutes=rules.break_minutes)
+
+        day -= timedelta(days=1)
+    return blocks
+
+
+def _part_names(blocks: List[_Block]) -> Dict[int, str]:
+    """Tasks split over several blocks get "(part k)" suffixes in chronological order."""
+    counts: Dict[Tuple[str, str], int] = {}
+    for block in blocks:
+        key = (block.subject.name, block.task_name)
+        counts[key] = counts.get(key, 0) + 1
+
+    seen: Dict[Tuple[str, str], int] = {}
+    names: Dict[int, str] = {}
+    for block in sorted(blocks, key=lambda b: b.start):
+        key = (block.subject.name, block.task_name)
+        if counts[key] == 1:
+            names[id(block)] = block.task_name
+            continue
+        seen[key] = seen.get(key, 0) + 1
+        names[id(block)] = f"{block.task_name} (part {seen[key]})"
+    return names
+
+
+def _format_calendar(blocks: List[_Block], time_pressure: bool) -> List[Dict[str, Any]]:
+    names = _part_names(blocks)
+    by_day: Dict[date_type, List[_Block]] = {}
+    for block in blocks:
+        by_day.setdefault(block.start.date(), []).append(block)
+
+    calendar = []
+    for day in sorted(by_day):
+        day_blocks = sorted(by_day[day], key=lambda b: b.start)
+        ranking = sorted(day_blocks, key=lambda b: (b.subject.deadline, b.start))
+        priority = {id(b): rank for rank, b in enumerate(ranking, start=1)}
+
+        due = sorted({b.subject.name for b in day_blocks if b.subject.deadline.date() <= day + timedelta(days=1)})
+        notes = f"Deadline soon: {', '.join(due)}." if due else ""
+        if time_pressure:
+            notes = (notes + " Time pressure mode: extended study hours.").strip()
+
+        calendar.append({
+            "date": day.isoformat(),
+            "entries": [
+                {
+                    "time_allotted": f"{b.start:%H:%M}–{'24:00' if b.end.date() > day else format(b.end, '%H:%M')}",
+                    "task_name": names[id(b)],
+                    "subject_name/project_name": b.subject.name,
+                    "difficulty": b.subject.difficulty,
+                    "priority": priority[id(b)],
+                }
+                for b in day_blocks
+            ],
+            "notes": notes,
+        })
+    return calendar
+
+
+def merge_plans_locally(plans: List[Any], date: Any) -> LocalMergeResult:
+    now = _parse_datetime(date) or datetime.now()
+
+    subjects, skipped = _build_subjects(plans)
+    total = sum(s.remaining_minutes for s in subjects)
+
+    blocks = _pack(subjects, now, NORMAL_RULES)
+    time_pressure = any(s.pieces for s in subjects)
+    if time_pressure:
+        subjects, _ = _build_subjects(plans)
+        blocks = _pack(subjects, now, TIME_PRESSURE_RULES)
+    unscheduled = sum(s.remaining_minutes for s in subjects)
+
+    summary = (
+        f"Locally merged schedule: {(total - unscheduled) / 60:g} study hours across "
+        f"{len(subjects)} subject(s), placed as close to each deadline as the rules allow."
+    )
+    if unscheduled:
+        summary += f" {unscheduled / 60:g} hour(s) could not fit before their deadlines."
+    if skipped:
+        summary += f" {skipped} agent plan(s) were unusable and skipped."
+
+    calendar = {"summary": summary, "calendar": _format_calendar(blocks, time_pressure)}
+    return LocalMergeResult(calendar, skipped, unscheduled)
@@ -0,0 +1,261 @@
+"""
+Turns noisy LLM answers into validated agent outputs.
+
+extract_json() finds the outermost JSON object in a response (markdown fences, leading prose and
+trailing chatter are ignored) and repairs the usual defects in a single pass: trailing commas,
+smart quotes and answers cut off mid-array. The result is validated against typed models of the
+subject-plan and calendar schemas, so callers learn exactly which fields were wrong instead of
+discarding the whole answer.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
+
+from ai_system.utils.prompt_encoding import expand_aliases
+from ai_system.utils.telemetry import note_parse
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "‘": "'", "’": "'"})
+_CLOSERS = {"{": "}", "[": "]"}
+MAX_CANDIDATES = 8  # '{' positions tried before giving up on a response
+
+
+def _scan(text: str, start: int) -> Tuple[str, bool]:
+    """
+    Copy the JSON value opening at text[start] ('{'), dropping trailing commas. Returns
+    (json_text, repaired); a value that is cut off is closed at its last complete element.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    safe: Optional[Tuple[int, List[str]]] = None  # (len(out), stack) right before the last comma
+    in_string = escaped = repaired = False
+
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            elif ch == "\n":
+                out[-1] = "\\n"  # raw newline inside a string
+                repaired = True
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+        elif ch in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+                repaired = True
+            if not stack or stack[-1] != ch:
+                break  # unbalanced: keep what we have and close it below
+            stack.pop()
+            out.append(ch)
+            if not stack:
+                return "".join(out), repaired
+            continue
+        elif ch == ",":
+            safe = (len(out), list(stack))
+        out.append(ch)
+
+    # truncated answer: close the open string, then the open containers
+    repaired = True
+    candidate = "".join(out) + ('"' if in_string else "")
+    closed = candidate.rstrip().rstrip(",") + "".join(reversed(stack))
+    if safe is None or (not in_string and _loads(closed) is not None):
+        return closed, repaired  # a string cut mid-way is a partial value: fall back to the last comma
+    length, safe_stack = safe
+    return "".join(out[:length]) + "".join(reversed(safe_stack)), repaired
+
+
+def _loads(text: str) -> Optional[Any]:
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+
+def extract_json(text: Any) -> Tuple[Optional[Any], bool]:
+    """Returns (value, repaired); value is None when no JSON object could be recovered."""
+    if isinstance(text, (dict, list)):
+        return text, False
+    if not isinstance(text, str):
+        return None, False
+
+    stripped = text.strip()
+    value = _loads(stripped)
+    if isinstance(value, dict):
+        return value, False
+
+    sources = [m.group(1) for m in _FENCE.finditer(stripped) if "{" in m.group(1)] + [stripped]
+    smart = stripped.translate(_SMART_QUOTES)
+    if smart != stripped:
+        sources.append(smart)
+
+    for source in sources:
+        start = source.find("{")
+        for _ in range(MAX_CANDIDATES):
+            if start < 0:
+                break
+            candidate, _ = _scan(source, start)
+            value = _loads(candidate)
+            if isinstance(value, dict):
+                return value, True
+            start = source.find("{", start + 1)
+    return None, False
+
+
+# ---------------------------------------------------------------- typed schemas
+
+class PlanTask(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    task_name: str
+    estimated_hours: float = Field(ge=0)
+    priority: int = Field(ge=1)
+
+
+class SubjectPlan(BaseModel):
+    model_config = ConfigDict(extra="allow", populate_by_name=True)
+
+    summary: str = ""
+    subject_name: str = Field(alias="subject_name/project_name")
+    total_estimated_hours: Optional[float] = Field(default=None, ge=0)
+    difficulty: int = Field(ge=1, le=5)
+    tasks: List[PlanTask]
+    deadline: str
+
+
+class CalendarEntry(BaseModel):
+    model_config = ConfigDict(extra="allow", populate_by_name=True)
+
+    time_allotted: str = Field(pattern=r"^\d{1,2}:\d{2}\s*[–-]\s*\d{1,2}:\d{2}$")
+    task_name: str
+    subject_name: str = Field(alias="subject_name/project_name")
+    difficulty: int = Field(ge=1, le=5)
+    priority: int = Field(ge=1)
+
+
+class CalendarDay(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    date: str = Field(pattern=r"^\d{4}-\d{2}-\d{2}$")
+    entries: List[CalendarEntry]
+    notes: str = ""
+
+
+class CalendarPlan(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    summary: str = ""
+    calendar: List[CalendarDay]
+
+
+# built once at import so validation doesn't rebuild the core schema per call
+_SUBJECT_PLAN = TypeAdapter(SubjectPlan)
+_CALENDAR_PLAN = TypeAdapter(CalendarPlan)
+
+
+@dataclass
+class ParsedOutput:
+    raw: Any
+    data: Optional[Dict[str, Any]] = None
+    errors: List[str] = field(default_factory=list)
+    repaired: bool = False
+
+    @property
+    def valid(self) -> bool:
+        return self.data is not None and not self.errors
+
+    def as_agent_result(self) -> Dict[str, Any]:
+        """
+        The dict agents return: the validated (type-coerced) object, the extracted object plus a
+        "validation_errors" list when some fields are wrong, or {"raw_response": ...} if nothing
+        could be recovered.
+        """
+        if self.data is None:
+            return {"raw_response": self.raw}
+        if self.errors:
+            return {**self.data, "validation_errors": self.errors}
+        return self.data
+
+
+def _format_errors(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in e['loc']) or '<root>'}: {e['msg']}"
+        for e in error.errors(include_url=False)
+    ]
+
+
+def _parse(response: Any, adapter: TypeAdapter, label: str) -> ParsedOutput:
+    parsed = _validate(response, adapter, label)
+    note_parse(parsed.valid, parsed.repaired)  # telemetry of the call that produced the response
+    return parsed
+
+
+def _validate(response: Any, adapter: TypeAdapter, label: str) -> ParsedOutput:
+    value, repaired = extract_json(response)
+    if value is None:
+        print(f"[output_parsing] No JSON object found in {label} response")
+        return ParsedOutput(raw=response)
+    value = expand_aliases(value)  # compact prompts ask for short keys
+    try:
+        model = adapter.validate_python(value)
+    except ValidationError as e:
+        errors = _format_errors(e)
+        print(f"[output_parsing] {label} failed validation: {'; '.join(errors)}")
+        return ParsedOutput(raw=response, data=value, errors=errors, repaired=repaired)
+    return ParsedOutput(raw=response, data=model.model_dump(by_alias=True, exclude_unset=True), repaired=repaired)
+
+
+def parse_subject_plan(response: Any) -> ParsedOutput:
+    return _parse(response, _SUBJECT_PLAN, "subject plan")
+
+
+def parse_subject_plan_batch(response: Any, subjects: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Split a {"plans": [...]} batch answer back into one validated plan per subject (input order).
+    Plans are matched by position when the count is right, otherwise by subject name; a subject
+    whose plan is missing or invalid gets None so the caller can re-plan it on its own.
+    """
+    value, repaired = extract_json(response)
+    plans = value.get("plans") if isinstance(value, dict) else None
+    if plans is None and isinstance(response, str):
+        plans = _loads(response.strip())  # bare top-level array
+    if not isinstance(plans, list):
+        print("[output_parsing] No plans array found in batch response")
+        note_parse(False, repaired)
+        return [None] * len(subjects)
+
+    plans = [expand_aliases(p) for p in plans if isinstance(p, dict)]
+    if len(plans) != len(subjects):
+        by_name = {str(p.get("subject_name/project_name", "")).strip().lower(): p for p in plans}
+        plans = [by_name.get(str(s.get("subject_name/project_name", "")).strip().lower()) for s in subjects]
+
+    results: List[Optional[Dict[str, Any]]] = []
+    for index, plan in enumerate(plans):
+        if plan is None:
+            results.append(None)
+            continue
+        try:
+            results.append(_SUBJECT_PLAN.validate_python(plan).model_dump(by_alias=True, exclude_unset=True))
+        except ValidationError as e:
+            print(f"[output_parsing] batch plan {index} failed validation: {'; '.join(_format_errors(e))}")
+            results.append(None)
+    note_parse(all(r is not None for r in results), repaired)  # partial batches count as a parse failure
+    return results
+
+
+def parse_calendar(response: Any) -> ParsedOutput:
+    return _parse(response, _CALENDAR_PLAN, "calendar")
@@ -0,0 +1,188 @@
+"""
+Persistent per-subject plan results for incremental replanning.
+
+Each subject plan is stored with a fingerprint of everything that feeds its prompt (the subject's
+fields, the agent it routes to and the prompt templates). On the next generation only subjects
+whose fingerprint changed are sent to the agents again. The merged calendar is stored too, keyed
+by the set of subject fingerprints, the merge mode and "today", together with the id of the
+generation of plans it was persisted as; it is returned as-is when none of those moved, so the
+caller can keep that generation instead of storing the same calendar again.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+DEFAULT_STORE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "subject_plans.db")
+)
+
+# the subject fields propose_plan puts in the prompt
+FINGERPRINT_FIELDS = (
+    "title", "subject_name/project_name", "start_datetime", "end_datetime",
+    "type", "difficulty", "description", "status",
+)
+
+
+def subject_fingerprint(task: Mapping[str, Any], *context: Any) -> str:
+    """Hash of the prompt-relevant subject fields plus anything else that changes the plan (route, templates)."""
+    payload = [task.get(name) for name in FINGERPRINT_FIELDS] + list(context)
+    return hashlib.sha256(json.dumps(payload, default=str).encode("utf-8")).hexdigest()
+
+
+def generation_fingerprint(subject_fingerprints: Iterable[str], *context: Any) -> str:
+    payload = sorted(subject_fingerprints) + [str(c) for c in context]
+    return hashlib.sha256("\x00".join(payload).encode("utf-8")).hexdigest()
+
+
+def is_reusable_plan(plan: Any) -> bool:
+    """Only clean agent output is worth keeping; failed or partially invalid plans are re-run."""
+    return (
+        isinstance(plan, dict)
+        and isinstance(plan.get("tasks"), list)
+        and "validation_errors" not in plan
+        and "raw_response" not in plan
+    )
+
+
+class PlanStore:
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS subject_plans ("
+            " user_id TEXT NOT NULL,"
+            " subject_key TEXT NOT NULL,"
+            " fingerprint TEXT NOT NULL,"
+            " plan TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (user_id, subject_key))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS generations ("
+            " user_id TEXT PRIMARY KEY,"
+            " fingerprint TEXT NOT NULL,"
+            " final_plan TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " generation_id TEXT)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(generations)")]
+        if "generation_id" not in columns:  # store created before generation ids were recorded
+            self._conn.execute("ALTER TABLE generations ADD COLUMN generation_id TEXT")
+        # plans shared across users for near-duplicate subjects (similar_plans.py)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS shared_plans ("
+            " bucket TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " source TEXT NOT NULL,"
+            " plan TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS shared_plans_bucket ON shared_plans (bucket)")
+
+    def get_subject_plans(self, user_id: Any) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """subject_key -> (fingerprint, plan)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT subject_key, fingerprint, plan FROM subject_plans WHERE user_id = ?", (str(user_id),)
+            ).fetchall()
+        return {key: (fingerprint, json.loads(plan)) for key, fingerprint, plan in rows}
+
+    def save_subject_plans(self, user_id: Any, plans: List[Tuple[str, str, Dict[str, Any]]],
+                           keep_keys: Optional[Iterable[str]] = None) -> None:
+        """
+        Upsert (subject_key, fingerprint, plan) rows; if keep_keys is given, rows for any other
+        subject of this user (deleted or completed subjects) are dropped.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO subject_plans (user_id, subject_key, fingerprint, plan, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [(str(user_id), key, fingerprint, json.dumps(plan), now) for key, fingerprint, plan in plans],
+                )
+                if keep_keys is not None:
+                    keep = set(keep_keys)
+                    stored = self._conn.execute(
+                        "SELECT subject_key FROM subject_plans WHERE user_id = ?", (str(user_id),)
+                    ).fetchall()
+                    self._conn.executemany(
+                        "DELETE FROM subject_plans WHERE user_id = ? AND subject_key = ?",
+                        [(str(user_id), key) for (key,) in stored if key not in keep],
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get_generation(self, user_id: Any, fingerprint: str) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+        """(final plan, generation id it was persisted as, None if not recorded yet)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT final_plan, generation_id FROM generations WHERE user_id = ? AND fingerprint = ?",
+                (str(user_id), fingerprint),
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def save_generation(self, user_id: Any, fingerprint: str, final_plan: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO generations (user_id, fingerprint, final_plan, updated_at) VALUES (?, ?, ?, ?)",
+                (str(user_id), fingerprint, json.dumps(final_plan), time.time()),
+            )
+
+    def set_generation_id(self, user_id: Any, fingerprint: str, generation_id: str) -> None:
+        """Record the generation a saved calendar was persisted as (no-op if it was replaced since)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE generations SET generation_id = ? WHERE user_id = ? AND fingerprint = ?",
+                (generation_id, str(user_id), fingerprint),
+            )
+
+    def get_shared_plans(self, bucket: str) -> List[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+        """(normalized subject text, source subject, plan) rows of a similarity bucket, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT text, source, plan FROM shared_plans WHERE bucket = ? ORDER BY rowid", (bucket,)
+            ).fetchall()
+        return [(text, json.loads(source), json.loads(plan)) for text, source, plan in rows]
+
+    def add_shared_plan(self, bucket: str, text: str, source: Dict[str, Any], plan: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO shared_plans (bucket, text, source, plan, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (bucket, text, json.dumps(source), json.dumps(plan), time.time()),
+            )
+
+    def clear_user(self, user_id: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM subject_plans WHERE user_id = ?", (str(user_id),))
+            self._conn.execute("DELETE FROM generations WHERE user_id = ?", (str(user_id),))
+
+
+_store: Optional[PlanStore] = None
+_store_lock = threading.Lock()
+
+
+def get_plan_store() -> Optional[PlanStore]:
+    """
+    Process-wide store configured on first use: INCREMENTAL_PLANNING (default 1), PLAN_STORE_PATH.
+    Returns None when incremental planning is disabled.
+    """
+    global _store
+    if os.getenv("INCREMENTAL_PLANNING", "1") not in ("1", "true", "True"):
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PlanStore(os.getenv("PLAN_STORE_PATH", DEFAULT_STORE_PATH))
+    return _store
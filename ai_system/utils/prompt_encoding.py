@@ -0,0 +1,170 @@
+"""
+Compact encodings of agent outputs and schedules for the calendar/feedback prompts.
+
+The prompts used to interpolate Python reprs: quote- and whitespace-heavy, with the long
+"subject_name/project_name" key on every entry and each agent's summary prose. Here the data is
+sent as minified JSON with short key aliases ("json", the default) or as a pipe-separated table
+("table"); fields the merge step does not use are dropped. The calendar output format asks for the
+same aliases, and expand_aliases() restores the full keys when the answer is parsed.
+
+PROMPT_ENCODING=repr keeps the legacy behaviour.
+"""
+import json
+import os
+from typing import Any, List, Optional
+
+ENCODINGS = ("json", "table", "repr")
+DEFAULT_ENCODING = "json"
+
+KEY_ALIASES = {
+    "subject_name/project_name": "subject",
+    "time_allotted": "time",
+    "task_name": "task",
+    "estimated_hours": "hours",
+    "difficulty": "diff",
+    "priority": "prio",
+}
+ALIAS_KEYS = {alias: key for key, alias in KEY_ALIASES.items()}
+
+# agent-plan fields the calendar merge never looks at
+DROPPED_PLAN_FIELDS = {"summary", "total_estimated_hours", "validation_errors"}
+
+
+def get_prompt_encoding(encoding: Optional[str] = None) -> str:
+    encoding = (encoding or os.getenv("PROMPT_ENCODING", DEFAULT_ENCODING)).lower()
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unsupported prompt encoding: {encoding}")
+    return encoding
+
+
+def _minify(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _alias(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {KEY_ALIASES.get(k, k): _alias(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_alias(v) for v in value]
+    return value
+
+
+def expand_aliases(value: Any) -> Any:
+    """Inverse of the key aliasing; a full key already present wins over its alias."""
+    if isinstance(value, dict):
+        expanded = {}
+        for k, v in value.items():
+            key = ALIAS_KEYS.get(k, k)
+            if key in expanded and k != key:
+                continue
+            expanded[key] = expand_aliases(v)
+        return expanded
+    if isinstance(value, list):
+        return [expand_aliases(v) for v in value]
+    return value
+
+
+def _cell(value: Any, *separators: str) -> str:
+    text = " ".join(str("" if value is None else value).split())
+    for separator in ("|",) + separators:
+        text = text.replace(separator, "/")
+    return text
+
+
+def _number(value: Any) -> str:
+    return f"{value:g}" if isinstance(value, (int, float)) else _cell(value, ":", ";")
+
+
+def _slim_plan(plan: Any) -> Any:
+    if not isinstance(plan, dict):
+        return plan
+    slim = {k: v for k, v in plan.items() if k not in DROPPED_PLAN_FIELDS}
+    if isinstance(slim.get("tasks"), list):
+        slim["tasks"] = [
+            {k: t.get(k) for k in ("task_name", "estimated_hours", "priority")} if isinstance(t, dict) else t
+            for t in slim["tasks"]
+        ]
+    return slim
+
+
+def encode_plans(plans: List[Any], encoding: Optional[str] = None) -> str:
+    """Agent plans for the calendar prompt."""
+    encoding = get_prompt_encoding(encoding)
+    if encoding == "repr":
+        return f"{plans}"
+
+    slim = [_slim_plan(p) for p in plans]
+    if encoding == "json":
+        return _minify(_alias(slim))
+
+    rows = ["subject|diff|deadline|tasks (task:hours:prio;...)"]
+    unparsed = []
+    for plan in slim:
+        if not isinstance(plan, dict) or not isinstance(plan.get("tasks"), list):
+            unparsed.append(plan)
+            continue
+        tasks = ";".join(
+            f"{_cell(t.get('task_name'), ':', ';')}:{_number(t.get('estimated_hours'))}:{_number(t.get('priority'))}"
+            for t in plan["tasks"] if isinstance(t, dict)
+        )
+        rows.append(
+            f"{_cell(plan.get('subject_name/project_name'))}|{_number(plan.get('difficulty'))}|"
+            f"{_cell(plan.get('deadline'))}|{tasks}"
+        )
+    if unparsed:
+        rows.append(f"unparsed:{_minify(unparsed)}")
+    return "\n".join(rows)
+
+
+def encode_schedule(schedule: Any, encoding: Optional[str] = None) -> str:
+    """A {"calendar": [...]} schedule for the feedback prompt (notes and summary are dropped)."""
+    encoding = get_prompt_encoding(encoding)
+    if encoding == "repr" or not isinstance(schedule, dict):
+        return f"{schedule}"
+
+    days = [d for d in schedule.get("calendar") or [] if isinstance(d, dict)]
+    if encoding == "json":
+        return _minify(_alias({"calendar": [{"date": d.get("date"), "entries": d.get("entries", [])} for d in days]}))
+
+    rows = ["date|time|subject|task|diff|prio"]
+    for day in days:
+        for entry in day.get("entries") or []:
+            rows.append("|".join([
+                _cell(day.get("date")),
+                _cell(entry.get("time_allotted")),
+                _cell(entry.get("subject_name/project_name")),
+                _cell(entry.get("task_name")),
+                _number(entry.get("difficulty")),
+                _number(entry.get("priority")),
+            ]))
+    return "\n".join(rows)
+
+
+def encode_value(value: Any, encoding: Optional[str] = None) -> str:
+    """Small free-form inputs (feedback) - minified unless the legacy encoding is selected."""
+    return f"{value}" if get_prompt_encoding(encoding) == "repr" else _minify(value)
+
+
+def calendar_output_format(encoding: Optional[str] = None) -> str:
+    """The JSON skeleton the calendar/feedback prompts ask for (aliased keys unless "repr")."""
+    key = (lambda k: k) if get_prompt_encoding(encoding) == "repr" else (lambda k: KEY_ALIASES.get(k, k))
+    return (
+        "{\n"
+        '  "summary": "<one-sentence overview of the overall schedule>",\n'
+        '  "calendar": [\n'
+        "    {\n"
+        '      "date": "YYYY-MM-DD",\n'
+        '      "entries": [\n'
+        "        {\n"
+        f'          "{key("time_allotted")}": "HH:MM–HH:MM",\n'
+        f'          "{key("task_name")}": "<string>",\n'
+        f'          "{key("subject_name/project_name")}": "<string>",\n'
+        f'          "{key("difficulty")}": <integer 1-5>,\n'
+        f'          "{key("priority")}": <integer starting from 1>\n'
+        "        }\n"
+        "      ],\n"
+        '      "notes": "<optional short string>"\n'
+        "    }\n"
+        "  ]\n"
+        "}\n\n"
+    )
@@ -0,0 +1,138 @@
+"""
+Registry of the subject-plan prompts, compiled once at import.
+
+Each (task type, university type) template is a byte-stable static prefix (role, general
+heuristics, domain heuristics, few-shot example) followed by the per-task suffix (task data and
+expected output). Identical prefixes let the inference provider reuse its prefix/KV cache across
+subjects; prefix_hash identifies the prefix so cache reuse can be measured: every call made with
+a rendered prompt carries it in its telemetry record (GET /metrics/prompt-prefixes).
+"""
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+from ai_system.utils.custom_agent_prompts.custom_agents_prompts_cs import (
+    get_assignment_example_cs,
+    get_assignment_heuristics_cs,
+    get_practical_exam_example_cs,
+    get_practical_exam_heuristics_cs,
+    get_project_example_cs,
+    get_project_heuristics_cs,
+    get_written_exam_example_cs,
+    get_written_exam_heuristics_cs,
+)
+from ai_system.utils.custom_agent_prompts.custom_agents_prompts_general import (
+    get_batch_input_output_instructions,
+    get_general_heuristics_header,
+    get_input_output_instructions,
+    get_role_prompt,
+)
+from ai_system.utils.custom_agent_prompts.custom_agents_prompts_math import (
+    get_assignment_example_math,
+    get_assignment_heuristics_math,
+    get_practical_exam_example_math,
+    get_practical_exam_heuristics_math,
+    get_project_example_math,
+    get_project_heuristics_math,
+    get_written_exam_example_math,
+    get_written_exam_heuristics_math,
+)
+from ai_system.utils.telemetry import note_prompt_prefix
+
+SECTION_SEPARATOR = "\n\n"
+
+# (exam type, university type) -> (heuristics, few-shot example)
+_SOURCES: Dict[Tuple[str, str], Tuple[Callable[[], str], Callable[[], str]]] = {
+    ("practical", "Computer Science"): (get_practical_exam_heuristics_cs, get_practical_exam_example_cs),
+    ("practical", "Mathematics"): (get_practical_exam_heuristics_math, get_practical_exam_example_math),
+    ("written", "Computer Science"): (get_written_exam_heuristics_cs, get_written_exam_example_cs),
+    ("written", "Mathematics"): (get_written_exam_heuristics_math, get_written_exam_example_math),
+    ("project", "Computer Science"): (get_project_heuristics_cs, get_project_example_cs),
+    ("project", "Mathematics"): (get_project_heuristics_math, get_project_example_math),
+    ("assignment", "Computer Science"): (get_assignment_heuristics_cs, get_assignment_example_cs),
+    ("assignment", "Mathematics"): (get_assignment_heuristics_math, get_assignment_example_math),
+}
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    task_type: str
+    university_type: str
+    prefix: str
+    prefix_hash: str
+
+    def suffix(self, task: Mapping[str, Any]) -> str:
+        return get_input_output_instructions(
+            task["title"],
+            task["subject_name/project_name"],
+            task["start_datetime"],
+            task["end_datetime"],
+            task["type"],
+            task["difficulty"],
+            task["description"],
+            task["status"],
+        )
+
+    def render(self, task: Mapping[str, Any]) -> str:
+        _record_render(self)
+        return self.prefix + self.suffix(task)
+
+    def render_batch(self, tasks: List[Mapping[str, Any]]) -> str:
+        """Same static prefix, then every task's data and a {"plans": [...]} output contract."""
+        _record_render(self)
+        return self.prefix + get_batch_input_output_instructions(tasks, self.task_type)
+
+
+def _compile(task_type: str, university_type: str) -> PromptTemplate:
+    heuristics, example = _SOURCES[(task_type, university_type)]
+    sections = [get_role_prompt(task_type, university_type), get_general_heuristics_header(), heuristics(), example()]
+    prefix = SECTION_SEPARATOR.join(sections) + SECTION_SEPARATOR
+    return PromptTemplate(
+        task_type=task_type,
+        university_type=university_type,
+        prefix=prefix,
+        prefix_hash=hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16],
+    )
+
+
+TEMPLATES: Dict[Tuple[str, str], PromptTemplate] = {key: _compile(*key) for key in _SOURCES}
+
+_renders: Dict[str, int] = {}
+_renders_lock = threading.Lock()
+
+
+def _record_render(template: PromptTemplate) -> None:
+    with _renders_lock:
+        _renders[template.prefix_hash] = _renders.get(template.prefix_hash, 0) + 1
+    note_prompt_prefix(template.prefix_hash)
+
+
+def get_plan_template(task_type: str, university_type: str) -> PromptTemplate:
+    template = TEMPLATES.get((task_type, university_type))
+    if template is None:
+        raise ValueError(f"Unsupported combination: {task_type} + {university_type}")
+    return template
+
+
+def prefix_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Renders per prefix hash. Every render after the first of a prefix can be served from the
+    provider's prefix cache, so reuse_ratio is an upper bound on the prefix-cache hit rate.
+    """
+    with _renders_lock:
+        renders = dict(_renders)
+    return {
+        t.prefix_hash: {
+            "task_type": t.task_type,
+            "university_type": t.university_type,
+            "prefix_chars": len(t.prefix),
+            "renders": renders.get(t.prefix_hash, 0),
+            "reuse_ratio": round(max(0, renders.get(t.prefix_hash, 0) - 1) / max(1, renders.get(t.prefix_hash, 0)), 3),
+        }
+        for t in TEMPLATES.values()
+    }
+
+
+# changes whenever any template prefix changes, so stored plans from older prompts are not reused
+REGISTRY_HASH = hashlib.sha256("".join(sorted(t.prefix_hash for t in TEMPLATES.values())).encode("utf-8")).hexdigest()[:16]
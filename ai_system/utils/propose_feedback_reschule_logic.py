@@ -1,7 +1,8 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 
 from ai_system.utils.feedback_generator_prompts.feedback_instructions import generate_feedback_instructions
-from ai_system.utils.get_response import make_llm_call
+from ai_system.utils.get_response import make_llm_call, amake_llm_call
+from ai_system.utils.response_cache import normalize_date
 
 
 def propose_feedback_reschedule(
@@ -9,7 +10,22 @@ def propose_feedback_reschedule(
         client: Any,
         last_feedback: Dict[str, Any],
         last_schedule: Dict[str, Any],
-        current_feedback: Dict[str, Any]
+        current_feedback: Dict[str, Any],
+        window: Optional[Tuple[str, str]] = None,
 ) -> str:
-    prompt = generate_feedback_instructions(last_feedback, last_schedule, current_feedback, date)
+    prompt = generate_feedback_instructions(last_feedback, last_schedule, current_feedback, normalize_date(date),
+                                            window)
     return make_llm_call(client, prompt, client.model)
+
+
+async def apropose_feedback_reschedule(
+        date,
+        client: Any,
+        last_feedback: Dict[str, Any],
+        last_schedule: Dict[str, Any],
+        current_feedback: Dict[str, Any],
+        window: Optional[Tuple[str, str]] = None,
+) -> str:
+    prompt = generate_feedback_instructions(last_feedback, last_schedule, current_feedback, normalize_date(date),
+                                            window)
+    return await amake_llm_call(client, prompt, client.model)
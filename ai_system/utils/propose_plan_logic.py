@@ -1,92 +1,47 @@
 from ai_system.utils.calendar_generator_prompts.calendar_instructions import generate_calendar_instructions
-from ai_system.utils.custom_agent_prompts.custom_agents_prompts_cs import (
-    get_practical_exam_heuristics_cs,
-    get_practical_exam_example_cs,
-    get_written_exam_heuristics_cs,
-    get_written_exam_example_cs, get_project_heuristics_cs, get_project_example_cs, get_assignment_heuristics_cs,
-    get_assignment_example_cs,
-)
-from ai_system.utils.custom_agent_prompts.custom_agents_prompts_math import (
-    get_practical_exam_heuristics_math,
-    get_practical_exam_example_math,
-    get_written_exam_heuristics_math,
-    get_written_exam_example_math, get_project_heuristics_math, get_project_example_math,
-    get_assignment_heuristics_math, get_assignment_example_math,
-)
-from ai_system.utils.custom_agent_prompts.custom_agents_prompts_general import (
-    get_role_prompt,
-    get_general_heuristics_header,
-    get_input_output_instructions,
-)
-from ai_system.utils.get_response import make_llm_call
+from ai_system.utils.get_response import make_llm_call, amake_llm_call
+from ai_system.utils.prompt_templates import get_plan_template
+from ai_system.utils.response_cache import normalize_date
 
 
 def propose_plan(task, general_university_type, client):
-    title = task['title']
-    name = task['subject_name/project_name']
-    start_datetime = task['start_datetime']
-    end_datetime = task['end_datetime']
-    type_ = task['type']
-    difficulty = task['difficulty']
-    description = task['description']
-    status = task['status']
-
-    # Define a configuration map for all possible (exam type, university type) pairs
-    prompt_map = {
-        ("practical", "Computer Science"): (
-            get_practical_exam_heuristics_cs,
-            get_practical_exam_example_cs,
-        ),
-        ("practical", "Mathematics"): (
-            get_practical_exam_heuristics_math,
-            get_practical_exam_example_math,
-        ),
-        ("written", "Computer Science"): (
-            get_written_exam_heuristics_cs,
-            get_written_exam_example_cs,
-        ),
-        ("written", "Mathematics"): (
-            get_written_exam_heuristics_math,
-            get_written_exam_example_math,
-        ),
-        ("project", "Computer Science"): (
-            get_project_heuristics_cs,
-            get_project_example_cs,
-        ),
-        ("project", "Mathematics"): (
-            get_project_heuristics_math,
-            get_project_example_math,
-        ),
-        ("assignment", "Computer Science"): (
-            get_assignment_heuristics_cs,
-            get_assignment_example_cs,
-        ),
-        ("assignment", "Mathematics"): (
-            get_assignment_heuristics_math,
-            get_assignment_example_math,
-        ),
-    }
-
-    # Get the right functions for the given combination
-    heuristics_func, example_func = prompt_map.get((type_, general_university_type), (None, None))
-    if not heuristics_func:
-        raise ValueError(f"Unsupported combination: {type_} + {general_university_type}")
-
-    # Build the full prompt cleanly
-    parts = [
-        get_role_prompt(type_, general_university_type),
-        get_general_heuristics_header(),
-        heuristics_func(),
-        get_input_output_instructions(
-            title, name, start_datetime, end_datetime, type_, difficulty, description, status
-        ),
-        example_func(),
-    ]
-
-    full_prompt = "\n\n".join(parts)
+    full_prompt = build_plan_prompt(task, general_university_type)
     return make_llm_call(client, full_prompt, client.model)
 
 
+async def apropose_plan(task, general_university_type, client):
+    full_prompt = build_plan_prompt(task, general_university_type)
+    return await amake_llm_call(client, full_prompt, client.model)
+
+
+def propose_plan_batch(tasks, general_university_type, client):
+    full_prompt = build_plan_batch_prompt(tasks, general_university_type)
+    return make_llm_call(client, full_prompt, client.model)
+
+
+async def apropose_plan_batch(tasks, general_university_type, client):
+    full_prompt = build_plan_batch_prompt(tasks, general_university_type)
+    return await amake_llm_call(client, full_prompt, client.model)
+
+
+def build_plan_prompt(task, general_university_type):
+    # static (type, university) prefix compiled at import, then the task-specific suffix
+    return get_plan_template(task['type'], general_university_type).render(task)
+
+
+def build_plan_batch_prompt(tasks, general_university_type):
+    # all tasks of a batch share a type, hence one template and one copy of its heuristics
+    types = {task['type'] for task in tasks}
+    if len(types) != 1:
+        raise ValueError(f"A plan batch needs a single task type, got: {', '.join(sorted(map(str, types)))}")
+    return get_plan_template(types.pop(), general_university_type).render_batch(tasks)
+
+
 def propose_calendar(plans_array, date, client):
-    prompt = generate_calendar_instructions(plans_array,date)
+    prompt = generate_calendar_instructions(plans_array, normalize_date(date))
     return make_llm_call(client, prompt, client.model)
+
+
+async def apropose_calendar(plans_array, date, client):
+    prompt = generate_calendar_instructions(plans_array, normalize_date(date))
+    return await amake_llm_call(client, prompt, client.model)
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import random
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from ai_system.utils.key_pool import is_rate_limit_error
+
+# (response, error) as produced by one attempt in get_response
+AttemptResult = Tuple[Any, Optional[BaseException]]
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+def is_retryable_error(error: Optional[BaseException]) -> bool:
+    """Transient failures (rate limits, 5xx, timeouts, dropped connections) are worth another try."""
+    if error is None:
+        return False
+    if is_rate_limit_error(error):
+        return True
+    status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    name = type(error).__name__
+    return any(marker in name for marker in ("Timeout", "Overloaded", "Connect", "Network", "RemoteProtocol"))
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.5  # seconds
+    max_delay: float = 8.0
+    hedge_enabled: bool = False
+    hedge_percentile: float = 0.95  # fire the duplicate once a call is slower than this percentile
+    hedge_min_samples: int = 20  # latencies needed before the percentile is trusted
+    hedge_min_delay: float = 1.0
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter; attempt is 1 for the first retry."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per model."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: Optional[str], seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(model or "", deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model: Optional[str], q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(model or "", ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+latency_tracker = LatencyTracker()
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+_policy: Optional[RetryPolicy] = None
+
+
+def get_retry_policy() -> RetryPolicy:
+    """
+    Built once from the environment: LLM_MAX_ATTEMPTS, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY,
+    LLM_HEDGE_ENABLED, LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_SAMPLES, LLM_HEDGE_MIN_DELAY.
+    """
+    global _policy
+    if _policy is None:
+        _policy = RetryPolicy(
+            max_attempts=max(1, int(os.getenv("LLM_MAX_ATTEMPTS", RetryPolicy.max_attempts))),
+            base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", RetryPolicy.base_delay)),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", RetryPolicy.max_delay)),
+            hedge_enabled=os.getenv("LLM_HEDGE_ENABLED", "0") in ("1", "true", "True"),
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", RetryPolicy.hedge_percentile)),
+            hedge_min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", RetryPolicy.hedge_min_samples)),
+            hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", RetryPolicy.hedge_min_delay)),
+        )
+    return _policy
+
+
+def hedge_delay(policy: RetryPolicy, model: Optional[str]) -> Optional[float]:
+    if not policy.hedge_enabled:
+        return None
+    observed = latency_tracker.percentile(model, policy.hedge_percentile, policy.hedge_min_samples)
+    if observed is None:
+        return None
+    return max(policy.hedge_min_delay, observed)
+
+
+def run_hedged(call: Callable[[], AttemptResult], delay: Optional[float]) -> AttemptResult:
+    """
+    Run call(); if it has not answered after `delay` seconds, start an identical second call and
+    return the first successful result. The slower call is abandoned (its thread finishes on its own).
+    """
+    if delay is None:
+        return call()
+    first = _hedge_executor.submit(call)
+    done, _ = wait([first], timeout=delay)
+    if done:
+        return first.result()
+
+    pending = {first, _hedge_executor.submit(call)}
+    result: AttemptResult = (None, None)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            result = future.result()
+            if result[1] is None:
+                return result
+    return result
+
+
+async def arun_hedged(call: Callable[[], Awaitable[AttemptResult]], delay: Optional[float]) -> AttemptResult:
+    """asyncio variant of run_hedged; the losing call is cancelled."""
+    if delay is None:
+        return await call()
+    pending = {asyncio.ensure_future(call())}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return done.pop().result()
+
+        pending.add(asyncio.ensure_future(call()))
+        result: AttemptResult = (None, None)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                if result[1] is None:
+                    return result
+        return result
+    finally:
+        for task in pending:
+            task.cancel()
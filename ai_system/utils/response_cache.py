@@ -0,0 +1,299 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ai_system.utils.deadline import DeadlineExceeded, current_deadline
+
+DEFAULT_CACHE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "llm_responses.db")
+)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_DATE_GRANULARITY = "hour"
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default) in ("1", "true", "True")
+
+
+def normalize_date(date, granularity: Optional[str] = None):
+    """
+    Round the "current date" fed to the calendar/feedback prompts so that identical requests made
+    a few seconds apart produce byte-identical prompts (and therefore hit the response cache).
+
+    granularity: "day" | "hour" | "minute" | "none" (default: LLM_CACHE_DATE_GRANULARITY or "hour").
+    """
+    granularity = (granularity or os.getenv("LLM_CACHE_DATE_GRANULARITY", DEFAULT_DATE_GRANULARITY)).lower()
+    if not isinstance(date, datetime) or granularity == "none":
+        return date
+    if granularity == "day":
+        return date.date()
+    if granularity == "hour":
+        return date.replace(minute=0, second=0, microsecond=0)
+    if granularity == "minute":
+        return date.replace(second=0, microsecond=0)
+    raise ValueError(f"Unsupported date granularity: {granularity}")
+
+
+class _Flight:
+    """One in-progress upstream call that concurrent identical requests wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _AsyncFlight:
+    """
+    One in-progress upstream call run as its own task, so cancelling the caller that started it
+    doesn't cancel it for the others; it is cancelled once no caller is waiting any more.
+    """
+
+    def __init__(self, task: "asyncio.Task[str]"):
+        self.task = task
+        self.waiters = 0
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed cache of LLM responses.
+
+    Entries are keyed by sha256(model, temperature, prompt) and stored in a small SQLite file.
+    - size-based LRU eviction (max_bytes of stored responses, least recently read evicted first)
+    - TTL (entries older than ttl_seconds are treated as a miss and dropped)
+    - singleflight: concurrent identical requests share a single upstream call
+    """
+
+    def __init__(
+            self,
+            path: str = DEFAULT_CACHE_PATH,
+            max_bytes: int = DEFAULT_MAX_BYTES,
+            ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Flight] = {}
+        self._async_inflight: Dict[Tuple[int, str], _AsyncFlight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_last_access ON responses (last_access)")
+
+    @staticmethod
+    def make_key(model: Optional[str], prompt: str, temperature: float) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{model}\x00{temperature!r}\x00".encode("utf-8"))
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            return response
+
+    def put(self, key: str, model: Optional[str], response: str) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def get_or_call(
+            self,
+            model: Optional[str],
+            prompt: str,
+            temperature: float,
+            call: Callable[[], str],
+            should_store: Callable[[str], bool] = lambda response: True,
+    ) -> str:
+        key = self.make_key(model, prompt, temperature)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        # A follower whose leader ran out of time (the leader's deadline, not its own) calls again
+        # itself instead of failing with it.
+        while True:
+            with self._lock:
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._inflight[key] = _Flight()
+            if leader:
+                break
+
+            self.coalesced += 1
+            deadline = current_deadline()
+            if not flight.done.wait(deadline.remaining() if deadline is not None else None):
+                raise DeadlineExceeded(deadline.reason())
+            if isinstance(flight.error, DeadlineExceeded):
+                continue
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        self.misses += 1
+        try:
+            flight.value = call()
+            if should_store(flight.value):
+                self.put(key, model, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    async def aget_or_call(
+            self,
+            model: Optional[str],
+            prompt: str,
+            temperature: float,
+            call: Callable[[], Awaitable[str]],
+            should_store: Callable[[str], bool] = lambda response: True,
+    ) -> str:
+        key = self.make_key(model, prompt, temperature)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        while True:
+            flight = self._async_inflight.get(flight_key)
+            started = flight is None
+            if started:
+                task = loop.create_task(self._afill(key, model, call, should_store))
+                flight = self._async_inflight[flight_key] = _AsyncFlight(task)
+                task.add_done_callback(lambda done, f=flight: self._aflight_done(flight_key, f))
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+            flight.waiters += 1
+            try:
+                return await asyncio.shield(flight.task)
+            except asyncio.CancelledError:
+                if not flight.task.cancelled():
+                    raise  # this caller was cancelled, the call goes on for the others
+            except DeadlineExceeded:
+                if started:
+                    raise
+            finally:
+                flight.waiters -= 1
+                if not flight.waiters and not flight.task.done():
+                    flight.task.cancel()
+                    self._aflight_done(flight_key, flight)
+            # the call was dropped or ran out of the starting caller's time: call again ourselves
+
+    async def _afill(
+            self,
+            key: str,
+            model: Optional[str],
+            call: Callable[[], Awaitable[str]],
+            should_store: Callable[[str], bool],
+    ) -> str:
+        value = await call()
+        if should_store(value):
+            self.put(key, model, value)
+        return value
+
+    def _aflight_done(self, flight_key: Tuple[int, str], flight: _AsyncFlight) -> None:
+        if self._async_inflight.get(flight_key) is flight:
+            del self._async_inflight[flight_key]
+        if flight.task.done() and not flight.task.cancelled():
+            # waiters re-raise it; mark retrieved so a flight nobody waits on doesn't warn
+            flight.task.exception()
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Process-wide response cache, configured from the environment on first use:
+      LLM_CACHE_ENABLED (default 1), LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES, LLM_CACHE_TTL_SECONDS.
+    Returns None when caching is disabled.
+    """
+    global _cache
+    if not _env_flag("LLM_CACHE_ENABLED", "1"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                    max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                    ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+                )
+    return _cache
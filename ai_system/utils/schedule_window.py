@@ -0,0 +1,91 @@
+"""
+Windowed rescheduling: only the part of a schedule the FeedbackAgent may change is sent to it.
+
+Past days are frozen, the window covers today through a horizon (plus any later day the feedback
+names explicitly), and days after the window are kept as they are. The revised window is spliced
+back between the two, so prompt and answer size stay bounded however long the schedule grows.
+"""
+import re
+from dataclasses import dataclass, field
+from datetime import date as date_type, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+_ISO_DATE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+
+
+def _day(value: Any) -> Optional[str]:
+    if isinstance(value, (datetime, date_type)):
+        return value.isoformat()[:10]
+    if isinstance(value, str) and _ISO_DATE.match(value.strip()):
+        return value.strip()[:10]
+    return None
+
+
+def feedback_dates(*feedbacks: Any) -> Set[str]:
+    """ISO dates (YYYY-MM-DD) mentioned anywhere in the feedback payloads."""
+    found: Set[str] = set()
+    for feedback in feedbacks:
+        found.update(_ISO_DATE.findall(str(feedback or "")))
+    return found
+
+
+@dataclass
+class ScheduleWindow:
+    start: str  # first editable day (today)
+    end: str  # last editable day
+    past: List[Dict[str, Any]] = field(default_factory=list)
+    window: List[Dict[str, Any]] = field(default_factory=list)
+    later: List[Dict[str, Any]] = field(default_factory=list)
+
+    def contains(self, day: Optional[str]) -> bool:
+        return day is not None and self.start <= day <= self.end
+
+    def splice(self, revised: Any) -> Any:
+        """
+        Put the revised window back between the frozen past and the untouched later days. Days the
+        model returned outside the window are dropped; an unusable answer is returned unchanged.
+        """
+        if not isinstance(revised, dict) or not isinstance(revised.get("calendar"), list):
+            return revised
+
+        window_days = []
+        for day in revised["calendar"]:
+            if isinstance(day, dict) and self.contains(_day(day.get("date"))):
+                window_days.append(day)
+            else:
+                print(f"[ScheduleWindow] Dropping revised day outside {self.start}..{self.end}: "
+                      f"{day.get('date') if isinstance(day, dict) else day}")
+
+        calendar = sorted(self.past + window_days + self.later, key=lambda d: _day(d.get("date")) or "")
+        return {**revised, "calendar": calendar}
+
+
+def split_schedule(
+        schedule: Any,
+        today: Any,
+        horizon_days: int,
+        extra_days: Iterable[str] = (),
+) -> ScheduleWindow:
+    """
+    Split a {"calendar": [...]} schedule around today. The window runs from today through
+    today + horizon_days - 1, stretched to include any later day in extra_days (e.g. dates named in
+    the feedback); past extra days are ignored since past days are frozen.
+    """
+    start_date = today.date() if isinstance(today, datetime) else today
+    start = start_date.isoformat()
+    end = (start_date + timedelta(days=max(1, horizon_days) - 1)).isoformat()
+    end = max([end] + [d for d in extra_days if d >= start])
+
+    split = ScheduleWindow(start=start, end=end)
+    days = schedule.get("calendar") if isinstance(schedule, dict) else None
+    for day in days or []:
+        if not isinstance(day, dict):
+            continue
+        key = _day(day.get("date"))
+        if key is None or key < start:
+            split.past.append(day)
+        elif key <= end:
+            split.window.append(day)
+        else:
+            split.later.append(day)
+    return split
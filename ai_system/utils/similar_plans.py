@@ -0,0 +1,255 @@
+"""
+Near-duplicate subject plan reuse across students.
+
+Students of a cohort enter the same course with slightly different titles and descriptions
+("Algorithms and Programming" / "Algorithms & programming - exam"), so the exact fingerprints of
+the plan store and the response cache never match. SimilarPlanIndex keeps the plans the agents
+produced, keyed by a MinHash signature of the normalized subject text (character shingles of
+title, name and description), inside buckets of subjects that must match exactly: task type,
+difficulty, agent route and prompt templates. Banded LSH over the signatures finds candidates,
+the exact shingle Jaccard similarity decides, and a plan at or above the threshold is reused
+with its deadline, dates and subject name re-anchored to the new subject. No LLM call is made.
+
+Entries are persisted next to the plan store (when incremental planning is enabled) so the index
+survives restarts and is shared by the processes of a batch run on their first lookup per bucket.
+"""
+import copy
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from datetime import date as date_type, datetime
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+from ai_system.utils.plan_store import PlanStore, get_plan_store
+
+DEFAULT_THRESHOLD = 0.8  # Jaccard similarity of the subject text shingles
+DEFAULT_MAX_PER_BUCKET = 1000
+
+SHINGLE_SIZE = 4
+NUM_PERM = 64
+BANDS = 16  # 4 rows per band: pairs at Jaccard 0.6 become candidates ~89% of the time, at 0.8 ~100%
+_ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)  # fixed: signatures must be comparable across processes and restarts
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_WORD = re.compile(r"[a-z0-9]+")
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2})?)?$")
+
+
+def normalize_subject_text(task: Mapping[str, Any]) -> str:
+    """Lower-cased, accent-free words of the free-text subject fields."""
+    text = " ".join(str(task.get(name) or "") for name in ("subject_name/project_name", "title", "description"))
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_WORD.findall(text))
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> FrozenSet[str]:
+    if len(text) <= size:
+        return frozenset([text])
+    return frozenset(text[i:i + size] for i in range(len(text) - size + 1))
+
+
+def minhash(shingle_set: FrozenSet[str]) -> Tuple[int, ...]:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingle_set]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def subject_deadline(task: Mapping[str, Any]) -> Optional[str]:
+    """The deadline the plan prompt gives the agent: a project's end, otherwise its start."""
+    value = task.get("end_datetime") if task.get("type") == "project" else task.get("start_datetime")
+    return value.isoformat() if isinstance(value, (datetime, date_type)) else value
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    if not isinstance(value, str) or not _ISO_DATE.match(value):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _shift(value: str, delta) -> str:
+    parsed = _parse_datetime(value)
+    if parsed is None:
+        return value
+    shifted = parsed + delta
+    if len(value) == 10:
+        return shifted.date().isoformat()
+    return shifted.isoformat(sep=value[10], timespec="seconds" if value.count(":") == 2 else "minutes")
+
+
+def reanchor_plan(plan: Dict[str, Any], source: Mapping[str, Any], target: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Copy of a plan made for `source` (name, title, deadline) adjusted to the `target` subject:
+    its deadline and name, and any other ISO dates in its tasks moved by the same offset.
+    """
+    plan = copy.deepcopy(plan)
+    old_deadline, new_deadline = _parse_datetime(source.get("deadline")), _parse_datetime(target.get("deadline"))
+    plan["deadline"] = target.get("deadline")
+    plan["subject_name/project_name"] = target.get("name")
+
+    if old_deadline is not None and new_deadline is not None:
+        delta = new_deadline - old_deadline
+        for task in plan.get("tasks", []):
+            if isinstance(task, dict):
+                for key, value in task.items():
+                    if isinstance(value, str):
+                        task[key] = _shift(value, delta)
+
+    summary = plan.get("summary")
+    if isinstance(summary, str):
+        for field in ("name", "title"):
+            if source.get(field) and target.get(field):
+                summary = re.sub(rf"\b{re.escape(source[field])}\b", lambda _: target[field], summary)
+        plan["summary"] = summary
+    return plan
+
+
+@dataclass
+class _Entry:
+    shingles: FrozenSet[str]
+    source: Dict[str, Any]  # name, title, deadline of the subject the plan was made for
+    plan: Dict[str, Any]
+
+
+class _Bucket:
+    def __init__(self):
+        self.entries: List[_Entry] = []
+        self.bands: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+
+    def add(self, entry: _Entry, signature: Tuple[int, ...]) -> None:
+        position = len(self.entries)
+        self.entries.append(entry)
+        for band in range(BANDS):
+            self.bands.setdefault((band, signature[band * _ROWS:(band + 1) * _ROWS]), []).append(position)
+
+    def best(self, shingle_set: FrozenSet[str], signature: Tuple[int, ...]) -> Tuple[Optional[_Entry], float]:
+        candidates = set()
+        for band in range(BANDS):
+            candidates.update(self.bands.get((band, signature[band * _ROWS:(band + 1) * _ROWS]), ()))
+        best, best_score = None, 0.0
+        for position in candidates:
+            entry = self.entries[position]
+            score = jaccard(shingle_set, entry.shingles)
+            if score > best_score:
+                best, best_score = entry, score
+        return best, best_score
+
+
+class SimilarPlanIndex:
+    """Thread-safe; buckets are loaded from the store the first time they are used."""
+
+    def __init__(
+            self,
+            store: Optional[PlanStore] = None,
+            threshold: float = DEFAULT_THRESHOLD,
+            max_per_bucket: int = DEFAULT_MAX_PER_BUCKET,
+    ):
+        self.store = store
+        self.threshold = threshold
+        self.max_per_bucket = max_per_bucket
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "misses": 0, "added": 0, "similarity_sum": 0.0}
+
+    @staticmethod
+    def bucket_key(task: Mapping[str, Any], *context: Any) -> str:
+        payload = [task.get("type"), task.get("difficulty")] + [str(c) for c in context]
+        return hashlib.sha256(json.dumps(payload, default=str).encode("utf-8")).hexdigest()
+
+    def _bucket(self, key: str) -> _Bucket:
+        # caller holds the lock
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+            if self.store is not None:
+                for text, source, plan in self.store.get_shared_plans(key):
+                    shingle_set = shingles(text)
+                    bucket.add(_Entry(shingle_set, source, plan), minhash(shingle_set))
+        return bucket
+
+    def find(self, task: Mapping[str, Any], *context: Any) -> Optional[Dict[str, Any]]:
+        """A re-anchored plan of a near-duplicate subject, or None."""
+        target = {"name": task.get("subject_name/project_name"), "title": task.get("title"),
+                  "deadline": subject_deadline(task)}
+        shingle_set = shingles(normalize_subject_text(task))
+        signature = minhash(shingle_set)
+        with self._lock:
+            self._stats["lookups"] += 1
+            entry, score = self._bucket(self.bucket_key(task, *context)).best(shingle_set, signature)
+            # without a parseable deadline there is nothing to re-anchor the plan to
+            if entry is None or score < self.threshold or _parse_datetime(target["deadline"]) is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._stats["similarity_sum"] += score
+        return reanchor_plan(entry.plan, entry.source, target)
+
+    def add(self, task: Mapping[str, Any], plan: Dict[str, Any], *context: Any) -> bool:
+        """Index an agent-made plan unless the bucket is full or already has a near-duplicate."""
+        text = normalize_subject_text(task)
+        shingle_set = shingles(text)
+        signature = minhash(shingle_set)
+        source = {"name": task.get("subject_name/project_name"), "title": task.get("title"),
+                  "deadline": subject_deadline(task)}
+        key = self.bucket_key(task, *context)
+        with self._lock:
+            bucket = self._bucket(key)
+            if len(bucket.entries) >= self.max_per_bucket:
+                return False
+            _, score = bucket.best(shingle_set, signature)
+            if score >= self.threshold:
+                return False
+            bucket.add(_Entry(shingle_set, source, plan), signature)
+            self._stats["added"] += 1
+        if self.store is not None:
+            self.store.add_shared_plan(key, text, source, plan)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["buckets"] = len(self._buckets)
+            stats["entries"] = sum(len(b.entries) for b in self._buckets.values())
+        similarity_sum = stats.pop("similarity_sum")
+        stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 3) if stats["lookups"] else None
+        stats["mean_hit_similarity"] = round(similarity_sum / stats["hits"], 3) if stats["hits"] else None
+        stats["threshold"] = self.threshold
+        return stats
+
+
+_index: Optional[SimilarPlanIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_similar_plan_index() -> Optional[SimilarPlanIndex]:
+    """
+    Process-wide index built on first use: SIMILAR_PLAN_REUSE (default 0), SIMILAR_PLAN_THRESHOLD,
+    SIMILAR_PLAN_MAX_PER_BUCKET. Returns None when near-duplicate reuse is disabled.
+    """
+    global _index
+    if os.getenv("SIMILAR_PLAN_REUSE", "0") not in ("1", "true", "True"):
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SimilarPlanIndex(
+                    get_plan_store(),
+                    threshold=float(os.getenv("SIMILAR_PLAN_THRESHOLD", DEFAULT_THRESHOLD)),
+                    max_per_bucket=int(os.getenv("SIMILAR_PLAN_MAX_PER_BUCKET", DEFAULT_MAX_PER_BUCKET)),
+                )
+    return _index
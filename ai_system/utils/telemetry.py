@@ -0,0 +1,191 @@
+"""
+Per-call LLM telemetry.
+
+Every make_llm_call / amake_llm_call produces one LLMCallRecord: which agent made it and for what
+task type, the model, time spent waiting for a key lease (queue wait), time to first token (only
+when a response is streamed), total latency, prompt/completion tokens (reported usage, else an
+estimate), attempts, which method answered (chat vs text_generation, or the response cache),
+whether the agent could parse the answer and, for subject-plan prompts, the hash of the static
+template prefix (prompt_templates), so provider prefix-cache reuse can be followed per prefix.
+
+Callers open an llm_call_scope around agent calls so records know who made them; output_parsing
+reports the parse result against the last call made in the same thread / asyncio task. Records
+are kept in a bounded in-process registry (telemetry_registry) that can be listed and summarised
+per agent/model/task type. The registry also keeps named event counters (count()) for failures off
+the LLM call path, such as background heartbeats or pooled client shutdown.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence
+
+LLM_TELEMETRY_ENABLED = os.getenv("LLM_TELEMETRY_ENABLED", "1") in ("1", "true", "True")
+LLM_TELEMETRY_MAX_RECORDS = int(os.getenv("LLM_TELEMETRY_MAX_RECORDS", "5000"))
+
+GROUP_FIELDS = ("agent", "model", "task_type", "method", "outcome", "prefix_hash")
+
+
+@dataclass
+class LLMCallRecord:
+    started_at: float  # epoch seconds
+    model: Optional[str]
+    agent: Optional[str] = None
+    task_type: Optional[str] = None
+    subjects: int = 1  # subjects covered by the prompt (batched plans)
+    queue_wait_s: float = 0.0
+    ttft_s: Optional[float] = None
+    latency_s: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    attempts: int = 0  # 0 = answered from the response cache
+    method: Optional[str] = None  # chat | text_generation | cache
+    outcome: str = "ok"  # ok | failed
+    error: Optional[str] = None
+    parsed: Optional[bool] = None  # None until the agent parsed the answer
+    repaired: Optional[bool] = None
+    prefix_hash: Optional[str] = None  # static prefix of the subject-plan template the prompt used
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "retries": self.retries}
+
+
+@dataclass(frozen=True)
+class CallScope:
+    agent: str
+    task_type: Optional[str] = None
+    subjects: int = 1
+
+
+_scope: ContextVar[Optional[CallScope]] = ContextVar("llm_call_scope", default=None)
+# the call whose response the code running in this context is about to parse
+_last_call: ContextVar[Optional[LLMCallRecord]] = ContextVar("llm_last_call", default=None)
+# prefix hash of the prompt rendered in this context and not yet sent
+_prompt_prefix: ContextVar[Optional[str]] = ContextVar("llm_prompt_prefix", default=None)
+
+
+@contextmanager
+def llm_call_scope(agent: str, task_type: Optional[str] = None, subjects: int = 1) -> Iterator[CallScope]:
+    """Attribute the LLM calls made inside the block (same thread / same asyncio task) to an agent."""
+    scope = CallScope(agent=agent, task_type=task_type, subjects=subjects)
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+def start_call(model: Optional[str], prompt_tokens: int) -> LLMCallRecord:
+    scope = _scope.get()
+    record = LLMCallRecord(started_at=time.time(), model=model, prompt_tokens=prompt_tokens)
+    if scope is not None:
+        record.agent, record.task_type, record.subjects = scope.agent, scope.task_type, scope.subjects
+    record.prefix_hash = _prompt_prefix.get()
+    _prompt_prefix.set(None)
+    _last_call.set(record)
+    return record
+
+
+def note_prompt_prefix(prefix_hash: str) -> None:
+    """Attach a template prefix hash to the next call started in this thread / asyncio task."""
+    _prompt_prefix.set(prefix_hash)
+
+
+def note_parse(valid: bool, repaired: bool = False) -> None:
+    """Attach a parse result to the last call made in this thread / asyncio task."""
+    record = _last_call.get()
+    if record is not None and record.parsed is None:
+        record.parsed, record.repaired = valid, repaired
+
+
+def _percentile(ordered: Sequence[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+
+class TelemetryRegistry:
+    """Bounded ring of the most recent call records."""
+
+    def __init__(self, max_records: int = LLM_TELEMETRY_MAX_RECORDS):
+        self._records: Deque[LLMCallRecord] = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self.total_recorded = 0
+        self._counters: Dict[str, int] = {}
+
+    def record(self, record: LLMCallRecord) -> None:
+        with self._lock:
+            self._records.append(record)
+            self.total_recorded += 1
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def counters(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self._counters.clear()
+            self.total_recorded = 0
+
+    def records(self, since: Optional[float] = None, limit: Optional[int] = None,
+                **filters: Optional[str]) -> List[LLMCallRecord]:
+        """Most recent first; filters match record fields exactly (agent="CSAgent", ...)."""
+        with self._lock:
+            records = list(self._records)
+        selected = [
+            r for r in reversed(records)
+            if (since is None or r.started_at >= since)
+            and all(value is None or getattr(r, name) == value for name, value in filters.items())
+        ]
+        return selected[:limit] if limit is not None else selected
+
+    def summary(self, group_by: Iterable[str] = ("agent", "model", "task_type"),
+                since: Optional[float] = None) -> List[Dict[str, Any]]:
+        group_by = tuple(g for g in group_by if g in GROUP_FIELDS)
+        groups: Dict[tuple, List[LLMCallRecord]] = {}
+        for record in self.records(since=since):
+            groups.setdefault(tuple(getattr(record, g) for g in group_by), []).append(record)
+
+        rows = []
+        for key, records in groups.items():
+            latencies = sorted(r.latency_s for r in records)
+            upstream = [r for r in records if r.attempts > 0]
+            parsed = [r for r in records if r.parsed is not None]
+            rows.append({
+                **dict(zip(group_by, key)),
+                "calls": len(records),
+                "failed": sum(r.outcome != "ok" for r in records),
+                "cache_hits": len(records) - len(upstream),
+                "retries": sum(r.retries for r in records),
+                "text_generation_fallbacks": sum(r.method == "text_generation" for r in records),
+                "latency_p50_s": _percentile(latencies, 0.50),
+                "latency_p95_s": _percentile(latencies, 0.95),
+                "latency_total_s": round(sum(latencies), 3),
+                "queue_wait_avg_s": round(sum(r.queue_wait_s for r in upstream) / len(upstream), 4) if upstream else None,
+                "prompt_tokens": sum(r.prompt_tokens for r in records),
+                "completion_tokens": sum(r.completion_tokens for r in records),
+                "parse_success_rate": round(sum(bool(r.parsed) for r in parsed) / len(parsed), 3) if parsed else None,
+            })
+        # biggest consumers of wall time first: that's where the bottleneck is
+        return sorted(rows, key=lambda row: row["latency_total_s"], reverse=True)
+
+
+telemetry_registry = TelemetryRegistry()
+
+
+def finish_call(record: LLMCallRecord, started: float) -> None:
+    record.latency_s = time.monotonic() - started
+    if LLM_TELEMETRY_ENABLED:
+        telemetry_registry.record(record)
@@ -2,6 +2,7 @@ from .user import User
 from .subject import Subject
 from .ai_task import AITask
 from .feedback import Feedback
+from .generation_job import GenerationJob
 
 __all__ = [
     "User",
@@ -9,4 +10,5 @@ __all__ = [
     "AITask",
     "AITaskStatus",
     "Feedback",
+    "GenerationJob",
 ]
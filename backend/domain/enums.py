@@ -12,3 +12,15 @@ class SubjectStatus(str, Enum):
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
 
+
+
+class JobKind(str, Enum):
+    GENERATE = "generate"
+    RESCHEDULE = "reschedule"
+
+
+class JobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
@@ -0,0 +1,35 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional
+from uuid import uuid4
+
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.config.database import Base
+from backend.domain.enums import JobKind, JobState
+
+
+class GenerationJob(Base):
+    """A queued plan generation/reschedule, executed by the background job workers."""
+    __tablename__ = "generation_jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind: Mapped[JobKind] = mapped_column(SQLEnum(JobKind), nullable=False)
+    state: Mapped[JobState] = mapped_column(SQLEnum(JobState), nullable=False, default=JobState.QUEUED, index=True)
+    merge_mode: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+
+    progress: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # 0-100
+    stage: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    generation_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)  # Result: UUID of the new schedule
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"GenerationJob(id={self.id!r}, user_id={self.user_id!r}, kind={self.kind!r}, state={self.state!r})"
@@ -6,6 +6,7 @@ from backend.domain.subject import Subject  # noqa: F401
 from backend.domain.plan import Plan
 from backend.domain.ai_task import AITask  # noqa: F401
 from backend.domain.feedback import Feedback  # noqa: F401
+from backend.domain.generation_job import GenerationJob  # noqa: F401
 
 
 def create_all() -> None:
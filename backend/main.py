@@ -6,14 +6,30 @@ from backend.routes.subject_routes import router as subject_router
 from backend.routes.plan_routes import router as plan_router
 from backend.routes.ai_task_routes import router as ai_task
 from backend.routes.feedback_routes import router as feedback_router
+from backend.routes.job_routes import router as job_router
+from backend.routes.metrics_routes import router as metrics_router
 from backend.init_db import create_all
+from backend.service.job_worker import job_worker_pool
+from backend.service.speculation import speculative_planner
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Create database tables
     create_all()
+    # Generations running in this process read subjects/feedback/schedules straight from the repositories
+    from ai_system.backend.data_provider import InProcessDataProvider, set_default_data_provider
+    set_default_data_provider(InProcessDataProvider())
+    # Background workers for queued generations (resumes jobs interrupted by a restart)
+    await job_worker_pool.start()
+    # Opt-in speculative generations after subject/feedback writes (SPECULATIVE_PLANNING=1)
+    speculative_planner.start()
     yield
+    await speculative_planner.stop()
+    await job_worker_pool.stop()
+    # Pooled Hugging Face clients live for the whole process; close their connections on shutdown
+    from ai_system.utils.client_pool import aclose_async_clients
+    await aclose_async_clients()
 
 
 app = FastAPI(
@@ -36,6 +52,8 @@ app.include_router(subject_router)
 app.include_router(plan_router)
 app.include_router(ai_task)
 app.include_router(feedback_router)
+app.include_router(job_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 def root():
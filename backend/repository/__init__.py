@@ -3,6 +3,7 @@ from .user_repository import UserRepository
 from .subject_repository import SubjectRepository
 from .ai_task_repository import AITaskRepository
 from .feedback_repository import FeedbackRepository
+from .generation_job_repository import GenerationJobRepository
 
 __all__ = [
     "BaseRepository",
@@ -10,4 +11,5 @@ __all__ = [
     "SubjectRepository",
     "AITaskRepository",
     "FeedbackRepository",
+    "GenerationJobRepository",
 ]
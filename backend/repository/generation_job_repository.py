@@ -0,0 +1,80 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from backend.domain.enums import JobState
+from backend.domain.generation_job import GenerationJob
+from .base import BaseRepository
+
+
+class GenerationJobRepository(BaseRepository[GenerationJob]):
+    def __init__(self, session: Session):
+        super().__init__(GenerationJob, session)
+
+    def get(self, entity_id: str) -> Optional[GenerationJob]:
+        return self.session.get(GenerationJob, entity_id)
+
+    def list_for_user(self, user_id: int, *, offset: int = 0, limit: int = 100) -> List[GenerationJob]:
+        stmt = (
+            select(GenerationJob)
+            .where(GenerationJob.user_id == user_id)
+            .order_by(GenerationJob.created_at.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        return list(self.session.scalars(stmt).all())
+
+    def claim_next(self, now: datetime) -> Optional[GenerationJob]:
+        """Atomically move the oldest queued job to RUNNING. Safe with several worker processes."""
+        stmt = (
+            select(GenerationJob.id)
+            .where(GenerationJob.state == JobState.QUEUED)
+            .order_by(GenerationJob.created_at.asc())
+            .limit(1)
+        )
+        job_id = self.session.scalar(stmt)
+        if job_id is None:
+            return None
+
+        claimed = self.session.execute(
+            update(GenerationJob)
+            .where(GenerationJob.id == job_id, GenerationJob.state == JobState.QUEUED)
+            .values(
+                state=JobState.RUNNING,
+                attempts=GenerationJob.attempts + 1,
+                started_at=now,
+                heartbeat_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if claimed.rowcount != 1:
+            return None  # another worker got it first
+        self.session.flush()
+        return self.get(job_id)
+
+    def requeue_stale(self, heartbeat_before: datetime, max_attempts: int) -> int:
+        """
+        Jobs still RUNNING without a recent heartbeat belonged to a worker that died
+        (e.g. an API restart): queue them again, or fail them once they ran out of attempts.
+        """
+        stale = (
+            GenerationJob.state == JobState.RUNNING,
+            GenerationJob.heartbeat_at < heartbeat_before,
+        )
+        failed = self.session.execute(
+            update(GenerationJob)
+            .where(*stale, GenerationJob.attempts >= max_attempts)
+            .values(state=JobState.FAILED, error="Worker stopped responding too many times",
+                    finished_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        requeued = self.session.execute(
+            update(GenerationJob)
+            .where(*stale)
+            .values(state=JobState.QUEUED, stage="requeued")
+            .execution_options(synchronize_session=False)
+        )
+        return failed.rowcount + requeued.rowcount
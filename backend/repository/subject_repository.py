@@ -21,6 +21,17 @@ class SubjectRepository(BaseRepository[Subject]):
         )
         return list(self.session.scalars(stmt).all())
 
+    def list_student_ids(self, *, after_id: int = 0, limit: int = 500) -> List[int]:
+        """Ids of users with at least one subject, ascending, for keyset paging (after_id = last id seen)."""
+        stmt = (
+            select(Subject.student_id)
+            .where(Subject.student_id > after_id)
+            .distinct()
+            .order_by(Subject.student_id)
+            .limit(limit)
+        )
+        return list(self.session.scalars(stmt).all())
+
     def get_by_title_for_user(self, user_id: int, title: str) -> Optional[Subject]:
         stmt = select(Subject).where(Subject.student_id == user_id, Subject.title == title)
         return self.session.scalars(stmt).first()
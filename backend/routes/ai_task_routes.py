@@ -8,6 +8,7 @@ from backend.repository.ai_task_repository import AITaskRepository
 from backend.repository.subject_repository import SubjectRepository
 from backend.repository.plan_repository import PlanRepository
 from backend.service.ai_task_service import AITaskService
+from backend.service.availability import ScheduleConflictError
 
 router = APIRouter(prefix="/plans/{plan_id}/ai-tasks", tags=["ai-tasks"])
 
@@ -101,6 +102,8 @@ def add_ai_task(plan_id: int, payload: AiTaskCreateRequest):
                 task_id=payload.task_id,
             )
             return AiTaskResponse.from_ai_task(task)
+        except ScheduleConflictError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         except IntegrityError:
@@ -166,6 +169,8 @@ def update_ai_task(plan_id: int, ai_task_id: int, payload: AiTaskUpdateRequest):
             if not task:
                 raise HTTPException(status_code=404, detail="AI Task not found")
             return AiTaskResponse.from_ai_task(task)
+        except ScheduleConflictError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
 
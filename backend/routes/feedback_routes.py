@@ -1,14 +1,16 @@
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status
 from pydantic import BaseModel
 from sqlalchemy.exc import IntegrityError
 
 from backend.config.database import get_session
+from backend.domain.enums import JobKind
 from backend.repository.feedback_repository import FeedbackRepository
 from backend.repository.user_repository import UserRepository
 from backend.repository.plan_repository import PlanRepository
 from backend.service.feedback_service import FeedbackService
+from backend.service.speculation import speculative_planner
 
 router = APIRouter(prefix="/users/{user_id}/feedback", tags=["feedback"])
 
@@ -72,7 +74,7 @@ def list_user_feedback_latest(user_id: int):
         return latest
 
 @router.post("/", response_model=FeedbackResponse, status_code=status.HTTP_201_CREATED)
-def add_feedback(user_id: int, payload: FeedbackCreateRequest):
+def add_feedback(user_id: int, payload: FeedbackCreateRequest, background_tasks: BackgroundTasks):
     """Add feedback for a schedule/generation.
     
     Can provide either:
@@ -97,6 +99,8 @@ def add_feedback(user_id: int, payload: FeedbackCreateRequest):
                 rating=payload.rating, 
                 comments=payload.comments
             )
+            # new feedback is what a reschedule works from; precompute it after the commit
+            background_tasks.add_task(speculative_planner.schedule, user_id, JobKind.RESCHEDULE)
             return feedback
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+
+from pydantic import BaseModel
+
+from backend.config.database import get_session
+from backend.domain.enums import JobKind, JobState
+from backend.repository.generation_job_repository import GenerationJobRepository
+from backend.repository.user_repository import UserRepository
+from backend.service.generation_job_service import GenerationJobService
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+class JobResponse(BaseModel):
+    id: str
+    user_id: int
+    kind: JobKind
+    state: JobState
+    progress: int
+    stage: Optional[str]
+    attempts: int
+    merge_mode: Optional[str]
+    generation_id: Optional[str]  # Set once the job succeeded
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(job_id: str):
+    """Poll the state/progress of a background generation or reschedule job."""
+    with get_session() as session:
+        service = GenerationJobService(GenerationJobRepository(session), UserRepository(session))
+        job = service.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return JobResponse.model_validate(job)
@@ -0,0 +1,82 @@
+import time
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Query
+
+from ai_system.utils.prompt_templates import prefix_stats
+from ai_system.utils.similar_plans import get_similar_plan_index
+from ai_system.utils.telemetry import GROUP_FIELDS, telemetry_registry
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+def _since(window_seconds: Optional[float]) -> Optional[float]:
+    return time.time() - window_seconds if window_seconds else None
+
+
+@router.get("/llm")
+def llm_summary(
+    group_by: str = Query("agent,model,task_type", description=f"Comma separated, from: {', '.join(GROUP_FIELDS)}"),
+    window_seconds: Optional[float] = Query(None, gt=0, description="Only calls started in the last N seconds"),
+) -> Dict[str, Any]:
+    """LLM calls of this process aggregated per group, slowest total wall time first."""
+    fields = [f.strip() for f in group_by.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in GROUP_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by field(s): {', '.join(unknown)}")
+    return {
+        "total_recorded": telemetry_registry.total_recorded,
+        "groups": telemetry_registry.summary(fields, since=_since(window_seconds)),
+        "counters": telemetry_registry.counters(),
+    }
+
+
+@router.get("/llm/calls")
+def llm_calls(
+    limit: int = Query(100, ge=1, le=1000),
+    window_seconds: Optional[float] = Query(None, gt=0),
+    agent: Optional[str] = None,
+    model: Optional[str] = None,
+    task_type: Optional[str] = None,
+    outcome: Optional[str] = None,
+    prefix_hash: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Most recent individual LLM calls, newest first."""
+    records = telemetry_registry.records(
+        since=_since(window_seconds), limit=limit, agent=agent, model=model, task_type=task_type, outcome=outcome,
+        prefix_hash=prefix_hash,
+    )
+    return [r.as_dict() for r in records]
+
+
+@router.get("/prompt-prefixes")
+def prompt_prefixes(
+    window_seconds: Optional[float] = Query(None, gt=0, description="Only calls started in the last N seconds"),
+) -> Dict[str, Any]:
+    """
+    Per subject-plan template: its static prefix hash, renders since start and the recorded LLM
+    calls that used it (upstream vs answered from the response cache).
+    """
+    calls = {
+        group["prefix_hash"]: group
+        for group in telemetry_registry.summary(("prefix_hash",), since=_since(window_seconds))
+    }
+    templates = []
+    for prefix_hash, stats in prefix_stats().items():
+        group = calls.get(prefix_hash, {})
+        templates.append({
+            "prefix_hash": prefix_hash,
+            **stats,
+            "calls": group.get("calls", 0),
+            "cache_hits": group.get("cache_hits", 0),
+            "prompt_tokens": group.get("prompt_tokens", 0),
+        })
+    return {"templates": sorted(templates, key=lambda t: t["calls"], reverse=True)}
+
+
+@router.get("/plan-reuse")
+def plan_reuse() -> Dict[str, Any]:
+    """Near-duplicate subject plan reuse of this process (SIMILAR_PLAN_REUSE)."""
+    index = get_similar_plan_index()
+    if index is None:
+        return {"enabled": False}
+    return {"enabled": True, **index.stats()}
@@ -1,7 +1,10 @@
-from datetime import date, datetime
-from typing import Optional, List, Dict, Any
-from uuid import uuid4
-from fastapi import APIRouter, HTTPException, status, Depends
+import asyncio
+import json
+from datetime import date, timedelta
+from typing import Optional, List, Dict, Any, Literal
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.exc import IntegrityError
 
@@ -12,12 +15,22 @@ from backend.repository.subject_repository import SubjectRepository
 from backend.repository.ai_task_repository import AITaskRepository
 from backend.security import get_current_user_id
 from backend.service.plan_service import PlanService
-from backend.service.ai_task_service import AITaskService
-from backend.domain.ai_task import AITask
+from backend.service.generation_service import GenerationService
 from backend.domain.plan import Plan
+from backend.domain.enums import JobKind
+from backend.repository.generation_job_repository import GenerationJobRepository
+from backend.routes.job_routes import JobResponse
+from backend.service.generation_job_service import GenerationJobService
+from backend.service.job_worker import job_worker_pool
+from backend.service.speculation import speculative_planner
+from backend.service.availability import availability_index, parse_clock
+from ai_system.utils.calendar_validation import parse_time_range
+from ai_system.utils.deadline import Deadline, DeadlineExceeded, request_deadline
 
 router = APIRouter(prefix="/users/{user_id}/plans", tags=["plans"])
 
+DISCONNECT_POLL_SECONDS = 0.5
+
 
 class PlanCreateRequest(BaseModel):
     plan_date: date
@@ -189,6 +202,77 @@ def list_user_plans(user_id: int):
         return [PlanResponse.from_plan(plan) for plan in plans]
 
 
+class FreeSlot(BaseModel):
+    date: date
+    time_allotted: str  # HH:MM–HH:MM, `minutes` long from the start of the gap
+    free_minutes: int  # length of the whole gap
+
+
+class BlockEntry(BaseModel):
+    id: int  # AI task database ID
+    ai_task_name: str
+    time_allotted: str
+
+
+class OverlapResponse(BaseModel):
+    plan_date: date
+    time_allotted: str
+    generation_id: Optional[str]
+    conflicts: List[BlockEntry]
+
+
+MAX_FREE_SLOT_RANGE_DAYS = 366
+
+
+@router.get("/free-slots", response_model=List[FreeSlot])
+def get_free_slots(
+    user_id: int,
+    minutes: int = Query(ge=1, le=24 * 60, description="Length of the slot in minutes"),
+    start: Optional[date] = Query(default=None, description="First day (default: today)"),
+    end: Optional[date] = Query(default=None, description="Last day, inclusive (default: start + 6 days)"),
+    k: int = Query(default=5, ge=1, le=100, description="Number of slots to return"),
+    day_start: str = Query(default="08:00", description="HH:MM, earliest start of a slot"),
+    day_end: str = Query(default="22:00", description="HH:MM, latest end of a slot"),
+    order: Literal["earliest", "longest"] = "earliest",
+):
+    """Top-k free slots of the latest generation's schedule in a date range."""
+    start = start or date.today()
+    end = end or start + timedelta(days=6)
+    if end < start or (end - start).days >= MAX_FREE_SLOT_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"end must be within {MAX_FREE_SLOT_RANGE_DAYS} days after start")
+    try:
+        window = parse_clock(day_start), parse_clock(day_end)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    with get_session() as session:
+        if not UserRepository(session).get(user_id):
+            raise HTTPException(status_code=404, detail="User not found")
+        availability = availability_index.get(session, user_id)
+    return availability.free_slots(
+        start, end, minutes, k=k, day_start=window[0], day_end=window[1], longest=order == "longest"
+    )
+
+
+@router.get("/overlaps", response_model=OverlapResponse)
+def get_overlaps(user_id: int, plan_date: date, time_allotted: str):
+    """Blocks of the latest generation a new block at plan_date / time_allotted would overlap."""
+    parsed = parse_time_range(time_allotted)
+    if parsed is None or parsed[1] <= parsed[0]:
+        raise HTTPException(status_code=400, detail="time_allotted must be a time range HH:MM–HH:MM")
+
+    with get_session() as session:
+        if not UserRepository(session).get(user_id):
+            raise HTTPException(status_code=404, detail="User not found")
+        availability = availability_index.get(session, user_id)
+    return OverlapResponse(
+        plan_date=plan_date,
+        time_allotted=time_allotted,
+        generation_id=availability.generation_id,
+        conflicts=availability.overlaps(plan_date, *parsed),
+    )
+
+
 @router.get("/{plan_id}", response_model=PlanResponse)
 def get_plan(user_id: int, plan_id: int):
     """Get a specific plan."""
@@ -280,19 +364,106 @@ def delete_plan(user_id: int, plan_id: int):
             raise HTTPException(status_code=403, detail=str(e))
 
 
+class DeferredSubject(BaseModel):
+    """A subject left out of the calendar because it wasn't planned within the time budget."""
+    subject_id: Optional[int]
+    subject_name: Optional[str]
+    reason: str
+
+
 class GeneratedPlanResponse(BaseModel):
     """Response for generated AI plan."""
     plans: List[PlanResponse]
     message: str
+    deferred: List[DeferredSubject] = []
+
+
+def _ensure_user_has_subjects(user_id: int, action: str) -> None:
+    """Raise 404/400 before spending LLM calls on a user with nothing to plan."""
+    with get_session() as session:
+        if not UserRepository(session).get(user_id):
+            raise HTTPException(status_code=404, detail="User not found")
+
+        if not SubjectRepository(session).list_for_user(user_id):
+            raise HTTPException(
+                status_code=400,
+                detail=f"No subjects found for this user. Add subjects before {action}."
+            )
+
+
+def _persist_ai_calendar(user_id: int, ai_plan: Dict[str, Any], log_prefix: str) -> List[PlanResponse]:
+    """
+    Store an AI calendar as a new generation and return the latest generation.
+    Raises HTTPException(500) if no plan could be created.
+    """
+    with get_session() as session:
+        user_repo = UserRepository(session)
+        plan_repo = PlanRepository(session)
+        service = GenerationService(plan_repo, user_repo, SubjectRepository(session), AITaskRepository(session))
+        try:
+            service.persist_calendar(user_id=user_id, ai_plan=ai_plan, log_prefix=log_prefix)
+        except ValueError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+        # Return the latest generation (which includes the plans we just created)
+        latest_generation = PlanService(plan_repo, user_repo).get_latest_generation(user_id)
+        return [PlanResponse.from_plan(p) for p in latest_generation]
+
+
+async def _cancel_on_disconnect(request: Request, deadline: Deadline, coro):
+    """
+    Await coro, cancelling it (and with it the upstream LLM calls it is waiting on) if the client
+    disconnects first. Raises DeadlineExceeded in that case.
+    """
+    work = asyncio.ensure_future(coro)
+
+    async def watch():
+        while not await request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+        print(f"[plan_routes] Client disconnected from {request.url.path}, cancelling")
+        deadline.cancel("client disconnected")
+        work.cancel()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        return await work
+    except asyncio.CancelledError:
+        if deadline.cancelled:
+            raise DeadlineExceeded(deadline.reason()) from None
+        raise
+    finally:
+        watcher.cancel()
+        work.cancel()  # no-op once finished; stops the pipeline if this request itself is cancelled
+
+
+def _generated_response(plans: List[PlanResponse], ai_plan: Dict[str, Any]) -> GeneratedPlanResponse:
+    deferred = ai_plan.get("deferred") or []
+    message = f"Successfully generated {len(plans)} plan(s) with AI tasks"
+    if deferred:
+        message += f"; {len(deferred)} subject(s) deferred ({deferred[0]['reason']}), generate again to plan them"
+    return GeneratedPlanResponse(plans=plans, message=message, deferred=deferred)
 
 
 @router.post("/generate", response_model=GeneratedPlanResponse, status_code=status.HTTP_201_CREATED)
-def generate_plan(user_id: int, current_user_id: int = Depends(get_current_user_id)):
+async def generate_plan(
+    request: Request,
+    user_id: int,
+    merge_mode: Optional[Literal["local", "llm", "hybrid"]] = None,
+    current_user_id: int = Depends(get_current_user_id),
+):
     """
     Generate an AI plan for the user based on their subjects.
     Uses the AI orchestrator to generate study tasks and creates plans with AI tasks.
+    The orchestrator is awaited on the event loop; database work runs in the threadpool.
+
+    merge_mode selects how subject plans become a calendar: "llm" (CalendarAgent), "local"
+    (deterministic merge, no LLM call) or "hybrid" (local, falling back to the LLM).
+    Defaults to the CALENDAR_MERGE_MODE environment variable.
+
+    The pipeline runs within REQUEST_DEADLINE_SECONDS: subjects not planned in time are listed in
+    "deferred" (504 if none was), and a client disconnect cancels the outstanding LLM calls.
     """
-    from ai_system.orchestrator.ai_orchestrator import AiOrchestrator
+    from ai_system.orchestrator.registry import get_orchestrator
 
     # --- 🕵️ SPY SECTION START ---
     print(f"\n--- DEBUGGING GENERATE PLAN ---")
@@ -303,265 +474,189 @@ def generate_plan(user_id: int, current_user_id: int = Depends(get_current_user_
         print("❌ MISMATCH: Token user does not match URL user!")
     # --- SPY SECTION END ---
 
-    with get_session() as session:
-        user_repo = UserRepository(session)
-        subject_repo = SubjectRepository(session)
-        plan_repo = PlanRepository(session)
-        ai_task_repo = AITaskRepository(session)
-
-        # Check if user exists
-        user = user_repo.get(user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Check if user has subjects
-        subjects = subject_repo.list_for_user(user_id)
-        if not subjects:
+    await run_in_threadpool(_ensure_user_has_subjects, user_id, "generating a plan")
+    deadline = request_deadline()
+
+    try:
+        # A speculative run started by the last subject edit may already have the answer
+        ai_plan = await _cancel_on_disconnect(request, deadline, speculative_planner.take(
+            user_id, JobKind.GENERATE, merge_mode, deadline=deadline
+        ))
+        if ai_plan is None:
+            orchestrator = get_orchestrator()
+            ai_plan = await _cancel_on_disconnect(request, deadline, orchestrator.agenerate_plan_for_user(
+                user_id, save_to_backend=False, merge_mode=merge_mode, deadline=deadline
+            ))
+
+        if not ai_plan or "calendar" not in ai_plan:
             raise HTTPException(
-                status_code=400,
-                detail="No subjects found for this user. Add subjects before generating a plan."
+                status_code=500,
+                detail="AI orchestrator failed to generate a valid plan"
             )
 
-        # Create subject name to id mapping for fast lookup
-        subject_map = {}
-        for s in subjects:
-            subject_map[s.name.lower()] = s.id
-            subject_map[s.title.lower()] = s.id
+        plans = await run_in_threadpool(_persist_ai_calendar, user_id, ai_plan, "generate_plan")
+        return _generated_response(plans, ai_plan)
+
+    except HTTPException:
+        raise
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=f"Plan generation stopped: {e}")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate plan: {str(e)}"
+        )
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 
+@router.post("/generate/stream")
+async def generate_plan_stream(
+    user_id: int,
+    merge_mode: Optional[Literal["local", "llm", "hybrid"]] = None,
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Streaming variant of /generate (text/event-stream). Emits:
+      subject_planned        - as each subject agent finishes (subject id, agent, estimated hours)
+      subject_deferred       - a subject that wasn't planned in time and is left out of the calendar
+      calendar_merge_started - before the calendar merge step
+      calendar_merged        - merge finished (number of days, summary)
+      plan                   - one per persisted plan day, after the generation is committed
+      done                   - final message with the generation_id
+      error                  - the pipeline failed; no further events follow
+    """
+    from ai_system.orchestrator.registry import get_orchestrator
+
+    # Fail with a normal HTTP error before the stream starts
+    await run_in_threadpool(_ensure_user_has_subjects, user_id, "generating a plan")
+
+    async def events():
+        # a disconnect cancels this generator, and with it the agent calls still in flight
+        deadline = request_deadline()
         try:
-            # Initialize orchestrator and generate plan
-            orchestrator = AiOrchestrator()
-            ai_plan = orchestrator.generate_plan_for_user(user_id, save_to_backend=False)
+            orchestrator = get_orchestrator()
+            ai_plan = None
+            async for event, data in orchestrator.astream_plan_for_user(user_id, merge_mode=merge_mode,
+                                                                        deadline=deadline):
+                if event == "calendar_merged":
+                    ai_plan = data
+                    data = {
+                        "days": len(ai_plan.get("calendar", [])) if isinstance(ai_plan, dict) else 0,
+                        "summary": ai_plan.get("summary") if isinstance(ai_plan, dict) else None,
+                        "deferred": len(ai_plan.get("deferred", [])) if isinstance(ai_plan, dict) else 0,
+                    }
+                yield _sse(event, data)
 
             if not ai_plan or "calendar" not in ai_plan:
-                raise HTTPException(
-                    status_code=500,
-                    detail="AI orchestrator failed to generate a valid plan"
-                )
-
-            generation_id = str(uuid4())
-            created_plans = []
-            plan_service = PlanService(plan_repo, user_repo)
-            ai_task_service = AITaskService(ai_task_repo, subject_repo, plan_repo)
-
-            # Process each day in the generated calendar
-            for day_plan in ai_plan.get("calendar", []):
-                plan_date_str = day_plan.get("date")
-                if not plan_date_str:
-                    continue
-
-                try:
-                    plan_date = datetime.strptime(plan_date_str, "%Y-%m-%d").date()
-                except ValueError:
-                    continue
-
-                notes = day_plan.get("notes", "")
-                entries = day_plan.get("entries", [])
-
-                # Create plan even if it has no entries; always create a NEW plan and don't overwrite existing plans
-                # This preserves plan history and allows iterative refinement
-                try:
-                    plan = plan_service.create_plan(
-                        user_id=user_id,
-                        plan_date=plan_date,
-                        notes=notes,
-                        generation_id=generation_id,
-                    )
-                except Exception as e:
-                    print(f"[generate_plan] Failed to create plan for {plan_date}: {e}")
-                    continue
-
-                # Process entries and create AI tasks (if any)
-                for entry in entries:
-                    time_allotted = entry.get("time_allotted", "")
-                    task_name = entry.get("task_name", "")
-                    subject_name = entry.get("subject_name/project_name", "")
-                    difficulty = entry.get("difficulty", 3)
-                    priority = entry.get("priority", 5)
-                    difficulty = max(1, min(5, difficulty))
-                    priority = max(1, min(10, priority))
-
-                    # Find subject by name
-                    subject_id = subject_map.get(subject_name.lower())
-                    if not subject_id:
-                        # Try partial matching
-                        for key, sid in subject_map.items():
-                            if subject_name.lower() in key or key in subject_name.lower():
-                                subject_id = sid
-                                break
-
-                    if not subject_id:
-                        # Skip if no matching subject found
-                        continue
-
-                    # Create AI task
-                    ai_task = AITask()
-                    ai_task.time_allotted = time_allotted
-                    ai_task.ai_task_name = task_name
-                    ai_task.difficulty = difficulty
-                    ai_task.priority = priority
-                    ai_task.plan_id = plan.id
-                    ai_task.task_id = subject_id
-                    ai_task_repo.add(ai_task)
-
-                session.flush()
-                session.refresh(plan)
-                created_plans.append(plan)
-
-            if not created_plans:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Failed to create any plans from the generated AI response"
-                )
-
-            # Return the latest generation (which includes the plans we just created)
-            latest_generation = plan_service.get_latest_generation(user_id)
-            
-            return GeneratedPlanResponse(
-                plans=[PlanResponse.from_plan(p) for p in latest_generation],
-                message=f"Successfully generated {len(latest_generation)} plan(s) with AI tasks"
-            )
-
-        except HTTPException:
+                yield _sse("error", {"detail": "AI orchestrator failed to generate a valid plan"})
+                return
+
+            plans = await run_in_threadpool(_persist_ai_calendar, user_id, ai_plan, "generate_plan_stream")
+            for plan in plans:
+                yield _sse("plan", plan.model_dump(mode="json"))
+
+            yield _sse("done", {
+                "generation_id": plans[0].generation_id if plans else None,
+                "message": f"Successfully generated {len(plans)} plan(s) with AI tasks",
+            })
+        except asyncio.CancelledError:
+            deadline.cancel("client disconnected")
             raise
+        except HTTPException as e:
+            yield _sse("error", {"detail": e.detail})
+        except DeadlineExceeded as e:
+            yield _sse("error", {"detail": f"Plan generation stopped: {e}"})
         except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to generate plan: {str(e)}"
-            )
+            yield _sse("error", {"detail": f"Failed to generate plan: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/reschedule", response_model=GeneratedPlanResponse, status_code=status.HTTP_201_CREATED)
-def reschedule_plan(user_id: int):
+async def reschedule_plan(request: Request, user_id: int):
     """
     Regenerate an AI plan for the user based on current and last feedback.
     Uses the AI Rescheduler to adjust the previous plan according to feedback.
+    504 if it doesn't finish within REQUEST_DEADLINE_SECONDS; a client disconnect cancels it.
     """
-    from ai_system.orchestrator.ai_reschedule import AiRescheduler
+    from ai_system.orchestrator.registry import get_rescheduler
+
+    await run_in_threadpool(_ensure_user_has_subjects, user_id, "rescheduling")
+    deadline = request_deadline()
+
+    try:
+        # Shared rescheduler (or a staged speculative result); generate rescheduled plan
+        ai_plan = await _cancel_on_disconnect(request, deadline, speculative_planner.take(
+            user_id, JobKind.RESCHEDULE, deadline=deadline
+        ))
+        if ai_plan is None:
+            rescheduler = get_rescheduler()
+            ai_plan = await _cancel_on_disconnect(request, deadline, rescheduler.agenerate_plan_for_user(
+                user_id, save_to_backend=False, deadline=deadline
+            ))
+
+        if not ai_plan or "calendar" not in ai_plan:
+            raise HTTPException(
+                status_code=500,
+                detail="AI rescheduler failed to generate a valid plan"
+            )
 
-    with get_session() as session:
-        user_repo = UserRepository(session)
-        subject_repo = SubjectRepository(session)
-        plan_repo = PlanRepository(session)
-        ai_task_repo = AITaskRepository(session)
+        plans = await run_in_threadpool(_persist_ai_calendar, user_id, ai_plan, "reschedule_plan")
 
-        # Check if user exists
-        user = user_repo.get(user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        return GeneratedPlanResponse(
+            plans=plans,
+            message=f"Successfully rescheduled {len(plans)} plan(s) based on feedback"
+        )
 
-        # Check if user has subjects
-        subjects = subject_repo.list_for_user(user_id)
-        if not subjects:
-            raise HTTPException(
-                status_code=400,
-                detail="No subjects found for this user. Add subjects before rescheduling."
-            )
+    except HTTPException:
+        raise
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=f"Reschedule stopped: {e}")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to reschedule plan: {str(e)}"
+        )
 
-        # Create subject name to id mapping for fast lookup
-        subject_map = {}
-        for s in subjects:
-            subject_map[s.name.lower()] = s.id
-            subject_map[s.title.lower()] = s.id
 
+def _enqueue_job(user_id: int, kind: JobKind, merge_mode: Optional[str] = None) -> JobResponse:
+    with get_session() as session:
+        service = GenerationJobService(GenerationJobRepository(session), UserRepository(session))
         try:
-            # Initialize rescheduler and generate rescheduled plan
-            rescheduler = AiRescheduler()
-            ai_plan = rescheduler.generate_plan_for_user(user_id, save_to_backend=False)
+            job = service.enqueue(user_id=user_id, kind=kind, merge_mode=merge_mode)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return JobResponse.model_validate(job)
 
-            if not ai_plan or "calendar" not in ai_plan:
-                raise HTTPException(
-                    status_code=500,
-                    detail="AI rescheduler failed to generate a valid plan"
-                )
-
-            generation_id = str(uuid4())
-            created_plans = []
-            plan_service = PlanService(plan_repo, user_repo)
-            ai_task_service = AITaskService(ai_task_repo, subject_repo, plan_repo)
-
-            # Process each day in the rescheduled calendar
-            for day_plan in ai_plan.get("calendar", []):
-                plan_date_str = day_plan.get("date")
-                if not plan_date_str:
-                    continue
-
-                try:
-                    plan_date = datetime.strptime(plan_date_str, "%Y-%m-%d").date()
-                except ValueError:
-                    continue
-
-                notes = day_plan.get("notes", "")
-                entries = day_plan.get("entries", [])
-
-                # Create plan even if it has no entries; always create a NEW plan and don't overwrite existing plans
-                # This preserves plan history and allows iterative refinement
-                try:
-                    plan = plan_service.create_plan(
-                        user_id=user_id,
-                        plan_date=plan_date,
-                        notes=notes,
-                        generation_id=generation_id,
-                    )
-                except Exception as e:
-                    print(f"[reschedule_plan] Failed to create plan for {plan_date}: {e}")
-                    continue
-
-                # Process entries and create AI tasks (if any)
-                for entry in entries:
-                    time_allotted = entry.get("time_allotted", "")
-                    task_name = entry.get("task_name", "")
-                    subject_name = entry.get("subject_name/project_name", "")
-                    difficulty = entry.get("difficulty", 3)
-                    priority = entry.get("priority", 5)
-                    difficulty = max(1, min(5, difficulty))
-                    priority = max(1, min(10, priority))
-
-                    # Find subject by name
-                    subject_id = subject_map.get(subject_name.lower())
-                    if not subject_id:
-                        # Try partial matching
-                        for key, sid in subject_map.items():
-                            if subject_name.lower() in key or key in subject_name.lower():
-                                subject_id = sid
-                                break
-
-                    if not subject_id:
-                        # Skip if no matching subject found
-                        continue
-
-                    # Create AI task
-                    ai_task = AITask()
-                    ai_task.time_allotted = time_allotted
-                    ai_task.ai_task_name = task_name
-                    ai_task.difficulty = difficulty
-                    ai_task.priority = priority
-                    ai_task.plan_id = plan.id
-                    ai_task.task_id = subject_id
-                    ai_task_repo.add(ai_task)
-
-                session.flush()
-                session.refresh(plan)
-                created_plans.append(plan)
-
-            if not created_plans:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Failed to create any rescheduled plans from the AI response"
-                )
-
-            # Return the latest generation (which includes the plans we just created)
-            latest_generation = plan_service.get_latest_generation(user_id)
-            
-            return GeneratedPlanResponse(
-                plans=[PlanResponse.from_plan(p) for p in latest_generation],
-                message=f"Successfully rescheduled {len(latest_generation)} plan(s) based on feedback"
-            )
 
-        except HTTPException:
-            raise
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to reschedule plan: {str(e)}"
-            )
+@router.post("/generate/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_generate_plan(
+    user_id: int,
+    merge_mode: Optional[Literal["local", "llm", "hybrid"]] = None,
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Queue a plan generation and return immediately.
+    Poll GET /jobs/{job_id} until state is "succeeded" (generation_id is set) or "failed".
+    """
+    await run_in_threadpool(_ensure_user_has_subjects, user_id, "generating a plan")
+    job = await run_in_threadpool(_enqueue_job, user_id, JobKind.GENERATE, merge_mode)
+    job_worker_pool.notify()
+    return job
+
+
+@router.post("/reschedule/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_reschedule_plan(user_id: int):
+    """Queue a feedback-based reschedule and return immediately; poll GET /jobs/{job_id}."""
+    await run_in_threadpool(_ensure_user_has_subjects, user_id, "rescheduling")
+    job = await run_in_threadpool(_enqueue_job, user_id, JobKind.RESCHEDULE)
+    job_worker_pool.notify()
+    return job
@@ -1,13 +1,14 @@
 from datetime import datetime
 from typing import Optional, List
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status
 from pydantic import BaseModel
 from sqlalchemy.exc import IntegrityError
 
 from backend.config.database import get_session
-from backend.domain.enums import SubjectType, SubjectStatus
+from backend.domain.enums import JobKind, SubjectType, SubjectStatus
 from backend.repository.subject_repository import SubjectRepository
 from backend.repository.user_repository import UserRepository
+from backend.service.speculation import speculative_planner
 from backend.service.subject_service import SubjectService
 
 router = APIRouter(prefix="/users/{user_id}/subjects", tags=["subjects"])
@@ -52,7 +53,7 @@ class SubjectResponse(BaseModel):
 
 
 @router.post("/", response_model=SubjectResponse, status_code=status.HTTP_201_CREATED)
-def add_subject(user_id: int, payload: SubjectCreateRequest):
+def add_subject(user_id: int, payload: SubjectCreateRequest, background_tasks: BackgroundTasks):
     """Add a new subject to a specific user."""
     with get_session() as session:
         user_repo = UserRepository(session)
@@ -75,6 +76,8 @@ def add_subject(user_id: int, payload: SubjectCreateRequest):
                 end_date=payload.end_date,
                 description=payload.description,
             )
+            # runs after the response, i.e. once the session has committed
+            background_tasks.add_task(speculative_planner.schedule, user_id, JobKind.GENERATE)
             return subject
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -121,7 +124,8 @@ def get_subject(user_id: int, subject_id: int):
 
 
 @router.put("/{subject_id}", response_model=SubjectResponse)
-def update_subject(user_id: int, subject_id: int, payload: SubjectUpdateRequest):
+def update_subject(user_id: int, subject_id: int, payload: SubjectUpdateRequest,
+                   background_tasks: BackgroundTasks):
     """Update a subject for a specific user."""
     with get_session() as session:
         user_repo = UserRepository(session)
@@ -155,13 +159,14 @@ def update_subject(user_id: int, subject_id: int, payload: SubjectUpdateRequest)
             )
             if not updated:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subject not found")
+            background_tasks.add_task(speculative_planner.schedule, user_id, JobKind.GENERATE)
             return updated
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.delete("/{subject_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_subject(user_id: int, subject_id: int):
+def remove_subject(user_id: int, subject_id: int, background_tasks: BackgroundTasks):
     """Remove a subject from a specific user."""
     with get_session() as session:
         user_repo = UserRepository(session)
@@ -184,5 +189,6 @@ def remove_subject(user_id: int, subject_id: int):
             success = service.delete_subject(subject_id=subject_id, student_id=user_id)
             if not success:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subject not found")
+            background_tasks.add_task(speculative_planner.schedule, user_id, JobKind.GENERATE)
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
\ No newline at end of file
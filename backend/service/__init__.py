@@ -2,10 +2,14 @@ from .user_service import UserService
 from .subject_service import SubjectService
 from .ai_task_service import AITaskService
 from .feedback_service import FeedbackService
+from .generation_service import GenerationService
+from .generation_job_service import GenerationJobService
 
 __all__ = [
     "UserService",
     "SubjectService",
     "AITaskService",
     "FeedbackService",
+    "GenerationService",
+    "GenerationJobService",
 ]
@@ -5,6 +5,7 @@ from backend.domain.ai_task import AITask
 from backend.repository.ai_task_repository import AITaskRepository
 from backend.repository.subject_repository import SubjectRepository
 from backend.repository.plan_repository import PlanRepository
+from backend.service.availability import availability_index
 
 
 class AITaskService:
@@ -36,13 +37,18 @@ class AITaskService:
             raise ValueError("Priority must be between 1 and 10")
 
         # Validate plan exists
-        if not self.plan_repo.get(plan_id):
+        plan = self.plan_repo.get(plan_id)
+        if not plan:
             raise ValueError("Plan does not exist")
 
         # Validate subject/task exists
         if not self.subject_repo.get(task_id):
             raise ValueError("Task does not exist")
 
+        # Reject a block that overlaps another block of the same day
+        session = self.ai_task_repo.session
+        availability_index.check(session, plan, time_allotted.strip())
+
         task = AITask()
         task.ai_task_name = ai_task_name.strip()
         task.time_allotted = time_allotted.strip()
@@ -52,8 +58,9 @@ class AITaskService:
         task.task_id = task_id
         
         self.ai_task_repo.add(task)
-        self.ai_task_repo.session.flush()
-        self.ai_task_repo.session.refresh(task)
+        session.flush()
+        session.refresh(task)
+        availability_index.invalidate_after_commit(session, plan.user_id)
         
         return task
 
@@ -102,7 +109,6 @@ class AITaskService:
         if time_allotted is not None:
             if not time_allotted.strip():
                 raise ValueError("Time allotted cannot be empty")
-            task.time_allotted = time_allotted.strip()
 
         if difficulty is not None:
             if difficulty < 1 or difficulty > 5:
@@ -114,16 +120,27 @@ class AITaskService:
                 raise ValueError("Priority must be between 1 and 10")
             task.priority = priority
 
+        plan = task.plan
         if plan_id is not None:
-            if not self.plan_repo.get(plan_id):
+            plan = self.plan_repo.get(plan_id)
+            if not plan:
                 raise ValueError("Plan does not exist")
-            task.plan_id = plan_id
 
         if task_id is not None:
             if not self.subject_repo.get(task_id):
                 raise ValueError("Task does not exist")
             task.task_id = task_id
 
+        if time_allotted is not None or plan_id is not None:
+            # Reject a block that overlaps another block of its (new) day
+            new_time = time_allotted.strip() if time_allotted is not None else task.time_allotted
+            availability_index.check(self.ai_task_repo.session, plan, new_time, exclude_id=task.id)
+            task.time_allotted = new_time
+
+        for user_id in {task.plan.user_id, plan.user_id}:
+            availability_index.invalidate_after_commit(self.ai_task_repo.session, user_id)
+        task.plan_id = plan.id
+
         return task
 
     def delete_task(self, ai_task_id: int) -> bool:
@@ -131,5 +148,6 @@ class AITaskService:
         if not task:
             return False
 
+        availability_index.invalidate_after_commit(self.ai_task_repo.session, task.plan.user_id)
         self.ai_task_repo.delete(task)
         return True
\ No newline at end of file
@@ -0,0 +1,213 @@
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ai_system.utils.calendar_validation import DAY_MINUTES, format_time_range, parse_time_range
+from backend.repository.plan_repository import PlanRepository
+
+AVAILABILITY_CACHE_USERS = int(os.getenv("AVAILABILITY_CACHE_USERS", "10000"))
+
+
+class ScheduleConflictError(ValueError):
+    """A block overlaps other blocks of the same day."""
+
+    def __init__(self, conflicts: List[Dict[str, Any]]):
+        self.conflicts = conflicts
+        described = ", ".join(f"'{c['ai_task_name']}' ({c['time_allotted']})" for c in conflicts)
+        super().__init__(f"Time allotted overlaps {described}")
+
+
+class UserAvailability:
+    """
+    Busy time of one generation of plans at minute resolution. Blocks are stored once as sorted
+    arrays of absolute minutes (date ordinal * 1440 + minute of the day): the blocks themselves for
+    overlap checks, and their union as disjoint intervals for free-slot queries. Blocks whose
+    time_allotted doesn't parse take no time.
+    """
+
+    def __init__(self, generation_id: Optional[str], blocks: Iterable[Tuple[int, int, int, str]]):
+        # blocks: (absolute start, absolute end, ai task id, ai task name)
+        blocks = sorted(blocks)
+        self.generation_id = generation_id
+        self.starts = np.array([b[0] for b in blocks], dtype=np.int64)
+        self.ends = np.array([b[1] for b in blocks], dtype=np.int64)
+        self.ids = np.array([b[2] for b in blocks], dtype=np.int64)
+        self.names = [b[3] for b in blocks]
+        # running max of the ends: the blocks before i that can still reach past a given minute
+        self.reach = np.maximum.accumulate(self.ends) if len(blocks) else self.ends
+
+        # union: a block opens a new interval when it starts after everything before it ended
+        opens = np.ones(len(blocks), dtype=bool)
+        opens[1:] = self.starts[1:] > self.reach[:-1]
+        self.busy_starts = self.starts[opens]
+        self.busy_ends = np.append(self.reach[np.flatnonzero(opens)[1:] - 1], self.reach[-1:])
+
+    @classmethod
+    def from_plans(cls, plans: Iterable[Any], generation_id: Optional[str] = None) -> "UserAvailability":
+        blocks = []
+        for plan in plans:
+            offset = plan.plan_date.toordinal() * DAY_MINUTES
+            for ai_task in plan.ai_tasks:
+                parsed = parse_time_range(ai_task.time_allotted)
+                if parsed is not None and parsed[1] > parsed[0]:
+                    blocks.append((offset + parsed[0], offset + parsed[1], ai_task.id, ai_task.ai_task_name))
+        return cls(generation_id, blocks)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def overlaps(self, day: date, start: int, end: int, exclude_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Blocks of `day` overlapping [start, end) minutes after midnight."""
+        offset = day.toordinal() * DAY_MINUTES
+        start, end = offset + start, offset + end
+        # candidates start before `end` and come after the last block that can't reach `start`
+        lo = int(np.searchsorted(self.reach, start, side="right"))
+        hi = int(np.searchsorted(self.starts, end, side="left"))
+        conflicts = []
+        for i in range(lo, hi):
+            if self.ends[i] > start and self.ids[i] != exclude_id:
+                conflicts.append({
+                    "id": int(self.ids[i]),
+                    "ai_task_name": self.names[i],
+                    "time_allotted": format_time_range(int(self.starts[i] - offset), int(self.ends[i] - offset)),
+                })
+        return conflicts
+
+    def free_slots(
+        self,
+        first: date,
+        last: date,
+        minutes: int,
+        *,
+        k: int = 5,
+        day_start: int = 0,
+        day_end: int = DAY_MINUTES,
+        longest: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Up to k free gaps of at least `minutes` between day_start and day_end of the days from
+        first to last, earliest first (or longest first). Each slot starts where its gap starts.
+        """
+        days = np.arange(first.toordinal(), last.toordinal() + 1, dtype=np.int64) * DAY_MINUTES
+        if not len(days) or minutes <= 0 or k <= 0 or day_end - day_start < minutes:
+            return []
+
+        # the hours outside the daily window count as busy; they also split gaps at midnight
+        off_starts = np.concatenate((days, days + day_end))
+        off_ends = np.concatenate((days + day_start, days + DAY_MINUTES))
+        lo = int(np.searchsorted(self.busy_ends, days[0], side="right"))
+        hi = int(np.searchsorted(self.busy_starts, days[-1] + DAY_MINUTES, side="left"))
+        starts = np.concatenate((off_starts, self.busy_starts[lo:hi]))
+        ends = np.concatenate((off_ends, self.busy_ends[lo:hi]))
+
+        order = np.argsort(starts, kind="stable")
+        reach = np.maximum.accumulate(ends[order])
+        gap_starts = reach[:-1]
+        gap_lengths = starts[order][1:] - gap_starts
+        fitting = np.flatnonzero(gap_lengths >= minutes)
+        if longest:
+            fitting = fitting[np.argsort(-gap_lengths[fitting], kind="stable")]
+        fitting = fitting[:k]
+
+        slots = []
+        for i in fitting:
+            day, start = divmod(int(gap_starts[i]), DAY_MINUTES)
+            slots.append({
+                "date": date.fromordinal(day),
+                "time_allotted": format_time_range(start, start + minutes),
+                "free_minutes": int(gap_lengths[i]),
+            })
+        return slots
+
+
+class AvailabilityIndex:
+    """
+    Per-user UserAvailability of the latest generation, built on first use and kept in an LRU of
+    AVAILABILITY_CACHE_USERS users. Writes to a user's plans or AI tasks drop the entry when their
+    transaction commits; a build that overlaps such a commit is not cached. Versions are only kept
+    for users with a build in flight, so bookkeeping stays bounded like the entries.
+    """
+
+    def __init__(self, max_users: int = AVAILABILITY_CACHE_USERS):
+        self.max_users = max_users
+        self._entries: "OrderedDict[int, UserAvailability]" = OrderedDict()
+        self._versions: Dict[int, int] = {}  # users with a build in flight -> invalidations since
+        self._building: Dict[int, int] = {}  # users -> builds in flight
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "builds": 0, "invalidations": 0}
+
+    def get(self, session: Session, user_id: int) -> UserAvailability:
+        with self._lock:
+            availability = self._entries.get(user_id)
+            if availability is not None:
+                self._entries.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return availability
+            version = self._versions.setdefault(user_id, 0)
+            self._building[user_id] = self._building.get(user_id, 0) + 1
+
+        availability = None
+        try:
+            plans = PlanRepository(session).get_latest_generation(user_id)
+            availability = UserAvailability.from_plans(plans, plans[0].generation_id if plans else None)
+        finally:
+            with self._lock:
+                if availability is not None:
+                    self.stats["builds"] += 1
+                    if self._versions[user_id] == version:
+                        self._entries[user_id] = availability
+                        self._entries.move_to_end(user_id)
+                        while len(self._entries) > self.max_users:
+                            self._entries.popitem(last=False)
+                self._building[user_id] -= 1
+                if not self._building[user_id]:
+                    del self._building[user_id]
+                    del self._versions[user_id]
+        return availability
+
+    def for_plan(self, session: Session, plan: Any) -> UserAvailability:
+        """The blocks a plan's day is checked against: its generation's, or its own if it isn't the latest."""
+        if plan.generation_id is not None:
+            availability = self.get(session, plan.user_id)
+            if availability.generation_id == plan.generation_id:
+                return availability
+        return UserAvailability.from_plans([plan], plan.generation_id)
+
+    def check(self, session: Session, plan: Any, time_allotted: str, exclude_id: Optional[int] = None) -> None:
+        """Raise ScheduleConflictError if time_allotted overlaps another block of the plan's day."""
+        parsed = parse_time_range(time_allotted)
+        if parsed is None or parsed[1] <= parsed[0]:
+            return
+        conflicts = self.for_plan(session, plan).overlaps(plan.plan_date, *parsed, exclude_id=exclude_id)
+        if conflicts:
+            raise ScheduleConflictError(conflicts)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            if user_id in self._versions:  # a build in flight must not cache what it read
+                self._versions[user_id] += 1
+            if self._entries.pop(user_id, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def invalidate_after_commit(self, session: Session, user_id: int) -> None:
+        self.invalidate(user_id)
+        event.listen(session, "after_commit", lambda _: self.invalidate(user_id), once=True)
+
+
+availability_index = AvailabilityIndex()
+
+
+def parse_clock(value: str) -> int:
+    """"HH:MM" as minutes after midnight ("24:00" is the end of the day)."""
+    parsed = parse_time_range(f"00:00–{value}")
+    if parsed is None:
+        raise ValueError(f"Invalid time {value!r}, expected HH:MM")
+    return parsed[1]
+
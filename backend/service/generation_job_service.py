@@ -0,0 +1,85 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from backend.domain.enums import JobKind, JobState
+from backend.domain.generation_job import GenerationJob
+from backend.repository.generation_job_repository import GenerationJobRepository
+from backend.repository.user_repository import UserRepository
+
+MAX_JOB_ATTEMPTS = 3
+
+
+class GenerationJobService:
+    def __init__(self, job_repo: GenerationJobRepository, user_repo: UserRepository):
+        self.job_repo = job_repo
+        self.user_repo = user_repo
+
+    def enqueue(self, *, user_id: int, kind: JobKind, merge_mode: Optional[str] = None) -> GenerationJob:
+        if not self.user_repo.get(user_id):
+            raise ValueError("User does not exist")
+
+        job = GenerationJob()
+        job.user_id = user_id
+        job.kind = kind
+        job.state = JobState.QUEUED
+        job.merge_mode = merge_mode
+        job.progress = 0
+        job.attempts = 0
+        job.stage = "queued"
+
+        self.job_repo.add(job)
+        self.job_repo.session.flush()
+        self.job_repo.session.refresh(job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[GenerationJob]:
+        return self.job_repo.get(job_id)
+
+    def list_for_user(self, user_id: int, *, offset: int = 0, limit: int = 100) -> List[GenerationJob]:
+        return self.job_repo.list_for_user(user_id, offset=offset, limit=limit)
+
+    def claim_next(self) -> Optional[GenerationJob]:
+        return self.job_repo.claim_next(datetime.utcnow())
+
+    def heartbeat(self, job_id: str, *, progress: Optional[int] = None, stage: Optional[str] = None) -> None:
+        job = self.job_repo.get(job_id)
+        if not job or job.state != JobState.RUNNING:
+            return
+        job.heartbeat_at = datetime.utcnow()
+        if progress is not None:
+            job.progress = max(0, min(100, progress))
+        if stage is not None:
+            job.stage = stage
+
+    def complete(self, job_id: str, generation_id: str) -> None:
+        job = self.job_repo.get(job_id)
+        if not job:
+            return
+        job.state = JobState.SUCCEEDED
+        job.progress = 100
+        job.stage = "done"
+        job.generation_id = generation_id
+        job.error = None
+        job.finished_at = datetime.utcnow()
+
+    def fail(self, job_id: str, error: str) -> None:
+        job = self.job_repo.get(job_id)
+        if not job:
+            return
+        job.state = JobState.FAILED
+        job.stage = "failed"
+        job.error = error
+        job.finished_at = datetime.utcnow()
+
+    def release(self, job_id: str) -> None:
+        """Put a RUNNING job back in the queue (worker shutting down); the attempt is not counted."""
+        job = self.job_repo.get(job_id)
+        if not job or job.state != JobState.RUNNING:
+            return
+        job.state = JobState.QUEUED
+        job.stage = "requeued"
+        job.attempts = max(0, job.attempts - 1)
+
+    def requeue_stale(self, lease: timedelta) -> int:
+        return self.job_repo.requeue_stale(datetime.utcnow() - lease, MAX_JOB_ATTEMPTS)
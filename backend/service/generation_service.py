@@ -0,0 +1,152 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import event
+
+from ai_system.utils.plan_store import get_plan_store
+from backend.domain.ai_task import AITask
+from backend.domain.plan import Plan
+from backend.repository.ai_task_repository import AITaskRepository
+from backend.repository.plan_repository import PlanRepository
+from backend.repository.subject_repository import SubjectRepository
+from backend.repository.user_repository import UserRepository
+from backend.service.availability import availability_index
+from backend.service.plan_service import PlanService
+
+
+class GenerationService:
+    """Stores an AI-generated calendar as a new generation of plans and AI tasks."""
+
+    def __init__(
+        self,
+        plan_repo: PlanRepository,
+        user_repo: UserRepository,
+        subject_repo: SubjectRepository,
+        ai_task_repo: AITaskRepository,
+    ):
+        self.plan_repo = plan_repo
+        self.user_repo = user_repo
+        self.subject_repo = subject_repo
+        self.ai_task_repo = ai_task_repo
+
+    def _subject_map(self, user_id: int) -> Dict[str, int]:
+        # Create subject name to id mapping for fast lookup
+        subject_map = {}
+        for s in self.subject_repo.list_for_user(user_id):
+            subject_map[s.name.lower()] = s.id
+            subject_map[s.title.lower()] = s.id
+        return subject_map
+
+    def persist_calendar(
+        self,
+        *,
+        user_id: int,
+        ai_plan: Dict[str, Any],
+        log_prefix: str = "generate_plan",
+        generation_id: Optional[str] = None,
+    ) -> Tuple[str, List[Plan]]:
+        """
+        Create one Plan per calendar day (all sharing a new generation_id) with its AI tasks.
+        Returns (generation_id, created plans). Raises ValueError if no plan could be created.
+
+        A calendar the orchestrator marked "unchanged_generation_id" is not stored again while that
+        generation is still the user's latest: its plans (with any edits) are returned instead.
+        """
+        session = self.plan_repo.session
+        unchanged_id = ai_plan.get("unchanged_generation_id")
+        if unchanged_id is not None:
+            latest = self.plan_repo.get_latest_generation(user_id)
+            if latest and latest[0].generation_id == unchanged_id:
+                print(f"[{log_prefix}] Calendar unchanged, keeping generation {unchanged_id}")
+                return unchanged_id, latest
+
+        subject_map = self._subject_map(user_id)
+        generation_id = generation_id or str(uuid4())
+        created_plans = []
+        plan_service = PlanService(self.plan_repo, self.user_repo)
+
+        # Process each day in the generated calendar
+        for day_plan in ai_plan.get("calendar", []):
+            plan_date_str = day_plan.get("date")
+            if not plan_date_str:
+                continue
+
+            try:
+                plan_date = datetime.strptime(plan_date_str, "%Y-%m-%d").date()
+            except ValueError:
+                continue
+
+            notes = day_plan.get("notes", "")
+            entries = day_plan.get("entries", [])
+
+            # Create plan even if it has no entries; always create a NEW plan and don't overwrite existing plans
+            # This preserves plan history and allows iterative refinement
+            try:
+                plan = plan_service.create_plan(
+                    user_id=user_id,
+                    plan_date=plan_date,
+                    notes=notes,
+                    generation_id=generation_id,
+                )
+            except Exception as e:
+                print(f"[{log_prefix}] Failed to create plan for {plan_date}: {e}")
+                continue
+
+            # Process entries and create AI tasks (if any)
+            for entry in entries:
+                time_allotted = entry.get("time_allotted", "")
+                task_name = entry.get("task_name", "")
+                subject_name = entry.get("subject_name/project_name", "")
+                difficulty = entry.get("difficulty", 3)
+                priority = entry.get("priority", 5)
+                difficulty = max(1, min(5, difficulty))
+                priority = max(1, min(10, priority))
+
+                # Find subject by name
+                subject_id = subject_map.get(subject_name.lower())
+                if not subject_id:
+                    # Try partial matching
+                    for key, sid in subject_map.items():
+                        if subject_name.lower() in key or key in subject_name.lower():
+                            subject_id = sid
+                            break
+
+                if not subject_id:
+                    # Skip if no matching subject found
+                    continue
+
+                # Create AI task
+                ai_task = AITask()
+                ai_task.time_allotted = time_allotted
+                ai_task.ai_task_name = task_name
+                ai_task.difficulty = difficulty
+                ai_task.priority = priority
+                ai_task.plan_id = plan.id
+                ai_task.task_id = subject_id
+                self.ai_task_repo.add(ai_task)
+
+            session.flush()
+            session.refresh(plan)
+            created_plans.append(plan)
+
+        if not created_plans:
+            raise ValueError("Failed to create any plans from the generated AI response")
+
+        availability_index.invalidate_after_commit(session, user_id)
+        self._record_generation_after_commit(session, user_id, ai_plan.get("generation_key"), generation_id)
+
+        return generation_id, created_plans
+
+    @staticmethod
+    def _record_generation_after_commit(session, user_id: int, generation_key: Optional[str], generation_id: str) -> None:
+        """Tell the plan store which generation its saved calendar became, once the plans are committed."""
+        store = get_plan_store()
+        if store is None or generation_key is None:
+            return
+        event.listen(
+            session, "after_commit",
+            lambda _: store.set_generation_id(user_id, generation_key, generation_id),
+            once=True,
+        )
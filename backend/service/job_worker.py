@@ -0,0 +1,211 @@
+from __future__ import annotations
+import asyncio
+import os
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from ai_system.utils.telemetry import telemetry_registry
+from backend.config.database import get_session
+from backend.domain.enums import JobKind
+from backend.domain.generation_job import GenerationJob
+from backend.repository.ai_task_repository import AITaskRepository
+from backend.repository.generation_job_repository import GenerationJobRepository
+from backend.repository.plan_repository import PlanRepository
+from backend.repository.subject_repository import SubjectRepository
+from backend.repository.user_repository import UserRepository
+from backend.service.generation_job_service import GenerationJobService
+from backend.service.generation_service import GenerationService
+from backend.service.speculation import speculative_planner
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+
+
+def _job_service(session) -> GenerationJobService:
+    return GenerationJobService(GenerationJobRepository(session), UserRepository(session))
+
+
+def _claim_next() -> Optional[GenerationJob]:
+    with get_session() as session:
+        return _job_service(session).claim_next()
+
+
+def _requeue_stale() -> int:
+    with get_session() as session:
+        return _job_service(session).requeue_stale(timedelta(seconds=JOB_LEASE_SECONDS))
+
+
+def _heartbeat(job_id: str, progress: Optional[int] = None, stage: Optional[str] = None) -> None:
+    with get_session() as session:
+        _job_service(session).heartbeat(job_id, progress=progress, stage=stage)
+
+
+def _complete(job_id: str, generation_id: str) -> None:
+    with get_session() as session:
+        _job_service(session).complete(job_id, generation_id)
+
+
+def _fail(job_id: str, error: str) -> None:
+    with get_session() as session:
+        _job_service(session).fail(job_id, error)
+
+
+def _release(job_id: str) -> None:
+    with get_session() as session:
+        _job_service(session).release(job_id)
+
+
+def _persist(user_id: int, ai_plan: Dict[str, Any], log_prefix: str) -> str:
+    with get_session() as session:
+        service = GenerationService(
+            PlanRepository(session),
+            UserRepository(session),
+            SubjectRepository(session),
+            AITaskRepository(session),
+        )
+        generation_id, _ = service.persist_calendar(user_id=user_id, ai_plan=ai_plan, log_prefix=log_prefix)
+        return generation_id
+
+
+class JobWorkerPool:
+    """
+    Fixed-size pool of asyncio workers that drain the generation_jobs table.
+
+    Jobs are claimed atomically in the database, so they survive API restarts: a job left RUNNING
+    by a dead worker stops heart-beating and is re-queued once its lease expires.
+    """
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        poll_seconds: float = JOB_POLL_SECONDS,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+    ):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        if self._tasks or self.workers <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(_requeue_stale)
+        self._tasks = [asyncio.create_task(self._worker_loop(), name=f"job-worker-{i}") for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._reaper_loop(), name="job-reaper"))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle workers right away instead of waiting for the next poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _reaper_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 2)
+            try:
+                if await asyncio.to_thread(_requeue_stale):
+                    self.notify()
+            except Exception as e:
+                print(f"[JobWorkerPool] Failed to requeue stale jobs: {e}")
+
+    async def _worker_loop(self) -> None:
+        while True:
+            try:
+                job = await asyncio.to_thread(_claim_next)
+            except Exception as e:
+                print(f"[JobWorkerPool] Failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job)
+
+    async def _keep_alive(self, job_id: str) -> None:
+        # a failed heartbeat is retried on the next beat; if they keep failing the lease expires
+        # and the job is re-queued, so make every failure visible
+        while True:
+            await asyncio.sleep(self.lease_seconds / 4)
+            try:
+                await asyncio.to_thread(_heartbeat, job_id)
+            except Exception as e:
+                telemetry_registry.count("job_heartbeat_failures")
+                print(f"[JobWorkerPool] Heartbeat for job {job_id} failed: {type(e).__name__}: {e}")
+
+    async def _run_job(self, job: GenerationJob) -> None:
+        keep_alive = asyncio.create_task(self._keep_alive(job.id))
+        try:
+            if job.kind == JobKind.GENERATE:
+                generation_id = await self._generate(job)
+            else:
+                generation_id = await self._reschedule(job)
+            await asyncio.to_thread(_complete, job.id, generation_id)
+        except asyncio.CancelledError:
+            # shutting down: hand the job back so it resumes after restart
+            await asyncio.shield(asyncio.to_thread(_release, job.id))
+            raise
+        except Exception as e:
+            print(f"[JobWorkerPool] Job {job.id} failed: {e}")
+            await asyncio.to_thread(_fail, job.id, str(e))
+        finally:
+            keep_alive.cancel()
+
+    async def _generate(self, job: GenerationJob) -> str:
+        from ai_system.orchestrator.registry import get_orchestrator
+
+        orchestrator = get_orchestrator()
+        ai_plan = await speculative_planner.take(job.user_id, JobKind.GENERATE, job.merge_mode)
+        if ai_plan is not None:
+            await asyncio.to_thread(_heartbeat, job.id, 95, "saving")
+            return await asyncio.to_thread(_persist, job.user_id, ai_plan, "generate_job")
+
+        await asyncio.to_thread(_heartbeat, job.id, 5, "planning_subjects")
+        async for event, data in orchestrator.astream_plan_for_user(job.user_id, merge_mode=job.merge_mode):
+            if event == "subject_planned":
+                progress = 5 + int(80 * data["completed"] / max(1, data["total"]))
+                await asyncio.to_thread(_heartbeat, job.id, progress, "planning_subjects")
+            elif event == "calendar_merge_started":
+                await asyncio.to_thread(_heartbeat, job.id, 85, "merging_calendar")
+            elif event == "calendar_merged":
+                ai_plan = data
+
+        if not ai_plan or "calendar" not in ai_plan:
+            raise RuntimeError("AI orchestrator failed to generate a valid plan")
+
+        await asyncio.to_thread(_heartbeat, job.id, 95, "saving")
+        return await asyncio.to_thread(_persist, job.user_id, ai_plan, "generate_job")
+
+    async def _reschedule(self, job: GenerationJob) -> str:
+        from ai_system.orchestrator.registry import get_rescheduler
+
+        rescheduler = get_rescheduler()
+        await asyncio.to_thread(_heartbeat, job.id, 10, "rescheduling")
+        ai_plan = await speculative_planner.take(job.user_id, JobKind.RESCHEDULE)
+        if ai_plan is None:
+            ai_plan = await rescheduler.agenerate_plan_for_user(job.user_id, save_to_backend=False)
+
+        if not ai_plan or "calendar" not in ai_plan:
+            raise RuntimeError("AI rescheduler failed to generate a valid plan")
+
+        await asyncio.to_thread(_heartbeat, job.id, 95, "saving")
+        return await asyncio.to_thread(_persist, job.user_id, ai_plan, "reschedule_job")
+
+
+job_worker_pool = JobWorkerPool()
@@ -6,6 +6,7 @@ from uuid import uuid4
 from backend.domain.plan import Plan
 from backend.repository.plan_repository import PlanRepository
 from backend.repository.user_repository import UserRepository
+from backend.service.availability import availability_index
 
 
 class PlanService:
@@ -72,6 +73,7 @@ class PlanService:
             if existing and existing.id != plan_id:
                 raise ValueError(f"Plan already exists for date {plan_date}")
             plan.plan_date = plan_date
+            availability_index.invalidate_after_commit(self.plan_repo.session, user_id)
 
         if notes is not None:
             plan.notes = notes
@@ -88,6 +90,7 @@ class PlanService:
             raise ValueError("Plan does not belong to this user")
 
         self.plan_repo.delete(plan)
+        availability_index.invalidate_after_commit(self.plan_repo.session, user_id)
         return True
 
     def get_latest_generation(self, user_id: int) -> List[Plan]:
@@ -0,0 +1,185 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from ai_system.utils.deadline import Deadline
+from backend.domain.enums import JobKind
+
+SPECULATIVE_PLANNING = os.getenv("SPECULATIVE_PLANNING", "0") in ("1", "true", "True")
+SPECULATION_DEBOUNCE_SECONDS = float(os.getenv("SPECULATION_DEBOUNCE_SECONDS", "3"))
+SPECULATION_TTL_SECONDS = float(os.getenv("SPECULATION_TTL_SECONDS", "900"))
+
+
+def _fingerprint(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+async def _inputs_fingerprint(user_id: int, kind: JobKind) -> str:
+    """Hash of everything the generation / reschedule would be computed from, "today" included."""
+    from ai_system.orchestrator.registry import get_orchestrator, get_rescheduler
+    from ai_system.utils.response_cache import normalize_date
+
+    if kind == JobKind.GENERATE:
+        orchestrator = get_orchestrator()
+        user_data = await orchestrator.backend.aget_user_data(user_id)
+        return _fingerprint(kind.value, user_data, normalize_date(orchestrator.general_agent.current_date()))
+
+    rescheduler = get_rescheduler()
+    feedback, schedule = await rescheduler.backend.aget_feedback_and_schedule(user_id)
+    return _fingerprint(kind.value, feedback, schedule, normalize_date(rescheduler.agent.current_date()))
+
+
+async def _compute(user_id: int, kind: JobKind) -> Dict[str, Any]:
+    from ai_system.orchestrator.registry import get_orchestrator, get_rescheduler
+
+    if kind == JobKind.GENERATE:
+        return await get_orchestrator().agenerate_plan_for_user(user_id, save_to_backend=False)
+    return await get_rescheduler().agenerate_plan_for_user(user_id, save_to_backend=False)
+
+
+@dataclass
+class _Speculation:
+    task: Optional[asyncio.Task] = None
+    fingerprint: Optional[str] = None  # inputs the run was computed from; None while debouncing
+    result: Optional[Dict[str, Any]] = None
+    finished_at: Optional[float] = None
+
+
+class SpeculativePlanner:
+    """
+    Opt-in (SPECULATIVE_PLANNING=1) precomputation of the next generation / reschedule.
+
+    Subject writes schedule a generation and feedback writes a reschedule, debounced so a burst of
+    edits leads to a single run; every new write cancels the pending or running one. The result is
+    staged in memory, not persisted: a following /generate or /reschedule takes it if the user's
+    inputs still hash to what the run started from, and computes normally otherwise.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = SPECULATIVE_PLANNING,
+        debounce_seconds: float = SPECULATION_DEBOUNCE_SECONDS,
+        ttl_seconds: float = SPECULATION_TTL_SECONDS,
+    ):
+        self.enabled = enabled
+        self.debounce_seconds = debounce_seconds
+        self.ttl_seconds = ttl_seconds
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._entries: Dict[Tuple[int, JobKind], _Speculation] = {}
+        self.stats = {"scheduled": 0, "cancelled": 0, "hits": 0, "misses": 0, "failed": 0}
+
+    def start(self) -> None:
+        """Bind to the running event loop (application startup)."""
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        entries, self._entries = list(self._entries.values()), {}
+        tasks = [e.task for e in entries if e.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop = None
+
+    def schedule(self, user_id: int, kind: JobKind) -> None:
+        """(Re)start the debounced speculative run for this user; callable from any thread."""
+        if not self.enabled or self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._restart, user_id, kind)
+
+    def _cancel(self, key: Tuple[int, JobKind]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.task is not None and not entry.task.done():
+            entry.task.cancel()
+            self.stats["cancelled"] += 1
+
+    def _restart(self, user_id: int, kind: JobKind) -> None:
+        key = (user_id, kind)
+        self._cancel(key)
+        entry = _Speculation()
+        entry.task = asyncio.create_task(self._run(key, entry), name=f"speculate-{kind.value}-{user_id}")
+        self._entries[key] = entry
+        self.stats["scheduled"] += 1
+
+    async def _run(self, key: Tuple[int, JobKind], entry: _Speculation) -> None:
+        await asyncio.sleep(self.debounce_seconds)
+        user_id, kind = key
+        try:
+            entry.fingerprint = await _inputs_fingerprint(user_id, kind)
+            result = await _compute(user_id, kind)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[SpeculativePlanner] Speculative {kind.value} for user {user_id} failed: {e}")
+            result = None
+
+        if not isinstance(result, dict) or "calendar" not in result:
+            self.stats["failed"] += 1
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            return
+        entry.result, entry.finished_at = result, time.monotonic()
+
+    async def take(
+        self,
+        user_id: int,
+        kind: JobKind,
+        merge_mode: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        The staged result for the user's current inputs (waiting, within `deadline`, for a matching
+        run that is still in flight), or None if the caller has to compute it.
+        """
+        if not self.enabled:
+            return None
+        key = (user_id, kind)
+        entry = self._entries.get(key)
+        if entry is None or (merge_mode is not None and merge_mode != _default_merge_mode()):
+            self.stats["misses"] += 1
+            return None
+        if entry.fingerprint is None:
+            # still debouncing: the request is about to compute the same thing
+            self._cancel(key)
+            self.stats["misses"] += 1
+            return None
+
+        if await _inputs_fingerprint(user_id, kind) != entry.fingerprint:
+            self._cancel(key)
+            self.stats["misses"] += 1
+            return None
+
+        del self._entries[key]  # claimed: a staged result is served once
+        if entry.result is None and entry.task is not None:
+            # neither a timeout nor this request going away cancels the run; it stays staged instead
+            try:
+                done, _ = await asyncio.wait(
+                    {entry.task}, timeout=deadline.remaining() if deadline is not None else None
+                )
+            except asyncio.CancelledError:
+                self._entries.setdefault(key, entry)
+                raise
+            if not done:
+                self._entries.setdefault(key, entry)
+                self.stats["misses"] += 1
+                return None
+
+        fresh = entry.finished_at is not None and time.monotonic() - entry.finished_at <= self.ttl_seconds
+        if entry.result is None or not fresh:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        print(f"[SpeculativePlanner] Serving staged {kind.value} for user {user_id}")
+        return entry.result
+
+
+def _default_merge_mode() -> str:
+    from ai_system.orchestrator.ai_orchestrator import CALENDAR_MERGE_MODE
+    return CALENDAR_MERGE_MODE
+
+
+speculative_planner = SpeculativePlanner()